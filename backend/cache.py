@@ -0,0 +1,299 @@
+"""
+Small bounded caches with per-entry time-to-live.
+
+MemoryCache is a thread-safe LRU local to one process. SQLiteCache keeps its entries in
+a SQLite file (WAL mode), so several uvicorn workers on the same host share them and see
+each other's invalidations. Both count hits, misses, evictions and expirations; the
+counters of every cache created through make_cache() are reported by all_stats().
+Values stored in a SQLiteCache must be JSON serializable.
+
+Read-through callers race with invalidations: a value loaded before a write committed
+can be stored after the writer deleted the key. delete() and clear() therefore bump a
+generation; take generation(key) before loading and pass it as set(..., if_unchanged=...)
+to skip the store if the key was invalidated meanwhile. At most maxsize generations are
+kept; keys whose generation was dropped share the highest dropped one (the floor), so a
+store can only be skipped needlessly, never let through wrongly.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Caches created with make_cache(), by name
+_registry = {}
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Entries dropped to stay within maxsize
+        self.expirations = 0  # Entries dropped because their TTL ran out
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryCache:
+    backend = "memory"
+
+    def __init__(self, name, maxsize=10_000, ttl=60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._generations = OrderedDict()  # key -> generation of its last invalidation, oldest first
+        self._clock = 0  # Last generation handed out
+        self._floor = 0  # Generation of the keys not in _generations
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters.misses += 1
+                return default
+            if entry[0] <= now:
+                del self._entries[key]
+                self._counters.expirations += 1
+                self._counters.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._counters.hits += 1
+            return entry[1]
+
+    def generation(self, key):
+        """Token for set(..., if_unchanged=token): changes when `key` is deleted or the cache cleared."""
+        with self._lock:
+            return key, self._generations.get(key, self._floor)
+
+    def set(self, key, value, ttl=None, if_unchanged=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if if_unchanged is not None:
+                guarded_key, generation = if_unchanged
+                if self._generations.get(guarded_key, self._floor) != generation:
+                    return  # Invalidated while the value was being loaded
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._clock += 1
+            self._generations[key] = self._clock
+            self._generations.move_to_end(key)
+            while len(self._generations) > max(self.maxsize, 1):
+                self._floor = self._generations.popitem(last=False)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.backend, "size": len(self._entries), "maxsize": self.maxsize,
+                    "ttl_seconds": self.ttl, **self._counters.as_dict()}
+
+
+class SQLiteCache:
+    """
+    Cache shared between processes through a SQLite file. Entries carry an absolute
+    (wall clock) expiry; when the cache is over maxsize the entries closest to expiry are
+    evicted. Counters are per process.
+    """
+    backend = "sqlite"
+
+    def __init__(self, name, path, maxsize=10_000, ttl=60.0):
+        self.name = name
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()  # One connection per thread
+        self._lock = threading.Lock()  # Guards the counters
+        self._counters = _Counters()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (namespace, expires_at)")
+            # Invalidation generations (see the module docstring): clock and floor per namespace
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_generations ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, generation INTEGER NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_generations_order"
+                         " ON cache_generations (namespace, generation)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_clocks ("
+                " namespace TEXT PRIMARY KEY, clock INTEGER NOT NULL, floor INTEGER NOT NULL)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _generation(self, conn, key):
+        row = conn.execute(
+            "SELECT coalesce((SELECT generation FROM cache_generations WHERE namespace = ? AND key = ?),"
+            " (SELECT floor FROM cache_clocks WHERE namespace = ?), 0)",
+            (self.name, key, self.name)
+        ).fetchone()
+        return row[0]
+
+    def _tick(self, conn):
+        """Hands out the next generation of the namespace."""
+        conn.execute("INSERT INTO cache_clocks (namespace, clock, floor) VALUES (?, 0, 0)"
+                     " ON CONFLICT (namespace) DO NOTHING", (self.name,))
+        return conn.execute("UPDATE cache_clocks SET clock = clock + 1 WHERE namespace = ? RETURNING clock",
+                            (self.name,)).fetchone()[0]
+
+    def _count(self, **deltas):
+        with self._lock:
+            for counter, delta in deltas.items():
+                setattr(self._counters, counter, getattr(self._counters, counter) + delta)
+
+    def get(self, key, default=None):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.name, str(key))
+        ).fetchone()
+        if row is None:
+            self._count(misses=1)
+            return default
+        if row[1] <= time.time():
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                         (self.name, str(key), time.time()))
+            self._count(misses=1, expirations=1)
+            return default
+        self._count(hits=1)
+        return json.loads(row[0])
+
+    def generation(self, key):
+        """Token for set(..., if_unchanged=token): changes when `key` is deleted or the cache cleared."""
+        return str(key), self._generation(self._connection(), str(key))
+
+    def set(self, key, value, ttl=None, if_unchanged=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._transaction() as conn:
+            if if_unchanged is not None:
+                guarded_key, generation = if_unchanged
+                if self._generation(conn, guarded_key) != generation:
+                    return  # Invalidated (possibly by another process) while the value was being loaded
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, str(key), json.dumps(value), time.time() + ttl)
+            )
+            (size,) = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                                   (self.name,)).fetchone()
+            if size > self.maxsize:
+                evicted = conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN ("
+                    " SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+                    (self.name, size - self.maxsize)
+                ).rowcount
+                self._count(evictions=evicted)
+
+    def delete(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, str(key)))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_generations (namespace, key, generation) VALUES (?, ?, ?)",
+                (self.name, str(key), self._tick(conn))
+            )
+            (size,) = conn.execute("SELECT COUNT(*) FROM cache_generations WHERE namespace = ?",
+                                   (self.name,)).fetchone()
+            if size > max(self.maxsize, 1):
+                (floor,) = conn.execute(
+                    "SELECT max(generation) FROM (SELECT generation FROM cache_generations"
+                    " WHERE namespace = ? ORDER BY generation LIMIT ?)",
+                    (self.name, size - max(self.maxsize, 1))
+                ).fetchone()
+                conn.execute("DELETE FROM cache_generations WHERE namespace = ? AND generation <= ?",
+                             (self.name, floor))
+                conn.execute("UPDATE cache_clocks SET floor = ? WHERE namespace = ?", (floor, self.name))
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+            conn.execute("DELETE FROM cache_generations WHERE namespace = ?", (self.name,))
+            conn.execute("UPDATE cache_clocks SET floor = ? WHERE namespace = ?", (self._tick(conn), self.name))
+
+    def __len__(self):
+        (size,) = self._connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?", (self.name, time.time())
+        ).fetchone()
+        return size
+
+    def stats(self):
+        with self._lock:
+            counters = self._counters.as_dict()
+        return {"backend": self.backend, "size": len(self), "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl, "path": self.path, **counters}
+
+
+def make_cache(name, backend="memory", maxsize=10_000, ttl=60.0, path=None):
+    """Creates a cache and registers it for all_stats(). backend is "memory", "sqlite" or "off"."""
+    if backend == "sqlite":
+        cache = SQLiteCache(name, path, maxsize=maxsize, ttl=ttl)
+    elif backend == "memory":
+        cache = MemoryCache(name, maxsize=maxsize, ttl=ttl)
+    elif backend == "off":
+        cache = MemoryCache(name, maxsize=0, ttl=ttl)  # Never stores anything, still counts misses
+        cache.backend = "off"
+    else:
+        raise ValueError(f"Unknown cache backend {backend!r}; expected memory, sqlite or off")
+    _registry[name] = cache
+    return cache
+
+
+def all_stats():
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,110 @@
+"""
+Builds the application's blockchain from the settings. Used by the API (routers/events.py)
+and by the ledger service (`python -m backend.cli serve-ledger`, see blockchain/ledger.py).
+"""
+import logging
+import os
+
+from blockchain import snapshot
+from blockchain.compact import CompactChain
+from blockchain.core import Blockchain
+from blockchain.difficulty import DifficultySchedule, target_for_difficulty
+from blockchain.ledger import LedgerBlockchain
+from blockchain.mining import get_miner
+from blockchain.storage import BlockStore
+from blockchain.tiered import TieredChain
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# A persistent chain resumes validation from its last signed snapshot rather than trusting its tip
+SNAPSHOT_KEY = settings.BLOCKCHAIN_SNAPSHOT_KEY or settings.SECRET_KEY
+SNAPSHOT_PATH = None
+if settings.BLOCKCHAIN_DATA_DIR:
+    SNAPSHOT_PATH = settings.BLOCKCHAIN_SNAPSHOT_PATH or os.path.join(settings.BLOCKCHAIN_DATA_DIR, "snapshot.json")
+
+
+def open_store():
+    """
+    When BLOCKCHAIN_DATA_DIR is set the chain is reopened from the on-disk block store (only
+    its tail is verified, so restarts stay fast); otherwise it lives in memory (see
+    BLOCKCHAIN_MEMORY_LAYOUT) and is lost on restart.
+    """
+    if settings.BLOCKCHAIN_DATA_DIR:
+        return BlockStore(
+            settings.BLOCKCHAIN_DATA_DIR,
+            sync_every=settings.BLOCKCHAIN_SYNC_EVERY,
+            sync_interval=settings.BLOCKCHAIN_SYNC_INTERVAL
+        )
+    if settings.BLOCKCHAIN_MEMORY_LAYOUT == "compact":
+        return CompactChain()
+    return TieredChain(
+        hot_blocks=settings.BLOCKCHAIN_HOT_BLOCKS,
+        segment_blocks=settings.BLOCKCHAIN_COLD_SEGMENT_BLOCKS,
+        directory=settings.BLOCKCHAIN_COLD_DIR or None
+    )
+
+
+def difficulty_schedule():
+    """
+    With BLOCKCHAIN_TARGET_BLOCK_SECONDS set, every block records a Proof of Work target that
+    is retargeted from recent block times toward that interval.
+    """
+    if settings.BLOCKCHAIN_TARGET_BLOCK_SECONDS <= 0:
+        return None
+    return DifficultySchedule(
+        settings.BLOCKCHAIN_TARGET_BLOCK_SECONDS,
+        retarget_blocks=settings.BLOCKCHAIN_RETARGET_BLOCKS,
+        initial_target=target_for_difficulty(settings.BLOCKCHAIN_DIFFICULTY)
+    )
+
+
+def uses_ledger_service():
+    """True when this process reads a chain that the ledger service at BLOCKCHAIN_LEDGER_SOCKET writes."""
+    return bool(settings.BLOCKCHAIN_LEDGER_SOCKET)
+
+
+def open_blockchain(metrics=None, writer=False):
+    """
+    The chain this process works on. With BLOCKCHAIN_LEDGER_SOCKET set, API processes get a
+    LedgerBlockchain (reads from the block store, appends through the service); the
+    service itself passes writer=True and owns the store.
+    """
+    if uses_ledger_service() and not writer:
+        if not settings.BLOCKCHAIN_DATA_DIR:
+            raise RuntimeError("BLOCKCHAIN_LEDGER_SOCKET needs the block store: set BLOCKCHAIN_DATA_DIR.")
+        return LedgerBlockchain(
+            settings.BLOCKCHAIN_DATA_DIR,
+            settings.BLOCKCHAIN_LEDGER_SOCKET,
+            difficulty=settings.BLOCKCHAIN_DIFFICULTY,
+            schedule=difficulty_schedule(),
+            metrics=metrics
+        )
+    return Blockchain(
+        difficulty=settings.BLOCKCHAIN_DIFFICULTY,
+        store=open_store(),
+        schedule=difficulty_schedule(),
+        miner=get_miner(settings.BLOCKCHAIN_MINER, settings.BLOCKCHAIN_MINER_WORKERS),
+        metrics=metrics
+    )
+
+
+def restore_snapshot(blockchain):
+    """Resumes validation from the saved signed snapshot, if there is a valid one."""
+    if SNAPSHOT_PATH is None:
+        return
+    saved_snapshot = snapshot.load(SNAPSHOT_PATH)
+    if saved_snapshot is not None and not blockchain.restore_checkpoint(saved_snapshot, SNAPSHOT_KEY):
+        logger.warning("Ignoring chain snapshot %s: bad signature or unknown block.", SNAPSHOT_PATH)
+
+
+def save_snapshot(blockchain):
+    """Persists the signed validation checkpoint of the block store (no-op for in-memory chains)."""
+    if SNAPSHOT_PATH is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(SNAPSHOT_PATH)), exist_ok=True)
+        snapshot.save(SNAPSHOT_PATH, blockchain.signed_snapshot(SNAPSHOT_KEY))
+    except OSError as e:
+        logger.error("Could not save chain snapshot: %s", e)
@@ -0,0 +1,161 @@
+"""
+Command-line administration tasks. Run from the project root, e.g.:
+    python -m backend.cli import-products catalog.csv --batch-size 5000
+    python -m backend.cli rebuild-events
+    python -m backend.cli serve-ledger
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from blockchain.core import Blockchain
+from blockchain.ledger import LedgerError, LedgerServer
+from blockchain.mempool import Mempool
+from blockchain.node import Node, parse_address
+from blockchain.storage import BlockStore
+
+from . import chain, product_import, schema
+from .config import settings
+from .database import SessionLocal, engine
+from .event_sync import EventTableSync
+from .log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def import_products_command(args):
+    fmt = args.format or product_import.detect_format(filename=args.file)
+    if fmt is None:
+        sys.exit(f"Cannot tell the format of {args.file}; pass --format csv|json|ndjson")
+    schema.ensure_schema(engine)
+
+    result = product_import.ImportResult(max_errors=args.max_errors)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with (sys.stdin.buffer if args.file == "-" else open(args.file, "rb")) as stream:
+            product_import.import_products(
+                db, product_import.iter_rows(stream, fmt),
+                batch_size=args.batch_size, on_conflict=args.on_conflict, result=result
+            )
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+
+    for error in result.errors:
+        print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({**result.to_dict(), "errors": len(result.errors), "seconds": round(elapsed, 3),
+                      "rows_per_second": round(result.rows / elapsed) if elapsed else None}))
+    return 1 if result.error_count else 0
+
+
+def rebuild_events_command(args):
+    """Replays the stored chain into the events table. Run it while the API is stopped."""
+    if not settings.BLOCKCHAIN_DATA_DIR or not os.path.isdir(settings.BLOCKCHAIN_DATA_DIR):
+        sys.exit("No block store to replay: BLOCKCHAIN_DATA_DIR is not set or does not exist")
+    schema.ensure_schema(engine)
+    store = BlockStore(settings.BLOCKCHAIN_DATA_DIR)
+    try:
+        table = EventTableSync(Blockchain(difficulty=settings.BLOCKCHAIN_DIFFICULTY, store=store), SessionLocal)
+        started = time.perf_counter()
+        blocks = table.sync() if args.missing_only else table.rebuild()
+        elapsed = time.perf_counter() - started
+    finally:
+        store.close()
+    print(json.dumps({"blocks": blocks, "seconds": round(elapsed, 3)}))
+    return 0
+
+
+def serve_ledger_command(args):
+    """
+    Runs the single writer of the block store for API processes started with
+    BLOCKCHAIN_LEDGER_SOCKET (e.g. `uvicorn --workers N`), until SIGTERM / Ctrl+C. It also
+    keeps the events table in sync and runs the replication node (NODE_LISTEN).
+    """
+    socket_path = args.socket or settings.BLOCKCHAIN_LEDGER_SOCKET
+    if not socket_path:
+        sys.exit("No socket to listen on: pass --socket or set BLOCKCHAIN_LEDGER_SOCKET")
+    if not settings.BLOCKCHAIN_DATA_DIR:
+        sys.exit("The ledger service needs a block store: set BLOCKCHAIN_DATA_DIR")
+    configure_logging(settings.LOG_LEVEL, settings.LOG_RATE_LIMIT, settings.LOG_RATE_LIMIT_PERIOD_SECONDS)
+    schema.ensure_schema(engine)
+
+    blockchain = chain.open_blockchain(writer=True)
+    chain.restore_snapshot(blockchain)
+    table = EventTableSync(blockchain, SessionLocal)
+    blockchain.add_commit_listener(table.on_block)
+    blockchain.add_rollback_listener(table.truncate)
+    table.sync()
+    # Events of local blocks dropped in favour of a longer fork are sealed again
+    mempool = Mempool(blockchain, max_batch=settings.MEMPOOL_MAX_BATCH, max_wait=settings.MEMPOOL_MAX_WAIT_SECONDS)
+    mempool.start()
+    node = None
+    if settings.NODE_LISTEN:
+        node_host, node_port = parse_address(settings.NODE_LISTEN)
+        node = Node(
+            blockchain,
+            host=node_host,
+            port=node_port,
+            peers=[peer.strip() for peer in settings.NODE_PEERS.split(",") if peer.strip()],
+            sync_batch=settings.NODE_SYNC_BATCH,
+            sync_interval=settings.NODE_SYNC_INTERVAL_SECONDS,
+            max_learned_peers=settings.NODE_MAX_LEARNED_PEERS,
+            learned_peer_ttl=settings.NODE_LEARNED_PEER_TTL_SECONDS,
+            on_orphaned=lambda orphaned: [mempool.submit(event) for event in orphaned]
+        )
+        logger.info("Replication node listening on %s", node.start())
+    server = LedgerServer(blockchain, socket_path, node=node)
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    try:
+        server.start()
+    except LedgerError as e:
+        sys.exit(str(e))
+    logger.info("Ledger service on %s at block %d", socket_path, blockchain.get_latest_block().index)
+    try:
+        stopping.wait()
+    finally:
+        server.stop()
+        if node is not None:
+            node.stop()
+        mempool.stop()
+        if blockchain.is_chain_valid():
+            chain.save_snapshot(blockchain)
+        blockchain.chain.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Supply Chain Tracker administration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import-products", help="Bulk insert/update products by SKU")
+    importer.add_argument("file", help="CSV, JSON array or NDJSON file ('-' for stdin)")
+    importer.add_argument("--format", choices=product_import.FORMATS, help="Default: from the file extension")
+    importer.add_argument("--batch-size", type=int, default=settings.PRODUCT_IMPORT_BATCH_SIZE)
+    importer.add_argument("--on-conflict", choices=product_import.ON_CONFLICT, default="update",
+                          help="What to do with SKUs that already exist")
+    importer.add_argument("--max-errors", type=int, default=100, help="Row errors to print")
+    importer.set_defaults(handler=import_products_command)
+
+    rebuild = commands.add_parser("rebuild-events", help="Rebuild the SQL events table from the chain")
+    rebuild.add_argument("--missing-only", action="store_true",
+                         help="Only copy blocks the table does not have yet instead of replaying everything")
+    rebuild.set_defaults(handler=rebuild_events_command)
+
+    ledger = commands.add_parser("serve-ledger", help="Run the single writer of the block store for uvicorn workers")
+    ledger.add_argument("--socket", help="Unix socket to listen on (default: BLOCKCHAIN_LEDGER_SOCKET)")
+    ledger.set_defaults(handler=serve_ledger_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
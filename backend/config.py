@@ -8,11 +8,97 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./default_supply_chain.db")
+    # Connection pool (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")) # -1 = never
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # SQLite pragmas applied to every connection
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))) # 0 = no memory mapping
     BLOCKCHAIN_DIFFICULTY: int = int(os.getenv("BLOCKCHAIN_DIFFICULTY", "2"))
+    # Adaptive difficulty: retarget every BLOCKCHAIN_RETARGET_BLOCKS blocks toward this block
+    # interval, starting from BLOCKCHAIN_DIFFICULTY. 0 = fixed BLOCKCHAIN_DIFFICULTY.
+    BLOCKCHAIN_TARGET_BLOCK_SECONDS: float = float(os.getenv("BLOCKCHAIN_TARGET_BLOCK_SECONDS", "0"))
+    BLOCKCHAIN_RETARGET_BLOCKS: int = int(os.getenv("BLOCKCHAIN_RETARGET_BLOCKS", "16"))
+    # Directory of the persistent block store. Leave empty to keep the chain in memory only.
+    BLOCKCHAIN_DATA_DIR: str = os.getenv("BLOCKCHAIN_DATA_DIR", os.path.join(BASE_DIR, "chain_data"))
+    # fsync after this many appended blocks (1 = every block is durable before it is acknowledged)
+    BLOCKCHAIN_SYNC_EVERY: int = int(os.getenv("BLOCKCHAIN_SYNC_EVERY", "1"))
+    # ...or after this many seconds, whichever comes first (0 = no time trigger, only BLOCKCHAIN_SYNC_EVERY)
+    BLOCKCHAIN_SYNC_INTERVAL: float = float(os.getenv("BLOCKCHAIN_SYNC_INTERVAL", "0"))
+    # Proof of Work engine: "serial", "thread" or "process"; 0 workers = one per CPU core
+    BLOCKCHAIN_MINER: str = os.getenv("BLOCKCHAIN_MINER", "serial")
+    BLOCKCHAIN_MINER_WORKERS: int = int(os.getenv("BLOCKCHAIN_MINER_WORKERS", "0"))
+    # Worker processes used by full chain audits (POST /events/blockchain/validate?full=true); 0 = one per core
+    BLOCKCHAIN_AUDIT_WORKERS: int = int(os.getenv("BLOCKCHAIN_AUDIT_WORKERS", "0"))
+    # Layout of in-memory chains: "tiered" keeps the newest BLOCKCHAIN_HOT_BLOCKS blocks as objects
+    # and compacts older ones BLOCKCHAIN_COLD_SEGMENT_BLOCKS at a time into compressed, memory-mapped
+    # segments under BLOCKCHAIN_COLD_DIR (empty = a temporary directory removed on shutdown);
+    # "compact" keeps every block in typed arrays (see blockchain/compact.py)
+    BLOCKCHAIN_MEMORY_LAYOUT: str = os.getenv("BLOCKCHAIN_MEMORY_LAYOUT", "tiered")
+    BLOCKCHAIN_HOT_BLOCKS: int = int(os.getenv("BLOCKCHAIN_HOT_BLOCKS", "1024"))
+    BLOCKCHAIN_COLD_SEGMENT_BLOCKS: int = int(os.getenv("BLOCKCHAIN_COLD_SEGMENT_BLOCKS", "1024"))
+    BLOCKCHAIN_COLD_DIR: str = os.getenv("BLOCKCHAIN_COLD_DIR", "")
+    # Signed (height, hash) validation snapshot of the block store, restored at startup so
+    # validation resumes from it (empty = snapshot.json inside BLOCKCHAIN_DATA_DIR).
+    # Signed with SECRET_KEY unless BLOCKCHAIN_SNAPSHOT_KEY is set.
+    BLOCKCHAIN_SNAPSHOT_PATH: str = os.getenv("BLOCKCHAIN_SNAPSHOT_PATH", "")
+    BLOCKCHAIN_SNAPSHOT_KEY: str = os.getenv("BLOCKCHAIN_SNAPSHOT_KEY", "")
+    # Unix socket of the ledger service (`python -m backend.cli serve-ledger`). When set, API
+    # processes (e.g. `uvicorn --workers N`) read BLOCKCHAIN_DATA_DIR directly and send appends
+    # to the service, the single writer. Empty = each process owns its chain.
+    BLOCKCHAIN_LEDGER_SOCKET: str = os.getenv("BLOCKCHAIN_LEDGER_SOCKET", "")
+    # Replication: listen for peers on NODE_LISTEN ("host:port", empty = single node) and sync
+    # with the comma separated NODE_PEERS; peers are also polled every NODE_SYNC_INTERVAL_SECONDS
+    NODE_LISTEN: str = os.getenv("NODE_LISTEN", "")
+    NODE_PEERS: str = os.getenv("NODE_PEERS", "")
+    NODE_SYNC_INTERVAL_SECONDS: float = float(os.getenv("NODE_SYNC_INTERVAL_SECONDS", "5"))
+    NODE_SYNC_BATCH: int = int(os.getenv("NODE_SYNC_BATCH", "500")) # Blocks per catch-up request
+    # Nodes outside NODE_PEERS that announce themselves are remembered as peers: at most this many
+    # (0 = only listen to NODE_PEERS), each forgotten this long after its last announcement
+    NODE_MAX_LEARNED_PEERS: int = int(os.getenv("NODE_MAX_LEARNED_PEERS", "16"))
+    NODE_LEARNED_PEER_TTL_SECONDS: float = float(os.getenv("NODE_LEARNED_PEER_TTL_SECONDS", "600"))
+    # Mempool: seal a block once this many events are pending or the oldest waited this long
+    MEMPOOL_MAX_BATCH: int = int(os.getenv("MEMPOOL_MAX_BATCH", "500"))
+    MEMPOOL_MAX_WAIT_SECONDS: float = float(os.getenv("MEMPOOL_MAX_WAIT_SECONDS", "2.0"))
+    # Read-through cache of products by id/SKU: "memory", "sqlite" (shared between workers) or "off".
+    # Unknown ids/SKUs are remembered for PRODUCT_CACHE_NEGATIVE_TTL_SECONDS.
+    PRODUCT_CACHE_BACKEND: str = os.getenv("PRODUCT_CACHE_BACKEND", "memory")
+    PRODUCT_CACHE_SIZE: int = int(os.getenv("PRODUCT_CACHE_SIZE", "50000"))
+    PRODUCT_CACHE_TTL_SECONDS: float = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300"))
+    PRODUCT_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+    PRODUCT_CACHE_PATH: str = os.getenv("PRODUCT_CACHE_PATH", os.path.join(BASE_DIR, "cache", "shared_cache.sqlite3"))
+    # Rows per INSERT ... ON CONFLICT batch (and commit) of the bulk product import
+    PRODUCT_IMPORT_BATCH_SIZE: int = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+    # Bounded ingest queue in front of the mempool; when full, /events/record answers 429
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+    INGEST_RETRY_AFTER_SECONDS: int = int(os.getenv("INGEST_RETRY_AFTER_SECONDS", "1"))
+    INGEST_BULK_MAX_EVENTS: int = int(os.getenv("INGEST_BULK_MAX_EVENTS", "5000")) # Per /events/record/bulk call
     # Authentication settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "a_very_default_secret_key_if_not_set_in_env")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # bcrypt cost factor for new hashes; stored hashes with another cost are rehashed at login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads dedicated to bcrypt (0 = one per CPU core) and the most jobs allowed to wait
+    # for them before logins are answered with 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # Cache of decoded tokens and active users: "memory" (per process), "sqlite" (shared by
+    # the workers on this host through AUTH_CACHE_PATH) or "off"
+    AUTH_CACHE_BACKEND: str = os.getenv("AUTH_CACHE_BACKEND", "memory")
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_PATH: str = os.getenv("AUTH_CACHE_PATH", os.path.join(BASE_DIR, "cache", "shared_cache.sqlite3"))
+    # Monitoring: GET /metrics (Prometheus text format) and leveled, rate-limited logging
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_RATE_LIMIT: int = int(os.getenv("LOG_RATE_LIMIT", "20")) # Same message per period; 0 = unlimited
+    LOG_RATE_LIMIT_PERIOD_SECONDS: float = float(os.getenv("LOG_RATE_LIMIT_PERIOD_SECONDS", "60"))
 
     class Config:
         env_file = os.path.join(BASE_DIR, ".env")
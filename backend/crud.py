@@ -1,17 +1,120 @@
+import datetime
+import sys
+
 from sqlalchemy.orm import Session
 
-from . import models, schemas, security
+from . import models, schemas, search, security
+from .cache import make_cache
+from .config import settings
+
+# Read-through cache of products by id and by SKU ("id:<id>" / "sku:<sku>" -> column
+# snapshot, or MISSING for lookups that found nothing). Writes made through this module
+# invalidate it; the bulk import clears it.
+product_cache = make_cache(
+    "products", settings.PRODUCT_CACHE_BACKEND, maxsize=settings.PRODUCT_CACHE_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS, path=settings.PRODUCT_CACHE_PATH
+)
+MISSING = {"missing": True}
+CACHED_PRODUCT_FIELDS = ("id", "name", "description", "sku", "manufacturer", "created_at")
+
+
+def _cached_product(key: str, load):
+    snapshot = product_cache.get(key)
+    if snapshot == MISSING:
+        return None
+    if snapshot is not None:
+        # Detached copy: fine for reading and serializing, not for modifying
+        created_at = snapshot["created_at"]
+        return models.Product(**{
+            **snapshot,
+            "created_at": datetime.datetime.fromisoformat(created_at) if created_at else None
+        })
+    # A write that commits while we load invalidates `key` afterwards: then the row we read
+    # may be stale and is not stored. Writes invalidate the id and the SKUs of a product
+    # together, so the token of `key` also guards the entry stored under the other key.
+    token = product_cache.generation(key)
+    product = load()
+    if product is None:
+        # Negative entry, kept briefly: unknown ids are usually retried or mistyped
+        product_cache.set(key, MISSING, ttl=settings.PRODUCT_CACHE_NEGATIVE_TTL_SECONDS, if_unchanged=token)
+    else:
+        snapshot = {field: getattr(product, field) for field in CACHED_PRODUCT_FIELDS}
+        snapshot["created_at"] = product.created_at.isoformat() if product.created_at else None
+        product_cache.set(f"id:{product.id}", snapshot, if_unchanged=token)
+        product_cache.set(f"sku:{product.sku}", snapshot, if_unchanged=token)
+    return product
+
+
+def invalidate_product(product_id: int = None, *skus):
+    if product_id is not None:
+        product_cache.delete(f"id:{product_id}")
+    for sku in skus:
+        if sku is not None:
+            product_cache.delete(f"sku:{sku}")
 
 
 # --- Product CRUD ---
 def get_product(db: Session, product_id: int):
+    return _cached_product(f"id:{product_id}", lambda: _load_product(db, product_id))
+
+def _load_product(db: Session, product_id: int):
     return db.query(models.Product).filter(models.Product.id == product_id).first()
 
+def get_existing_product_ids(db: Session, product_ids, chunk_size: int = 500) -> set:
+    """Returns the subset of `product_ids` that exist, with one IN query per chunk of ids."""
+    wanted = list(set(product_ids))
+    existing = set()
+    # Chunked to stay under the bound-parameter limit of SQLite
+    for start in range(0, len(wanted), chunk_size):
+        chunk = wanted[start:start + chunk_size]
+        rows = db.query(models.Product.id).filter(models.Product.id.in_(chunk)).all()
+        existing.update(row[0] for row in rows)
+    return existing
+
 def get_product_by_sku(db: Session, sku: str):
-    return db.query(models.Product).filter(models.Product.sku == sku).first()
+    return _cached_product(
+        f"sku:{sku}", lambda: db.query(models.Product).filter(models.Product.sku == sku).first()
+    )
+
+def _prefix_upper_bound(prefix: str):
+    """Smallest string above every string starting with `prefix`, or None if there is none."""
+    # Trailing U+10FFFF cannot be incremented: bump the character before it instead
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code_point = ord(prefix[-1]) + 1
+    if 0xD800 <= code_point <= 0xDFFF:
+        code_point = 0xE000  # Surrogates cannot be encoded for the database
+    return prefix[:-1] + chr(code_point)
 
-def get_products(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Product).offset(skip).limit(limit).all()
+def get_products(db: Session, skip: int = 0, limit: int = 100, after_id: int = None,
+                 manufacturer: str = None, name_prefix: str = None,
+                 created_after=None, created_before=None, search_query: str = None):
+    """
+    Products in id order. Pass the id of the last product of the previous page as
+    `after_id` (keyset pagination): unlike a large `skip`, it costs the same on every page.
+    """
+    query = db.query(models.Product)
+    if after_id is not None:
+        query = query.filter(models.Product.id > after_id)
+    if manufacturer is not None:
+        query = query.filter(models.Product.manufacturer == manufacturer)
+    if name_prefix:
+        # A range on the indexed column instead of LIKE 'prefix%', which most databases cannot index
+        query = query.filter(models.Product.name >= name_prefix)
+        upper = _prefix_upper_bound(name_prefix)
+        if upper is not None:
+            query = query.filter(models.Product.name < upper)
+    if created_after is not None:
+        query = query.filter(models.Product.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(models.Product.created_at < created_before)
+    if search_query and search_query.strip():
+        query = query.filter(search.search_clause(db.get_bind().dialect.name, search_query))
+    query = query.order_by(models.Product.id)
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_product(db: Session, product: schemas.ProductCreate):
     db_product = models.Product(
@@ -23,28 +126,52 @@ def create_product(db: Session, product: schemas.ProductCreate):
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    # Drop negative entries for the new id/SKU
+    invalidate_product(db_product.id, db_product.sku)
     return db_product
 
 def update_product(db: Session, product_id: int, product_update: schemas.ProductUpdate):
-    db_product = get_product(db, product_id)
+    db_product = _load_product(db, product_id)
     if not db_product:
         return None
+    old_sku = db_product.sku
     update_data = product_update.model_dump(exclude_unset=True) # Pydantic v2
     # update_data = product_update.dict(exclude_unset=True) # Pydantic v1
     for key, value in update_data.items():
         setattr(db_product, key, value)
     db.commit()
     db.refresh(db_product)
+    invalidate_product(product_id, old_sku, db_product.sku)
     return db_product
 
 def delete_product(db: Session, product_id: int):
-    db_product = get_product(db, product_id)
+    db_product = _load_product(db, product_id)
     if not db_product:
         return None
     db.delete(db_product)
     db.commit()
+    invalidate_product(product_id, db_product.sku)
     return db_product
 
+# --- Off-chain event table (see event_sync.py) ---
+def search_events(db: Session, product_id: int = None, event_type: str = None, location: str = None,
+                  actor: str = None, since=None, until=None, after_id: int = None, limit: int = 100):
+    """(Event, product name) rows in chain order, keyset-paginated on the event id."""
+    query = db.query(models.Event, models.Product.name).outerjoin(
+        models.Product, models.Event.product_id == models.Product.id
+    )
+    for column, value in ((models.Event.product_id, product_id), (models.Event.event_type, event_type),
+                          (models.Event.location, location), (models.Event.actor, actor)):
+        if value is not None:
+            query = query.filter(column == value)
+    if since is not None:
+        query = query.filter(models.Event.timestamp >= since)
+    if until is not None:
+        query = query.filter(models.Event.timestamp <= until)
+    if after_id is not None:
+        query = query.filter(models.Event.id > after_id)
+    return query.order_by(models.Event.id).limit(limit).all()
+
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
@@ -57,8 +184,9 @@ def get_user_by_email(db: Session, email: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = security.get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    if hashed_password is None:
+        hashed_password = security.get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -69,3 +197,11 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+def update_user_password_hash(db: Session, user_id: int, hashed_password: str):
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
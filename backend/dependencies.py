@@ -1,11 +1,15 @@
+import hashlib
+import time
 from typing import Annotated  # For Python 3.9+
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
 from . import crud, models, schemas, security
+from .cache import make_cache
 from .config import settings
 from .database import get_db
 
@@ -15,6 +19,58 @@ from .database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token") # Points to your login endpoint
 
+# Decoded tokens (sha256 of the token -> subject) and active users (username -> column
+# snapshot), so an authenticated request normally needs neither a JWT decode nor a query.
+token_cache = make_cache(
+    "auth_tokens", settings.AUTH_CACHE_BACKEND, maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS, path=settings.AUTH_CACHE_PATH
+)
+user_cache = make_cache(
+    "auth_users", settings.AUTH_CACHE_BACKEND, maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS, path=settings.AUTH_CACHE_PATH
+)
+# Columns kept in the user cache; the password hash is never cached
+CACHED_USER_FIELDS = ("id", "username", "email", "full_name", "is_active")
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_user(_mapper, _connection, target):
+    """Drops a changed, deactivated or deleted user (under its old and new username) from the cache."""
+    history = inspect(target).attrs.username.history
+    for username in {target.username, *(history.deleted or ())}:
+        if username is not None:
+            user_cache.delete(username)
+
+
+def _token_subject(token: str):
+    """The token's subject, from the cache or by decoding it. Raises JWTError for invalid tokens."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    username = token_cache.get(key)
+    if username is not None:
+        return username
+    payload = security.jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    username = payload.get("sub")
+    if username is not None:
+        # Never cache a token past its own expiry
+        ttl = settings.AUTH_CACHE_TTL_SECONDS
+        if payload.get("exp") is not None:
+            ttl = min(ttl, payload["exp"] - time.time())
+        token_cache.set(key, username, ttl=ttl)
+    return username
+
+
+def _load_user(db: Session, username: str):
+    snapshot = user_cache.get(username)
+    if snapshot is not None:
+        # Detached copy of the cached columns; enough for authorization and /auth/users/me
+        return models.User(**snapshot)
+    user = crud.get_user_by_username(db, username=username)
+    if user is not None and user.is_active:
+        user_cache.set(username, {field: getattr(user, field) for field in CACHED_USER_FIELDS})
+    return user
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[Session, Depends(get_db)]
@@ -25,15 +81,14 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = security.jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
+        username: str = _token_subject(token)
         if username is None:
             raise credentials_exception
         token_data = schemas.TokenData(username=username)
     except JWTError as exc:
         raise credentials_exception from exc
 
-    user = crud.get_user_by_username(db, username=token_data.username)
+    user = _load_user(db, token_data.username)
     if user is None:
         raise credentials_exception
     if not user.is_active: # Optional: Check if user is active
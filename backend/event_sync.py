@@ -0,0 +1,111 @@
+"""
+Keeps the `events` SQL table in step with the blockchain.
+
+The table is derived data: its synced height is simply the highest block index it holds,
+so after a crash or a failed write sync() picks up where the table stops, and rebuild()
+replays the whole chain from genesis.
+"""
+import datetime
+import threading
+
+from sqlalchemy import delete, func, insert, select
+
+from blockchain.index import event_time
+
+from . import crud, models
+
+# Rows per INSERT when catching up or rebuilding
+SYNC_BATCH_ROWS = 5000
+
+
+class EventTableSync:
+    def __init__(self, blockchain, session_factory):
+        self.blockchain = blockchain
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._synced_height = None  # Number of blocks (from genesis) reflected in the table
+
+    def synced_height(self, db):
+        (highest,) = db.execute(select(func.max(models.Event.block_index))).one()
+        return 1 if highest is None else highest + 1  # The genesis block holds no events
+
+    def on_block(self, block):
+        """Blockchain commit listener: copies the block's events, or catches up if blocks were missed."""
+        with self._lock, self.session_factory() as db:
+            if self._synced_height is None:
+                self._synced_height = self.synced_height(db)
+            if block.index < self._synced_height:
+                return
+            if block.index == self._synced_height:
+                self._write(db, [block])
+                self._synced_height = block.index + 1
+            else:
+                # Blocks were missed (e.g. an earlier write failed): replay from the table's height
+                self._catch_up(db)
+
+    def sync(self):
+        """Copies every block the table does not cover yet. Returns the number of blocks copied."""
+        with self._lock, self.session_factory() as db:
+            return self._catch_up(db)
+
+    def rebuild(self):
+        """Empties the table and replays the chain from genesis. Returns the number of blocks replayed."""
+        with self._lock, self.session_factory() as db:
+            db.execute(delete(models.Event))
+            db.commit()
+            return self._catch_up(db)
+
+    def _catch_up(self, db):
+        start = self.synced_height(db)
+        stop = len(self.blockchain.chain)
+        pending = []
+        rows = 0
+        for block in self.blockchain.iter_blocks(start, stop):
+            pending.append(block)
+            rows += len(block.events())
+            if rows >= SYNC_BATCH_ROWS:
+                self._write(db, pending)
+                pending, rows = [], 0
+        if pending:
+            self._write(db, pending)
+        self._synced_height = max(start, stop)
+        return max(0, stop - start)
+
+    def truncate(self, height):
+        """Drops the rows of blocks at index >= height (e.g. after the chain was replaced)."""
+        with self._lock, self.session_factory() as db:
+            db.execute(delete(models.Event).where(models.Event.block_index >= height))
+            db.commit()
+            self._synced_height = None
+
+    def _write(self, db, blocks):
+        rows = []
+        for block in blocks:
+            if block.index == 0:
+                continue
+            for position, event in enumerate(block.events()):
+                if not isinstance(event, dict):
+                    continue
+                rows.append({
+                    "product_id": event.get("product_id"),
+                    "event_type": event.get("event_type") or "",
+                    "location": event.get("location"),
+                    "actor": event.get("actor"),
+                    "notes": event.get("notes"),
+                    "timestamp": datetime.datetime.fromtimestamp(
+                        event_time(event, block), datetime.timezone.utc
+                    ).replace(tzinfo=None),
+                    "block_index": block.index,
+                    "block_hash": block.hash,
+                    "position": position,
+                })
+        if rows:
+            # Events of products deleted off-chain keep their row, without the product link
+            existing = crud.get_existing_product_ids(
+                db, [row["product_id"] for row in rows if isinstance(row["product_id"], int)]
+            )
+            for row in rows:
+                if row["product_id"] not in existing:
+                    row["product_id"] = None
+            db.execute(insert(models.Event), rows)
+        db.commit()
@@ -0,0 +1,196 @@
+"""
+Asynchronous event ingestion.
+
+The /events/record endpoint only validates an event and puts it on a bounded asyncio queue,
+answering with a "queued" receipt right away. A single worker task drains the queue in
+order, hands each batch to the mempool and seals it into a block on a dedicated thread,
+so mining never runs on the event loop or in FastAPI's request threadpool.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from blockchain.mempool import Receipt
+
+from .metrics import latency_summary
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised by IngestPipeline.enqueue when the queue is at capacity."""
+
+
+class IngestPipeline:
+    def __init__(self, mempool, max_queue=10_000, max_batch=500, max_wait=2.0, latency_window=1000):
+        self.mempool = mempool
+        self.max_queue = max_queue
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+
+        self._queue = None
+        self._worker = None
+        # One thread keeps blocks in queue order and mining off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-commit")
+        self._waiters = {}  # receipt_id -> asyncio.Future resolved when the receipt settles
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.committed = 0
+        self.failed = 0
+        self._queue_waits = deque(maxlen=latency_window)  # Seconds spent in the queue
+        self._commit_latencies = deque(maxlen=latency_window)  # Seconds from enqueue to sealed
+
+    # --- Lifecycle ---
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run(), name="ingest-worker")
+
+    async def stop(self):
+        """Commits everything still queued, then stops the worker."""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    # --- Producer side ---
+    def enqueue(self, event):
+        """Queues an event and returns its "queued" Receipt. Raises QueueFullError under backpressure."""
+        if self._queue is None:
+            raise RuntimeError("Ingest pipeline is not running")
+        receipt = Receipt(event, status="queued")
+        try:
+            self._queue.put_nowait((receipt, time.monotonic()))
+        except asyncio.QueueFull as exc:
+            self.rejected += 1
+            raise QueueFullError(f"Ingest queue is full ({self.max_queue} events)") from exc
+        self.mempool.track(receipt)
+        self.enqueued += 1
+        return receipt
+
+    def enqueue_many(self, events):
+        """
+        Queues a batch of events back to back, all or nothing: if the queue cannot take the
+        whole batch, nothing is queued and QueueFullError is raised. Consecutive events are
+        picked up together by the worker, so they are sealed in as few blocks as max_batch allows.
+        """
+        if self._queue is None:
+            raise RuntimeError("Ingest pipeline is not running")
+        if self.max_queue > 0 and self._queue.qsize() + len(events) > self.max_queue:
+            self.rejected += len(events)
+            raise QueueFullError(
+                f"Ingest queue cannot take {len(events)} more event(s) "
+                f"({self._queue.qsize()}/{self.max_queue} queued)"
+            )
+        enqueued_at = time.monotonic()
+        receipts = []
+        for event in events:
+            receipt = Receipt(event, status="queued")
+            self._queue.put_nowait((receipt, enqueued_at))
+            self.mempool.track(receipt)
+            receipts.append(receipt)
+        self.enqueued += len(receipts)
+        return receipts
+
+    async def wait_for(self, receipt_id, timeout):
+        """Waits up to `timeout` seconds for a receipt to be sealed or failed; returns the Receipt (or None)."""
+        receipt = self.mempool.get_receipt(receipt_id)
+        if receipt is None or receipt.status in ("sealed", "failed") or timeout <= 0:
+            return receipt
+        waiter = self._waiters.get(receipt_id)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[receipt_id] = waiter
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return receipt
+
+    # --- Consumer side ---
+    async def _next_batch(self):
+        """Waits for one event, then collects more until max_batch or max_wait is reached."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _commit(self, receipts):
+        """Runs on the commit thread: moves the batch into the mempool and seals it."""
+        for receipt in receipts:
+            self.mempool.submit(receipt.event, receipt)
+        while self.mempool.seal() is not None:
+            pass
+
+    def resubmit(self, events):
+        """
+        Seals events that did not come in through a request (e.g. those of local blocks dropped
+        for a longer fork) on the commit thread, in order with queued batches. Callable from any thread.
+        """
+        self._executor.submit(self._reseal, list(events))
+
+    def _reseal(self, events):
+        try:
+            for event in events:
+                self.mempool.submit(event)
+            while self.mempool.seal() is not None:
+                pass
+        except Exception as e:
+            logger.error("Ingest pipeline: failed to seal %d resubmitted event(s): %s", len(events), e)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            started = time.monotonic()
+            receipts = [receipt for receipt, _enqueued_at in batch]
+            try:
+                await loop.run_in_executor(self._executor, self._commit, receipts)
+            except Exception as e:
+                logger.error("Ingest pipeline: failed to commit %d event(s): %s", len(receipts), e)
+            finished = time.monotonic()
+            for receipt, enqueued_at in batch:
+                self._queue_waits.append(started - enqueued_at)
+                if receipt.status == "sealed":
+                    self.committed += 1
+                    self._commit_latencies.append(finished - enqueued_at)
+                else:
+                    self.failed += 1
+                waiter = self._waiters.pop(receipt.receipt_id, None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(receipt)
+                self._queue.task_done()
+
+    # --- Introspection ---
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "mempool_pending": self.mempool.pending_count(),
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "committed": self.committed,
+            "failed": self.failed,
+            "queue_wait_seconds": latency_summary(self._queue_waits),
+            "commit_latency_seconds": latency_summary(self._commit_latencies),
+        }
@@ -0,0 +1,52 @@
+"""
+Logging setup for the API: leveled output on stderr with per-message rate limiting, so a
+failure that repeats on every block or request cannot flood the log (or slow the hot path).
+"""
+import logging
+import threading
+import time
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `limit` records per `period` seconds for each message template
+    (logger name + unformatted message). The first record after a suppressed burst says
+    how many were dropped.
+    """
+
+    def __init__(self, limit=20, period=60.0):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self._lock = threading.Lock()
+        self._windows = {}  # (logger, template) -> [window start, records passed, records dropped]
+
+    def filter(self, record):
+        if self.limit <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                dropped = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, 0]
+                if dropped:
+                    record.msg = f"{record.msg} ({dropped} similar message(s) suppressed)"
+            if window[1] >= self.limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+def configure_logging(level="INFO", rate_limit=20, period=60.0):
+    """Routes the application loggers (backend.*, blockchain.*) to stderr at `level`."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(RateLimitFilter(rate_limit, period))
+    for name in ("backend", "blockchain"):
+        logger = logging.getLogger(name)
+        logger.setLevel(level.upper())
+        logger.handlers = [handler]
+        logger.propagate = False
@@ -1,22 +1,50 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
-from . import models
-# Import engine for table creation
+from . import cache, metrics, schema
+from .config import settings
+from .log import configure_logging
+# Import engine for schema setup
 from .database import engine
 # Import your routers
 from .routers import auth as auth_router  # Import the new auth router
 from .routers import events, products
 
-models.Base.metadata.create_all(bind=engine)
+configure_logging(settings.LOG_LEVEL, settings.LOG_RATE_LIMIT, settings.LOG_RATE_LIMIT_PERIOD_SECONDS)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Schema and chain are set up here rather than at import time, so importing the app (and
+    # rolling restarts) stay fast: an up-to-date schema is a version check, a block store only
+    # re-verifies its tail, and the indexes fill up in the background (see GET /ready)
+    schema.ensure_schema(engine)
+    events.open_ledger()
+    # Start the event ingestion worker; commit what is still queued on shutdown
+    await events.ingest_pipeline.start()
+    events.warm_up()
+    if events.node is not None:
+        logger.info("Replication node listening on %s", events.node.start())
+    yield
+    if events.node is not None:
+        events.node.stop()
+    await events.ingest_pipeline.stop()
+    events.mempool.stop()
+    events.save_snapshot()
+
 
 app = FastAPI(
     title="Supply Chain Tracker API",
     description="API for tracking products and their supply chain events using a blockchain. The UI is served from the root.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS configuration - still useful
@@ -34,7 +62,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+if settings.METRICS_ENABLED:
+    # Per-route request latency and SQL statement timings for GET /metrics
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    metrics.registry.gauge("blockchain_height", "Index of the latest block",
+                           lambda: events.supply_chain_blockchain.get_latest_block().index)
+    metrics.registry.gauge("blockchain_next_difficulty", "Proof of Work target of the next block, in leading hex zeros",
+                           events.next_difficulty)
+    metrics.registry.gauge("mempool_pending_events", "Events waiting to be sealed into a block",
+                           lambda: events.mempool.pending_count())
+    metrics.registry.gauge("ingest_queue_depth", "Events queued for the ingest worker",
+                           lambda: events.ingest_pipeline.stats()["queue_depth"])
 
 # --- API Routers ---
 # These specific API routes MUST be defined BEFORE the general static file serving
@@ -43,6 +84,28 @@ app.include_router(products.router)
 app.include_router(events.router)
 app.include_router(auth_router.router)
 
+
+@app.get("/cache/stats", tags=["monitoring"], summary="Hit, miss and eviction counters of the caches")
+def get_cache_stats():
+    return cache.all_stats()
+
+
+@app.get("/ready", tags=["monitoring"], summary="Whether the chain is open and its indexes are warm")
+def get_readiness(response: Response):
+    """Answers 503 until startup has opened the chain and the background warm-up has finished."""
+    readiness = events.readiness()
+    if not readiness["ready"]:
+        response.status_code = 503
+    return readiness
+
+
+@app.get("/metrics", tags=["monitoring"], summary="Counters, histograms and gauges in the Prometheus text format",
+         response_class=PlainTextResponse)
+def get_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false).")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # --- Serve Static Frontend Files ---
 # Determine the absolute path to the 'frontend' directory.
 # 'main.py' is in 'backend/', so we construct the path like '../frontend'.
@@ -51,6 +114,6 @@ current_script_dir = os.path.dirname(os.path.abspath(__file__))
 frontend_dir = os.path.normpath(os.path.join(current_script_dir, "..", "frontend"))
 
 if not os.path.isdir(frontend_dir):
-    print(f"ERROR: Frontend directory not found at {frontend_dir}")
+    logger.error("Frontend directory not found at %s", frontend_dir)
 else:
     app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="static_frontend")
@@ -0,0 +1,226 @@
+"""
+Low-overhead metrics: counters, histograms and gauges rendered in the Prometheus text
+format at GET /metrics, plus the helpers that feed them (HTTP middleware, SQL timing).
+
+Recording a value is a dict lookup, a bisect and a few additions under a lock, so the
+hot paths can afford it. The blockchain package reports through Registry.observe(name,
+value) without importing this module (see Blockchain(metrics=...)).
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+
+# Upper bounds of the default latency buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def latency_summary(samples):
+    """p50 / p99 / max over a window of latency samples."""
+    if not samples:
+        return {"count": 0, "p50": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "max": ordered[-1],
+    }
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> count
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in values]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labelvalues):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[position] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        lines = []
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value read when the metrics are rendered, e.g. a queue depth."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.labelnames = ()
+        self._read = read
+
+    def render(self):
+        try:
+            value = self._read()
+        except Exception:
+            return []  # The component behind the gauge is not available (yet)
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, read):
+        return self._register(Gauge(name, help_text, read))
+
+    def observe(self, name, value):
+        """Records `value` in the unlabelled histogram `name`; unknown names are ignored."""
+        metric = self._metrics.get(name)
+        if metric is not None:
+            metric.observe(value)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request, by route template", ("method", "route"))
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests answered, by route template and status code", ("method", "route", "status"))
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time, by statement kind", ("statement",))
+# Reported by the blockchain package through registry.observe()
+registry.histogram("blockchain_mining_seconds", "Proof of Work time per block")
+registry.histogram("blockchain_mining_nonces", "Nonces tried per mined block",
+                   buckets=(1, 16, 256, 4096, 65536, 1 << 20, 1 << 24, 1 << 28))
+registry.histogram("blockchain_commit_seconds", "Time to append a mined block to the chain store and index")
+registry.histogram("blockchain_validation_seconds", "Duration of chain validations")
+registry.histogram("blockchain_validated_blocks", "Blocks checked per chain validation",
+                   buckets=(1, 10, 100, 1000, 10_000, 100_000, 1_000_000))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method and route template (not raw path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500  # Reported if the app fails before starting a response
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            template = getattr(route, "path", None) or ("static" if route is not None else "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], template)
+            HTTP_REQUESTS.inc(scope["method"], template, status)
+
+
+_STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _executemany):
+    # Kept on the execution context, so a failed statement leaves nothing behind
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, _executemany):
+    started = getattr(context, "metrics_started", None)
+    if started is None:
+        return
+    kind = statement.lstrip()[:6].upper()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind if kind in _STATEMENT_KINDS else "OTHER")
+
+
+def instrument_engine(engine):
+    """Times every SQL statement executed through `engine`."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
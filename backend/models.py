@@ -1,6 +1,7 @@
 import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import (Boolean, Column, DateTime, ForeignKey, Index, Integer,
+                        String, UniqueConstraint)
 
 # from sqlalchemy.orm import relationship # If you plan relationships later
 from .database import Base
@@ -13,8 +14,8 @@ class Product(Base):
     name = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     sku = Column(String, unique=True, index=True, nullable=False)
-    manufacturer = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    manufacturer = Column(String, index=True, nullable=True)
+    created_at = Column(DateTime, index=True, default=datetime.datetime.utcnow)
 
 
 class User(Base):
@@ -26,3 +27,31 @@ class User(Base):
     full_name = Column(String, nullable=True)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+
+
+class Event(Base):
+    """
+    Off-chain copy of the events recorded in the blockchain, one row per event, kept in
+    sync as blocks are committed (see backend/event_sync.py). The chain stays the source
+    of truth; this table exists for indexed queries and joins with products.
+    """
+    __tablename__ = "events"
+    __table_args__ = (
+        UniqueConstraint("block_index", "position", name="uq_events_block_position"),
+        Index("ix_events_product_time", "product_id", "timestamp"),
+        Index("ix_events_type_time", "event_type", "timestamp"),
+        Index("ix_events_location_time", "location", "timestamp"),
+        Index("ix_events_actor_time", "actor", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # NULL when the event refers to a product that no longer exists off-chain
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    event_type = Column(String, nullable=False)
+    location = Column(String, nullable=True)
+    actor = Column(String, nullable=True)
+    notes = Column(String, nullable=True)
+    timestamp = Column(DateTime, index=True, nullable=False) # Event time (UTC)
+    block_index = Column(Integer, nullable=False)
+    block_hash = Column(String, nullable=False)
+    position = Column(Integer, nullable=False) # Position of the event inside its block
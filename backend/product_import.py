@@ -0,0 +1,223 @@
+"""
+Bulk product import / upsert from CSV, JSON (an array of objects) or NDJSON.
+
+Rows are parsed one at a time from a binary stream, validated against ProductCreate and
+written in batches with a single multi-row statement per batch: INSERT ... ON CONFLICT
+(sku) on SQLite and PostgreSQL, a bulk insert plus bulk update elsewhere. Invalid rows
+are reported with their row number and skipped; they never abort the import.
+"""
+import codecs
+import csv
+import io
+import json
+import os
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import crud, models, schemas
+
+FORMATS = ("csv", "json", "ndjson")
+ON_CONFLICT = ("update", "skip")
+READ_CHUNK = 64 * 1024
+# Columns written by an import; `created_at` keeps its value on updates
+IMPORT_COLUMNS = ("name", "description", "sku", "manufacturer")
+
+
+class ImportResult:
+    def __init__(self, max_errors=1000):
+        self.rows = 0  # Rows read from the input
+        self.written = 0  # Valid rows inserted or updated (or skipped as existing with on_conflict=skip)
+        self.batches = 0
+        self.error_count = 0
+        self.errors = []  # First `max_errors` (row, error) pairs
+        self.max_errors = max_errors
+
+    def add_error(self, row, error):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "written": self.written,
+            "batches": self.batches,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def detect_format(filename=None, content_type=None):
+    """Guesses the input format from a content type or file extension; None if unknown."""
+    if content_type:
+        if "csv" in content_type:
+            return "csv"
+        if "ndjson" in content_type or "jsonl" in content_type:
+            return "ndjson"
+        if "json" in content_type:
+            return "json"
+    if filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip(".")
+        if extension == "jsonl":
+            return "ndjson"
+        if extension in FORMATS:
+            return extension
+    return None
+
+
+def iter_rows(stream, fmt):
+    """Yields (row number, record or exception) from a binary stream, without reading it whole."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for number, record in enumerate(reader, start=1):
+            # Empty cells are missing values, not empty strings
+            yield number, {key: value for key, value in record.items() if key and value != ""}
+    elif fmt == "ndjson":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+    elif fmt == "json":
+        number = 0
+        try:
+            for number, record in enumerate(_iter_json_array(stream), start=1):
+                yield number, record
+        except ValueError as e:
+            # The array cannot be resynchronized after a syntax error: report it and stop
+            yield number + 1, ValueError(f"Invalid JSON: {e}")
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _iter_json_array(stream):
+    """Incrementally decodes the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    started = False
+    exhausted = False
+
+    def fill():
+        nonlocal buffer, position, exhausted
+        chunk = stream.read(READ_CHUNK)
+        if not chunk:
+            exhausted = True
+        buffer = buffer[position:] + text_decoder.decode(chunk or b"", final=not chunk)
+        position = 0
+
+    while True:
+        # Skip whitespace and separators up to the next element
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or exhausted:
+                break
+            fill()
+        if position >= len(buffer):
+            raise ValueError("Unexpected end of input: the JSON array is not closed")
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array of products")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # With more than a chunk buffered the element is not just cut off by the end of
+            # the buffer: it is invalid (or larger than a chunk). Stop rather than buffer the
+            # rest of the upload and re-decode it on every chunk.
+            if exhausted or len(buffer) - position > READ_CHUNK:
+                raise
+            fill()  # The element may continue in the next chunk
+            continue
+        if end == len(buffer) and not exhausted:
+            # A number at the end of the buffer might not be complete yet
+            fill()
+            continue
+        position = end
+        yield element
+
+
+def import_products(db, rows, batch_size=1000, on_conflict="update", result=None):
+    """
+    Validates and upserts (row number, record) pairs from iter_rows() in batches of
+    `batch_size`, committing each batch. Returns the ImportResult.
+    """
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"on_conflict must be one of {', '.join(ON_CONFLICT)}")
+    result = result or ImportResult()
+    batch = {}  # sku -> values; a SKU repeated within a batch keeps its last row
+    for number, record in rows:
+        result.rows += 1
+        if isinstance(record, Exception):
+            result.add_error(number, str(record))
+            continue
+        if not isinstance(record, dict):
+            result.add_error(number, "Expected an object")
+            continue
+        try:
+            product = schemas.ProductCreate.model_validate(record)
+        except ValidationError as e:
+            result.add_error(number, "; ".join(
+                f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+                for detail in e.errors()
+            ))
+            continue
+        batch[product.sku] = product.model_dump(include=set(IMPORT_COLUMNS))
+        if len(batch) >= batch_size:
+            _write_batch(db, list(batch.values()), on_conflict, result)
+            batch = {}
+    if batch:
+        _write_batch(db, list(batch.values()), on_conflict, result)
+    return result
+
+
+def _write_batch(db, values, on_conflict, result):
+    dialect = db.get_bind().dialect.name
+    table = models.Product.__table__
+    try:
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = dialect_insert(table)
+            if on_conflict == "update":
+                statement = statement.on_conflict_do_update(
+                    index_elements=["sku"],
+                    set_={column: statement.excluded[column] for column in IMPORT_COLUMNS if column != "sku"}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=["sku"])
+            db.execute(statement, values)  # executemany: one statement for the whole batch
+        else:
+            _write_batch_generic(db, values, on_conflict)
+        db.commit()
+        # Upserts bypass crud: drop every cached product (and negative entry) at once
+        crud.product_cache.clear()
+    except Exception as e:
+        db.rollback()
+        result.add_error(None, f"Batch of {len(values)} rows ending at row {result.rows} failed: {e}")
+        return
+    result.written += len(values)
+    result.batches += 1
+
+
+def _write_batch_generic(db, values, on_conflict):
+    """Upsert for databases without ON CONFLICT: one lookup, one bulk insert, one bulk update."""
+    existing = dict(db.execute(
+        select(models.Product.sku, models.Product.id).where(models.Product.sku.in_([v["sku"] for v in values]))
+    ).all())
+    new_rows = [v for v in values if v["sku"] not in existing]
+    if new_rows:
+        db.execute(insert(models.Product), new_rows)
+    if on_conflict == "update":
+        changed = [{**v, "id": existing[v["sku"]]} for v in values if v["sku"] in existing]
+        if changed:
+            db.execute(update(models.Product), changed)
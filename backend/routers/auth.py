@@ -2,6 +2,7 @@ from datetime import timedelta
 from typing import Annotated  # For Python 3.9+
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import \
     OAuth2PasswordRequestForm  # Pre-built form for username/password
 from sqlalchemy.orm import Session
@@ -21,13 +22,22 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[Session, Depends(get_db)]
 ):
-    user = crud.get_user_by_username(db, username=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(crud.get_user_by_username, db, username=form_data.username)
+    # bcrypt runs on the password hasher's own threads, never on the event loop
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await _hash_job(
+            security.password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash used another cost factor than BCRYPT_ROUNDS: save the rehashed one
+        await run_in_threadpool(crud.update_user_password_hash, db, user.id, new_hash)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
@@ -39,15 +49,33 @@ async def login_for_access_token(
 
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register_user(user: schemas.UserCreate, db: Annotated[Session, Depends(get_db)]):
-    db_user_by_username = crud.get_user_by_username(db, username=user.username)
+async def register_user(user: schemas.UserCreate, db: Annotated[Session, Depends(get_db)]):
+    db_user_by_username = await run_in_threadpool(crud.get_user_by_username, db, username=user.username)
     if db_user_by_username:
         raise HTTPException(status_code=400, detail="Username already registered")
     if user.email:
-        db_user_by_email = crud.get_user_by_email(db, email=user.email)
+        db_user_by_email = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
         if db_user_by_email:
             raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await _hash_job(security.password_hasher.hash(user.password))
+    return await run_in_threadpool(crud.create_user, db=db, user=user, hashed_password=hashed_password)
+
+
+@router.get("/password-hasher/stats", summary="bcrypt pool load, queue time and rehash counters")
+def get_password_hasher_stats():
+    return security.password_hasher.stats()
+
+
+async def _hash_job(job):
+    """Awaits a password hasher job, turning an overloaded hasher into a 503."""
+    try:
+        return await job
+    except security.HasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, please retry shortly.",
+            headers={"Retry-After": "1"}
+        ) from e
 
 
 @router.get("/users/me", response_model=schemas.User)
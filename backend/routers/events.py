@@ -1,35 +1,147 @@
+import asyncio
 import datetime
-from typing import Annotated, List  # Add Annotated
+import json
+import logging
+import threading
+from typing import Annotated, List, Optional  # Add Annotated
 
 from fastapi import (APIRouter, Depends,  # Ensure Depends is imported
-                     HTTPException, status)
+                     HTTPException, Query, Request, Response, status)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from blockchain.core import Blockchain
+from blockchain import encoding, merkle
+from blockchain.mempool import Mempool
+from blockchain.node import Node, parse_address
+from blockchain.validation import audit_chain
+from blockchain.difficulty import difficulty_of
 
-from .. import crud, models, schemas  # Added models
+from .. import chain, crud, metrics, models, schemas  # Added models
 from ..config import settings
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..dependencies import get_current_active_user
+from ..event_sync import EventTableSync
+from ..ingest import IngestPipeline, QueueFullError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/events",
     tags=["blockchain_events"],
 )
 
-# Initialize the blockchain - In a real app, this might be loaded from a persisted state
-# or managed by a separate service. For simplicity, we create a new one on server start.
-# This means blockchain data is lost on server restart unless persisted.
-# A production system would need to save/load the chain (e.g., to a file or DB).
-supply_chain_blockchain = Blockchain(difficulty=settings.BLOCKCHAIN_DIFFICULTY) # New way
+# Size of the pieces written to the client by the NDJSON export
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# The blockchain and the services around it are built by open_ledger(), called from the
+# application lifespan in main.py, so importing the API does not open (or mine) anything.
+supply_chain_blockchain = None
+event_table = None
+mempool = None
+ingest_pipeline = None
+node = None
+# Set by the background warm-up started with warm_up() (see GET /ready)
+index_warm = threading.Event()
+event_table_synced = threading.Event()
+# Held while a full audit runs: each one uses a process per core, so they do not overlap
+full_audit_lock = threading.Lock()
+
+
+def open_ledger():
+    """
+    Opens the blockchain (see backend/chain.py) and builds the mempool, ingest pipeline and
+    replication node around it. A block store only re-verifies its tail, so this stays fast
+    however long the chain is; indexes are filled later by warm_up(). With
+    BLOCKCHAIN_LEDGER_SOCKET set this process only reads the block store: blocks are appended
+    by the ledger service, which also keeps the events table in sync and runs the node.
+    """
+    global supply_chain_blockchain, event_table, mempool, ingest_pipeline, node
+    if supply_chain_blockchain is not None:
+        return
+    blockchain = chain.open_blockchain(metrics=metrics.registry if settings.METRICS_ENABLED else None)
+    chain.restore_snapshot(blockchain)
+    # Every committed block is copied into the SQL `events` table for indexed queries and joins;
+    # warm_up() catches the table up with blocks committed while it was not running.
+    if not chain.uses_ledger_service():
+        event_table = EventTableSync(blockchain, SessionLocal)
+        blockchain.add_commit_listener(event_table.on_block)
+        blockchain.add_rollback_listener(event_table.truncate)
+    # Events are batched: the mempool seals pending events into one block per size/time window.
+    mempool = Mempool(
+        blockchain,
+        max_batch=settings.MEMPOOL_MAX_BATCH,
+        max_wait=settings.MEMPOOL_MAX_WAIT_SECONDS
+    )
+    # Recorded events go through a bounded asyncio queue drained by one mining/commit worker.
+    # The pipeline is started and stopped by the application lifespan in main.py.
+    ingest_pipeline = IngestPipeline(
+        mempool,
+        max_queue=settings.INGEST_QUEUE_SIZE,
+        max_batch=settings.MEMPOOL_MAX_BATCH,
+        max_wait=settings.MEMPOOL_MAX_WAIT_SECONDS
+    )
+    # With NODE_LISTEN set the chain is replicated with NODE_PEERS (started by the lifespan in
+    # main.py). Events of local blocks dropped in favour of a longer fork are sealed again.
+    if settings.NODE_LISTEN and not chain.uses_ledger_service():
+        node_host, node_port = parse_address(settings.NODE_LISTEN)
+        node = Node(
+            blockchain,
+            host=node_host,
+            port=node_port,
+            peers=[peer.strip() for peer in settings.NODE_PEERS.split(",") if peer.strip()],
+            sync_batch=settings.NODE_SYNC_BATCH,
+            sync_interval=settings.NODE_SYNC_INTERVAL_SECONDS,
+            max_learned_peers=settings.NODE_MAX_LEARNED_PEERS,
+            learned_peer_ttl=settings.NODE_LEARNED_PEER_TTL_SECONDS,
+            on_orphaned=_resubmit_orphaned
+        )
+    supply_chain_blockchain = blockchain
+
+
+def _resubmit_orphaned(orphaned_events):
+    # The mempool has no sealing thread of its own here: seal on the ingest commit thread
+    ingest_pipeline.resubmit(orphaned_events)
+
+
+def warm_up():
+    """Fills the secondary event index and the events table of a reopened chain on background threads."""
+    def warm_index():
+        supply_chain_blockchain.warm_index()
+        index_warm.set()
 
-@router.post("/record", status_code=status.HTTP_201_CREATED)
-def record_supply_chain_event(
+    def sync_event_table():
+        if event_table is not None:
+            event_table.sync()
+        event_table_synced.set()
+
+    threading.Thread(target=warm_index, name="event-index-warmup", daemon=True).start()
+    threading.Thread(target=sync_event_table, name="event-table-sync", daemon=True).start()
+
+
+def readiness():
+    """Whether the chain is open and the warm-up has finished, with the heights involved."""
+    if supply_chain_blockchain is None:
+        return {"ready": False, "chain_open": False}
+    return {
+        "ready": index_warm.is_set() and event_table_synced.is_set(),
+        "chain_open": True,
+        "chain_length": len(supply_chain_blockchain.chain),
+        "indexed_blocks": supply_chain_blockchain.index.indexed_height,
+        "index_warm": index_warm.is_set(),
+        "event_table_synced": event_table_synced.is_set()
+    }
+
+@router.post("/record", status_code=status.HTTP_202_ACCEPTED)
+async def record_supply_chain_event(
     event_data_in: schemas.BlockchainEventCreate, # Renamed to avoid conflict
     db: Annotated[Session, Depends(get_db)],
-    _current_user: Annotated[models.User, Depends(get_current_active_user)] # Add dependency
+    _current_user: Annotated[models.User, Depends(get_current_active_user)], # Add dependency
+    wait: Annotated[float, Query(ge=0, le=60)] = 0 # Seconds to wait for the block assignment
 ):
-    product = crud.get_product(db, product_id=event_data_in.product_id)
+    # The DB session is synchronous: keep the lookup off the event loop
+    product = await run_in_threadpool(crud.get_product, db, product_id=event_data_in.product_id)
     if not product:
         raise HTTPException(
             status_code=404,
@@ -42,6 +154,82 @@ def record_supply_chain_event(
     # For now, we'll just use current_user for protection.
     # print(f"Event recorded by: {current_user.username}")
 
+    event_payload = _event_payload(event_data_in)
+
+    # The event is queued and sealed into a block shortly after; the receipt can be polled
+    # (or awaited with ?wait=) at /events/receipts/{receipt_id} for the block index and hash.
+    try:
+        receipt = ingest_pipeline.enqueue(event_payload)
+    except QueueFullError as e:
+        raise _queue_full(e) from e
+    if wait:
+        await ingest_pipeline.wait_for(receipt.receipt_id, wait)
+    return {
+        "message": "Event accepted and queued for the next block.",
+        **receipt.to_dict(),
+        "event_data": event_payload
+    }
+
+
+@router.post("/record/bulk", response_model=schemas.BulkEventResult, status_code=status.HTTP_202_ACCEPTED)
+async def record_supply_chain_events_bulk(
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    _current_user: Annotated[models.User, Depends(get_current_active_user)],
+    wait: Annotated[float, Query(ge=0, le=60)] = 0 # Seconds to wait for the block assignments
+):
+    """
+    Records many events in one call. The body is either a JSON array of events or, with
+    Content-Type application/x-ndjson, one event per line. All referenced products are
+    checked with one set-based query; invalid items are reported in `errors` (by position)
+    and the valid ones are queued together, so they are sealed in as few blocks as possible.
+    """
+    items = await _read_bulk_items(request)
+    if len(items) > settings.INGEST_BULK_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.INGEST_BULK_MAX_EVENTS} events per bulk request."
+        )
+
+    errors = []
+    parsed = [] # (item position, validated event)
+    for position, item in enumerate(items):
+        if isinstance(item, Exception):
+            errors.append(schemas.BulkEventError(item=position, error=str(item)))
+            continue
+        try:
+            parsed.append((position, schemas.BlockchainEventCreate.model_validate(item)))
+        except ValidationError as e:
+            errors.append(schemas.BulkEventError(item=position, error=_validation_message(e)))
+
+    existing = await run_in_threadpool(
+        crud.get_existing_product_ids, db, [event.product_id for _position, event in parsed]
+    )
+    payloads = []
+    for position, event in parsed:
+        if event.product_id in existing:
+            payloads.append(_event_payload(event))
+        else:
+            errors.append(schemas.BulkEventError(
+                item=position, error=f"Product with ID {event.product_id} not found."
+            ))
+    errors.sort(key=lambda error: error.item)
+
+    try:
+        receipts = ingest_pipeline.enqueue_many(payloads)
+    except QueueFullError as e:
+        raise _queue_full(e) from e
+    if wait and receipts:
+        await asyncio.gather(*(ingest_pipeline.wait_for(receipt.receipt_id, wait) for receipt in receipts))
+    return schemas.BulkEventResult(
+        accepted=len(receipts),
+        rejected=len(errors),
+        receipts=[receipt.to_dict() for receipt in receipts],
+        errors=errors
+    )
+
+
+def _event_payload(event_data_in: schemas.BlockchainEventCreate) -> dict:
     event_payload = event_data_in.model_dump()
     if event_data_in.timestamp is None:
         event_payload["timestamp"] = datetime.datetime.utcnow().isoformat()
@@ -50,77 +238,331 @@ def record_supply_chain_event(
 
     # Add who recorded the event, if desired and schema supports
     # event_payload["recorded_by"] = current_user.username
+    return event_payload
+
 
+def _queue_full(error: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": str(settings.INGEST_RETRY_AFTER_SECONDS)}
+    )
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'event'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def _read_bulk_items(request: Request) -> list:
+    """
+    Decodes a bulk body into a list of items. NDJSON is read line by line as it streams in;
+    a line that is not valid JSON becomes an exception at its position instead of failing the request.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type:
+        try:
+            items = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Body is not valid JSON: {e}") from e
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of events.")
+        return items
+
+    items = []
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        items.extend(_ndjson_item(line) for line in lines if line.strip())
+    if buffer.strip():
+        items.append(_ndjson_item(buffer))
+    return items
+
+
+def _ndjson_item(line: bytes):
     try:
-        new_block = supply_chain_blockchain.add_block(event_payload)
-        return {
-            "message": "Event recorded on the blockchain successfully.",
-            "block_index": new_block.index,
-            "block_hash": new_block.hash,
-            "event_data": new_block.data
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to record event on blockchain: {str(e)}"
-        ) from e
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Line is not valid JSON: {e}")
+
+
+@router.get("/receipts/{receipt_id}", response_model=schemas.EventReceipt)
+async def get_event_receipt(
+    receipt_id: str,
+    wait: Annotated[float, Query(ge=0, le=60)] = 0 # Seconds to wait for the event to be sealed
+):
+    receipt = await ingest_pipeline.wait_for(receipt_id, wait)
+    if receipt is None:
+        raise HTTPException(status_code=404, detail=f"Receipt {receipt_id} not found.")
+    return receipt.to_dict()
+
+
+@router.get("/ingest/stats", summary="Ingestion queue depth and latency")
+def get_ingest_stats():
+    return ingest_pipeline.stats()
 
 
 @router.get("/history/{product_id}", response_model=List[schemas.BlockData])
-def get_product_event_history(product_id: int, db: Session = Depends(get_db)):
+def get_product_event_history(
+    product_id: int,
+    db: Session = Depends(get_db),
+    since: Optional[datetime.datetime] = None, # Only events at or after this time
+    until: Optional[datetime.datetime] = None # Only events at or before this time
+):
     # Validate product_id (optional)
     product = crud.get_product(db, product_id=product_id)
     if not product:
         raise HTTPException(status_code=404,
                             detail=f"Product with ID {product_id} not found for history lookup.")
 
-    # Filter blockchain for events related to this product_id
-    product_history = []
-    for block in supply_chain_blockchain.chain:
-        if block.index == 0: # Skip Genesis block for product-specific history
-            continue
-        # Ensure block.data is a dictionary and has 'product_id'
-        if isinstance(block.data, dict) and block.data.get("product_id") == product_id:
-            block_info = schemas.BlockData(
-                index=block.index,
-                timestamp=block.timestamp,
-                data=block.data, # Assuming data is already a dict or serializable
-                previous_hash=block.previous_hash,
-                hash=block.hash,
-                nonce=block.nonce
+    # Look the product's events up in the chain's secondary index instead of scanning
+    # every block; only the blocks that hold its events are read.
+    matches = supply_chain_blockchain.find_events(
+        "product_id", product_id,
+        since=_epoch_seconds(since),
+        until=_epoch_seconds(until)
+    )
+    return [
+        schemas.BlockData(
+            index=block.index,
+            timestamp=block.timestamp,
+            data=event,
+            previous_hash=block.previous_hash,
+            hash=block.hash,
+            nonce=block.nonce,
+            merkle_root=block.merkle_root,
+            version=block.version,
+            bits=block.bits,
+            event_position=position
+        )
+        for block, position, event in matches
+        if block.index != 0 # Skip Genesis block for product-specific history
+    ]
+
+
+@router.get("/search", response_model=List[schemas.EventRecord])
+def search_events(
+    response: Response,
+    db: Annotated[Session, Depends(get_db)],
+    product_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    location: Optional[str] = None,
+    actor: Optional[str] = None,
+    since: Optional[datetime.datetime] = None, # Event time, UTC
+    until: Optional[datetime.datetime] = None,
+    cursor: Optional[int] = None, # X-Next-Cursor of the previous page
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100
+):
+    """
+    Filters events through the SQL `events` table (a copy of the chain kept in sync on
+    every commit), e.g. everything SHIPPED through one location within a week.
+    """
+    rows = crud.search_events(
+        db, product_id=product_id, event_type=event_type, location=location, actor=actor,
+        since=_naive_utc(since), until=_naive_utc(until), after_id=cursor, limit=limit
+    )
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1][0].id)
+    return [
+        schemas.EventRecord(
+            id=event.id, product_id=event.product_id, product_name=product_name,
+            event_type=event.event_type, location=event.location, actor=event.actor,
+            notes=event.notes, timestamp=event.timestamp, block_index=event.block_index,
+            block_hash=event.block_hash, position=event.position
+        )
+        for event, product_name in rows
+    ]
+
+
+def _naive_utc(moment: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # The events table stores naive UTC times
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _epoch_seconds(moment: Optional[datetime.datetime]) -> Optional[float]:
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        # Naive times are UTC, like the event timestamps recorded by the API
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+@router.get("/proof/{block_index}", response_model=schemas.BlockInclusionProofs)
+def get_event_inclusion_proofs(
+    block_index: int,
+    positions: Annotated[List[int], Query(alias="position")]
+):
+    """
+    Merkle inclusion proofs for one or more events of a block (?position=0&position=5).
+    All requested proofs are cut from a single tree build; each proof is O(log n) hashes.
+    """
+    if not 0 <= block_index < len(supply_chain_blockchain.chain):
+        raise HTTPException(status_code=404, detail=f"Block {block_index} not found.")
+    block = supply_chain_blockchain.chain[block_index]
+    if block.merkle_root is None:
+        raise HTTPException(status_code=400,
+                            detail=f"Block {block_index} predates Merkle roots; no proofs available.")
+    events = block.events()
+    invalid = [position for position in positions if not 0 <= position < len(events)]
+    if invalid:
+        raise HTTPException(status_code=404,
+                            detail=f"Block {block_index} has no event at position(s) {invalid}.")
+
+    levels = merkle.build_tree(events)
+    proofs = merkle.inclusion_proofs(levels, positions)
+    return schemas.BlockInclusionProofs(
+        block_index=block.index,
+        block_hash=block.hash,
+        timestamp=block.timestamp,
+        previous_hash=block.previous_hash,
+        nonce=block.nonce,
+        merkle_root=block.merkle_root,
+        version=block.version,
+        bits=block.bits,
+        proofs=[
+            schemas.EventInclusionProof(
+                position=position,
+                event=events[position],
+                leaf_hash=levels[0][position].hex(),
+                proof=[schemas.MerkleProofStep(hash=h, side=side) for h, side in proofs[position]]
             )
-            product_history.append(block_info)
+            for position in positions
+        ]
+    )
+
+def next_proof_target():
+    """Proof of Work target of the next block: scheduled, or fixed by the difficulty (None = no work)."""
+    next_bits = supply_chain_blockchain.next_bits()
+    if next_bits is not None:
+        return encoding.bits_to_target(next_bits)
+    if supply_chain_blockchain.difficulty > 0:
+        return 1 << (256 - 4 * supply_chain_blockchain.difficulty)
+    return None
+
+
+def next_difficulty():
+    """next_proof_target() in leading hex zeros."""
+    target = next_proof_target()
+    return difficulty_of(target) if target is not None else 0.0
 
-    if not product_history:
-        # Return empty list if no history, or 404 if preferred
-        return []   # Or raise HTTPException(status_code=404,
-                    #detail=f"No blockchain events found for product ID {product_id}")
-    return product_history
 
 @router.get("/blockchain/info", response_model=schemas.BlockchainInfo)
-def get_blockchain_info():
+def get_blockchain_info(
+    cursor: Annotated[int, Query(ge=0)] = 0, # Height of the first block to return
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100
+):
+    chain_length = len(supply_chain_blockchain.chain)
     chain_data = []
-    for block in supply_chain_blockchain.chain:
+    for block in supply_chain_blockchain.iter_blocks(cursor, cursor + limit):
         chain_data.append(schemas.BlockData(
             index=block.index,
             timestamp=block.timestamp,
             data=block.data,
             previous_hash=block.previous_hash,
             hash=block.hash,
-            nonce=block.nonce
+            nonce=block.nonce,
+            merkle_root=block.merkle_root,
+            version=block.version,
+            bits=block.bits
         ))
+    next_cursor = cursor + limit if cursor + limit < chain_length else None
+    next_target = next_proof_target()
+    # Validation is incremental (only blocks since the last checkpoint are checked) and the
+    # length is O(1), so the totals do not require walking the chain.
     return schemas.BlockchainInfo(
         chain=chain_data,
         is_valid=supply_chain_blockchain.is_chain_valid(),
         difficulty=supply_chain_blockchain.difficulty,
-        chain_length=len(supply_chain_blockchain.chain)
+        next_target=f"{next_target:064x}" if next_target is not None else None,
+        next_difficulty=round(difficulty_of(next_target), 3) if next_target is not None else 0.0,
+        chain_length=chain_length,
+        next_cursor=next_cursor,
+        verified_height=supply_chain_blockchain.verified_height
     )
 
+@router.get("/blockchain/export", summary="Stream the chain as NDJSON")
+def export_blockchain(start: Annotated[int, Query(ge=0)] = 0):
+    """
+    Streams every block from height `start` as newline-delimited JSON, one block per line.
+    Blocks are serialized straight from the chain without building response models, and
+    lines are flushed in chunks so memory stays flat whatever the chain length.
+    """
+    stop = len(supply_chain_blockchain.chain) # Snapshot: blocks added meanwhile are not exported
+
+    def generate_lines():
+        chunk = []
+        chunk_size = 0
+        for block in supply_chain_blockchain.iter_blocks(start, stop):
+            line = json.dumps(block.to_dict(), separators=(",", ":")) + "\n"
+            chunk.append(line)
+            chunk_size += len(line)
+            if chunk_size >= EXPORT_CHUNK_BYTES:
+                yield "".join(chunk)
+                chunk = []
+                chunk_size = 0
+        if chunk:
+            yield "".join(chunk)
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+@router.get("/node/status", summary="Replication status of this node")
+def get_node_status():
+    """Height, tip, peers and sync counters of the replication node."""
+    if chain.uses_ledger_service():
+        # The node runs in the ledger service
+        node_stats = supply_chain_blockchain.client.status()["node"]
+        if node_stats is not None:
+            return node_stats
+    if node is None:
+        raise HTTPException(status_code=404, detail="Replication is not enabled (NODE_LISTEN is empty).")
+    return node.stats()
+
+def save_snapshot():
+    """Persists the signed validation checkpoint (the ledger service saves its own)."""
+    if not chain.uses_ledger_service():
+        chain.save_snapshot(supply_chain_blockchain)
+
+@router.get("/blockchain/snapshot", summary="Signed snapshot of the verified checkpoint")
+def get_blockchain_snapshot():
+    """
+    Returns {height, hash, created_at, signature}: every block up to `height` has been
+    verified and block `height` has hash `hash`, signed with HMAC-SHA256.
+    """
+    return supply_chain_blockchain.signed_snapshot(chain.SNAPSHOT_KEY)
+
 @router.post("/blockchain/validate", summary="Validate Blockchain Integrity")
-def validate_blockchain_integrity():
-    is_valid = supply_chain_blockchain.is_chain_valid()
+def validate_blockchain_integrity(
+    _current_user: Annotated[models.User, Depends(get_current_active_user)],
+    full: bool = False
+):
+    """
+    Checks the blocks added since the last verified checkpoint. With ?full=true the whole
+    chain is re-audited from genesis in parallel chunks across worker processes; only one
+    full audit runs at a time (409 while another is in progress).
+    A successful check is saved as the signed snapshot validation resumes from after a restart.
+    """
+    if full:
+        if not full_audit_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A full audit is already running.")
+        try:
+            is_valid, _problem = audit_chain(supply_chain_blockchain,
+                                             workers=settings.BLOCKCHAIN_AUDIT_WORKERS or None)
+        finally:
+            full_audit_lock.release()
+    else:
+        is_valid = supply_chain_blockchain.is_chain_valid()
     if is_valid:
-        return {"message": "Blockchain is valid."}
+        save_snapshot()
+        return {
+            "message": "Blockchain is valid.",
+            "verified_height": supply_chain_blockchain.verified_height,
+            "full_audit": full
+        }
     else:
         # In a real scenario, this would trigger alerts or recovery mechanisms
         raise HTTPException(status_code=500, detail="Blockchain integrity check failed!")
@@ -1,18 +1,17 @@
-from typing import Annotated, List  # Add Annotated
+import datetime
+import tempfile
+from typing import Annotated, List, Optional  # Add Annotated
 
 from fastapi import (APIRouter, Depends,  # Ensure Depends is imported
-                     HTTPException, status)
+                     HTTPException, Query, Request, Response, status)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
-from ..database import engine, get_db
+from .. import crud, models, product_import, schemas
+from ..config import settings
+from ..database import get_db
 from ..dependencies import get_current_active_user
 
-# Create database tables if they don't exist
-# This should ideally be handled by Alembic migrations in a larger app
-models.Base.metadata.create_all(bind=engine)
-
-
 router = APIRouter(
     prefix="/products",
     tags=["products"],
@@ -35,9 +34,55 @@ def create_new_product(
                             detail=f"Product with SKU {product.sku} already exists.")
     return crud.create_product(db=db, product=product)
 
+@router.post("/import", response_model=schemas.ProductImportResult)
+async def import_products(
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    _current_user: Annotated[models.User, Depends(get_current_active_user)],
+    format: Annotated[Optional[str], Query(pattern="^(csv|json|ndjson)$")] = None, # Default: from Content-Type
+    on_conflict: Annotated[str, Query(pattern="^(update|skip)$")] = "update", # For SKUs that already exist
+    batch_size: Annotated[Optional[int], Query(ge=1, le=100_000)] = None
+):
+    """
+    Bulk insert/update of products keyed by SKU from a CSV, JSON array or NDJSON body.
+    The upload is spooled to a temporary file (kept in memory only while small) and
+    parsed row by row; rows are upserted in batches and invalid ones are reported.
+    """
+    fmt = format or product_import.detect_format(content_type=request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=400,
+                            detail="Unknown format: pass ?format=csv|json|ndjson or a matching Content-Type.")
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        result = await run_in_threadpool(
+            product_import.import_products, db, product_import.iter_rows(upload, fmt),
+            batch_size=batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE, on_conflict=on_conflict
+        )
+    return result.to_dict()
+
 @router.get("/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = crud.get_products(db, skip=skip, limit=limit)
+def read_products(
+    response: Response,
+    skip: Annotated[int, Query(ge=0)] = 0, # Prefer `cursor`: deep offsets get slower page by page
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Optional[int] = None, # Id of the last product already seen (X-Next-Cursor of the previous page)
+    manufacturer: Optional[str] = None,
+    name_prefix: Optional[str] = None, # Case-sensitive
+    created_after: Optional[datetime.datetime] = None, # Inclusive
+    created_before: Optional[datetime.datetime] = None, # Exclusive
+    q: Optional[str] = None, # Full-text search over name and description
+    db: Session = Depends(get_db)
+):
+    products = crud.get_products(
+        db, skip=skip, limit=limit, after_id=cursor, manufacturer=manufacturer,
+        name_prefix=name_prefix, created_after=created_after, created_before=created_before,
+        search_query=q
+    )
+    if len(products) == limit:
+        # There may be more: the next page starts after the last id of this one
+        response.headers["X-Next-Cursor"] = str(products[-1].id)
     return products
 
 @router.get("/{product_id}", response_model=schemas.Product)
@@ -0,0 +1,66 @@
+"""
+Database schema setup, guarded by a revision check.
+
+create_all() and setup_product_search() inspect every table and index on each run. They
+are only run when the revision recorded in the `schema_version` table differs from
+schema_revision(): SCHEMA_VERSION plus a fingerprint of the tables declared in
+models.py, so adding a model or a column re-runs the setup by itself. An up-to-date
+database costs two small queries per startup. Bump SCHEMA_VERSION for schema changes
+the models do not describe (e.g. the search indexes created by search.py).
+"""
+import hashlib
+import logging
+
+from sqlalchemy import Column, MetaData, String, Table, delete, insert, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from . import models, search
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Kept out of models.Base.metadata, so it is not part of its own fingerprint
+_version_metadata = MetaData()
+schema_version = Table("schema_version", _version_metadata, Column("revision", String(80), nullable=False))
+
+
+def schema_revision():
+    """SCHEMA_VERSION and a digest of every table, column and index declared in models.py."""
+    digest = hashlib.sha256()
+    for table in models.Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type}:{column.nullable}:{column.primary_key}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(f"|{index.name}:{','.join(column.name for column in index.columns)}".encode())
+    return f"{SCHEMA_VERSION}-{digest.hexdigest()[:32]}"
+
+
+def current_revision(engine):
+    """Revision the database was last set up at, or None (never set up by ensure_schema())."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(schema_version.c.revision)).scalar()
+    except (OperationalError, ProgrammingError):  # No schema_version table yet
+        return None
+
+
+def ensure_schema(engine):
+    """Creates missing tables and indexes unless the database is at the current revision. Returns True if it ran."""
+    revision = schema_revision()
+    if current_revision(engine) == revision:
+        search.detect_product_search(engine)
+        return False
+    try:
+        models.Base.metadata.create_all(bind=engine)
+    except (OperationalError, ProgrammingError):
+        # Another process (e.g. a second uvicorn worker) may have created the tables meanwhile
+        models.Base.metadata.create_all(bind=engine)
+    search.setup_product_search(engine)
+    with engine.begin() as connection:
+        _version_metadata.create_all(connection)
+        connection.execute(delete(schema_version))
+        connection.execute(insert(schema_version).values(revision=revision))
+    logger.info("Database schema set up at revision %s", revision)
+    return True
@@ -26,6 +26,17 @@ class Product(ProductBase):
         orm_mode = True # Changed from orm_mode = True
         # from_attributes = True for Pydantic v2
 
+class ProductImportError(BaseModel):
+    row: Optional[int] = None # 1-based data row (CSV record, NDJSON line or array element); None for batch failures
+    error: str
+
+class ProductImportResult(BaseModel):
+    rows: int # Rows read
+    written: int # Valid rows inserted or updated
+    batches: int
+    error_count: int
+    errors: List[ProductImportError] # The first errors, up to a fixed limit
+
 # --- Blockchain Event Schemas ---
 class BlockchainEventData(BaseModel):
     product_id: int # Link to off-chain product
@@ -38,6 +49,39 @@ class BlockchainEventData(BaseModel):
 class BlockchainEventCreate(BlockchainEventData):
     pass
 
+class EventReceipt(BaseModel):
+    receipt_id: str
+    status: str # "pending", "sealed" or "failed"
+    submitted_at: float
+    sealed_at: Optional[float] = None
+    block_index: Optional[int] = None # Set once the event has been sealed into a block
+    block_hash: Optional[str] = None
+    position: Optional[int] = None # Position of the event inside the block
+    error: Optional[str] = None
+
+class BulkEventError(BaseModel):
+    item: int # Position of the rejected event in the request (array index or NDJSON line)
+    error: str
+
+class BulkEventResult(BaseModel):
+    accepted: int
+    rejected: int
+    receipts: List[EventReceipt] # One per accepted event, in request order
+    errors: List[BulkEventError]
+
+class EventRecord(BaseModel): # Row of the off-chain events table
+    id: int
+    product_id: Optional[int] = None # None if the product was deleted off-chain
+    product_name: Optional[str] = None
+    event_type: str
+    location: Optional[str] = None
+    actor: Optional[str] = None
+    notes: Optional[str] = None
+    timestamp: datetime.datetime
+    block_index: int
+    block_hash: str
+    position: int
+
 class BlockData(BaseModel):
     index: int
     timestamp: float
@@ -45,12 +89,42 @@ class BlockData(BaseModel):
     previous_hash: str
     hash: str
     nonce: int
+    merkle_root: Optional[str] = None # Set for batched blocks
+    version: int = 1 # Hashing format: 1 = JSON era, 2 = canonical binary header, 3 = header with target
+    bits: Optional[int] = None # Compact Proof of Work target of version 3 blocks
+    event_position: Optional[int] = None # Position of `data` within the block (history results)
+
+class MerkleProofStep(BaseModel):
+    hash: str # Sibling node (hex)
+    side: str # "left" or "right": where the sibling sits when hashing the pair
+
+class EventInclusionProof(BaseModel):
+    position: int
+    event: Any
+    leaf_hash: str
+    proof: List[MerkleProofStep]
+
+class BlockInclusionProofs(BaseModel):
+    # Header fields needed to recompute the block hash from the Merkle root
+    block_index: int
+    block_hash: str
+    timestamp: float
+    previous_hash: str
+    nonce: int
+    merkle_root: str
+    version: int # Selects how the header is hashed (see blockchain/encoding.py)
+    bits: Optional[int] = None # Part of version 3 headers
+    proofs: List[EventInclusionProof]
 
 class BlockchainInfo(BaseModel):
-    chain: List[BlockData]
+    chain: List[BlockData] # One page of blocks, starting at the requested cursor
     is_valid: bool
-    difficulty: int
+    difficulty: int # Configured difficulty (the starting point when retargeting is enabled)
+    next_target: Optional[str] = None # Proof of Work target of the next block (64 hex chars)
+    next_difficulty: float # The same target in leading hex zeros, fractional with retargeting
     chain_length: int
+    next_cursor: Optional[int] = None # Block height to request next; None on the last page
+    verified_height: int # Blocks up to this height have been verified
 
 class UserBase(BaseModel):
     username: str
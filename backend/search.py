@@ -0,0 +1,99 @@
+"""
+Product filtering support that goes beyond the declared column indexes.
+
+setup_product_search() creates the product indexes missing from an existing database
+(create_all() only creates whole tables) and the full-text index over name/description:
+an external-content FTS5 table kept in sync by triggers on SQLite, a GIN index over a
+tsvector expression on PostgreSQL. Other databases fall back to a LIKE scan.
+"""
+import logging
+
+from sqlalchemy import and_, column, or_, text
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose full-text index was set up by setup_product_search()
+_fts_dialects = set()
+
+_SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    " name, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN"
+    " INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN"
+    " INSERT INTO products_fts (products_fts, rowid, name, description)"
+    " VALUES ('delete', old.id, old.name, old.description);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN"
+    " INSERT INTO products_fts (products_fts, rowid, name, description)"
+    " VALUES ('delete', old.id, old.name, old.description);"
+    " INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);"
+    " END",
+]
+
+# Must match the expression used by search_clause() for PostgreSQL to use the index
+_POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def setup_product_search(engine):
+    for index in models.Product.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            ).first()
+            try:
+                for statement in _SQLITE_FTS:
+                    conn.execute(text(statement))
+            except Exception as e: # SQLite built without FTS5
+                logger.warning("Full-text product search unavailable, falling back to LIKE: %s", e)
+                return
+            if not exists:
+                # Index the products that were stored before the FTS table existed
+                conn.execute(text("INSERT INTO products_fts (products_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_products_fulltext ON products USING GIN ({_POSTGRES_DOCUMENT})"
+            ))
+        else:
+            return
+    _fts_dialects.add(dialect)
+
+
+def detect_product_search(engine):
+    """Registers the full-text index made by an earlier setup_product_search(), without running any DDL."""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+    elif dialect == "postgresql":
+        query = "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_products_fulltext'"
+    else:
+        return
+    with engine.connect() as conn:
+        if conn.execute(text(query)).first():
+            _fts_dialects.add(dialect)
+
+
+def search_clause(dialect, query):
+    """Filter matching products whose name or description contains every word of `query`."""
+    words = query.split()
+    if dialect == "sqlite" and dialect in _fts_dialects:
+        # Each word quoted, so user input is never parsed as FTS5 query syntax
+        match = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+        matching_ids = text(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH :fts_query"
+        ).bindparams(fts_query=match).columns(column("rowid"))
+        return models.Product.id.in_(matching_ids)
+    if dialect == "postgresql" and dialect in _fts_dialects:
+        return text(f"{_POSTGRES_DOCUMENT} @@ plainto_tsquery('simple', :fts_query)").bindparams(fts_query=query)
+    # No full-text index: scan name/description for every word
+    return and_(*(
+        or_(models.Product.name.ilike(f"%{word}%"), models.Product.description.ilike(f"%{word}%"))
+        for word in words
+    ))
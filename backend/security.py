@@ -1,3 +1,9 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -5,9 +11,18 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from .config import settings
+from .metrics import latency_summary
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use BCRYPT_ROUNDS; hashes with any other cost factor are reported by
+# needs_update() and rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -15,6 +30,90 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class HasherBusyError(Exception):
+    """Raised when max_pending hashing jobs are already running or queued."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, sized thread pool so a burst of logins cannot stall the
+    event loop (bcrypt releases the GIL while it works). At most `max_pending` jobs may be
+    running or queued; beyond that callers get HasherBusyError instead of waiting.
+    """
+
+    def __init__(self, context, workers=0, max_pending=64, latency_window=1000):
+        self.context = context
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._queue_waits = deque(maxlen=latency_window)  # Seconds from submission to a free worker
+        self._run_times = deque(maxlen=latency_window)  # Seconds of bcrypt work
+
+    async def _run(self, function, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusyError(f"{self.pending} password hashing jobs already pending")
+            self.pending += 1
+        submitted = time.monotonic()
+
+        def timed():
+            started = time.monotonic()
+            try:
+                return function(*args)
+            finally:
+                with self._lock:
+                    self._queue_waits.append(started - submitted)
+                    self._run_times.append(time.monotonic() - started)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        """
+        Returns (valid, new_hash). new_hash is set when the password is valid but its stored
+        hash uses another cost factor than the configured one; the caller should save it.
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "queue_wait_seconds": latency_summary(self._queue_waits),
+                "run_seconds": latency_summary(self._run_times),
+            }
+
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 # JWT Token Handling
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -0,0 +1,96 @@
+"""
+Memory per block and read speed of the in-memory chain layouts.
+
+    dict     Block objects with a per-instance __dict__ (the layout before __slots__)
+    slots    a list of Block objects
+    compact  blockchain.compact.CompactChain (typed arrays, payloads decoded on access)
+    tiered   blockchain.tiered.TieredChain (hot objects + compressed cold segments)
+
+Memory is what tracemalloc attributes to the chain after building it. Run from the project root:
+    python -m benchmarks.bench_block_memory --blocks 1000000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from blockchain.compact import CompactChain
+from blockchain.core import Block
+from blockchain.tiered import TieredChain
+
+LAYOUTS = ("dict", "slots", "compact", "tiered")
+
+# The same class without __slots__, i.e. one __dict__ per block
+DictBlock = type("DictBlock", (), {
+    name: value for name, value in vars(Block).items()
+    if name not in ("__slots__", "__dict__", "__weakref__", *Block.__slots__)
+})
+
+
+def generate_blocks(count, events_per_block, block_class):
+    previous_hash = "0" * 64
+    timestamp = 1_767_225_600.0
+    for index in range(count):
+        data = [
+            {"product_id": index * events_per_block + n, "event_type": "SHIPPED",
+             "location": "Warehouse B", "actor": "ShipCo"}
+            for n in range(events_per_block)
+        ] if index else "Genesis Block - Supply Chain Start"
+        block = block_class(index, timestamp + index, data, previous_hash)
+        previous_hash = block.hash
+        yield block
+
+
+def build(layout, args):
+    if layout == "dict":
+        return list(generate_blocks(args.blocks, args.events, DictBlock))
+    if layout == "slots":
+        return list(generate_blocks(args.blocks, args.events, Block))
+    chain = CompactChain() if layout == "compact" else TieredChain(hot_blocks=args.hot_blocks)
+    for block in generate_blocks(args.blocks, args.events, Block):
+        chain.append(block)
+    return chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=1_000_000)
+    parser.add_argument("--events", type=int, default=1, help="Events per block")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--hot-blocks", type=int, default=1024, help="Hot tier size of the tiered layout")
+    parser.add_argument("--reads", type=int, default=100_000, help="Random index lookups")
+    args = parser.parse_args()
+
+    print(f"{args.blocks} blocks, {args.events} event(s) each")
+    print(f"{'layout':>8} {'build s':>8} {'MB':>8} {'B/block':>8} {'iter blocks/s':>14} {'random reads/s':>15}")
+    for layout in args.layouts:
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        chain = build(layout, args)
+        built = time.perf_counter()
+        gc.collect()
+        memory, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started_iter = time.perf_counter()
+        for block in chain:
+            block.hash
+        iterated = time.perf_counter() - started_iter
+
+        indexes = random.Random(0).choices(range(args.blocks), k=args.reads)
+        started_reads = time.perf_counter()
+        for index in indexes:
+            chain[index].hash
+        reads = time.perf_counter() - started_reads
+
+        print(f"{layout:>8} {built - started:>8.1f} {memory / 1e6:>8.1f} {memory / args.blocks:>8.0f} "
+              f"{args.blocks / iterated:>14,.0f} {args.reads / reads:>15,.0f}")
+        if layout == "tiered":
+            chain.close()
+        del chain
+
+
+if __name__ == "__main__":
+    main()
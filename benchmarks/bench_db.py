@@ -0,0 +1,139 @@
+"""
+Concurrent load on the product CRUD endpoints under different database engine settings.
+
+Each mode starts its own uvicorn server (with --workers processes) on a fresh database,
+then --clients threads run a mixed workload (create, read, update, list) against it.
+The default modes compare SQLite in rollback-journal mode with FULL sync (the previous
+behaviour) against WAL with NORMAL sync; pass --postgres-url to add a PostgreSQL run.
+
+Run from the project root:
+    python -m benchmarks.bench_db --clients 16 --requests 100 --workers 2
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "sqlite-journal": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_MMAP_SIZE": "0"},
+    "sqlite-wal": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL"},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(conn, method, path, body=None, headers=None, form=False):
+    headers = dict(headers or {})
+    if body is not None:
+        if form:
+            body = urllib.parse.urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, json.loads(payload) if payload else None
+
+
+def start_server(env, port, workers):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            if request(conn, "GET", "/products/?limit=1")[0] == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+
+def client_loop(port, headers, client_id, count, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for i in range(count):
+        started = time.perf_counter()
+        status, product = request(conn, "POST", "/products/",
+                                  {"name": f"Bench {client_id}-{i}", "sku": f"BENCH-{client_id}-{i}"}, headers)
+        ok = status == 201
+        if ok:
+            ok = request(conn, "GET", f"/products/{product['id']}")[0] == 200
+            ok = ok and request(conn, "PUT", f"/products/{product['id']}", {"description": "updated"})[0] == 200
+            ok = ok and request(conn, "GET", "/products/?limit=20")[0] == 200
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            errors.append(status)
+
+
+def run_mode(name, overrides, args):
+    workdir = tempfile.mkdtemp(prefix=f"bench-db-{name}-")
+    env = {**os.environ, "BLOCKCHAIN_DATA_DIR": os.path.join(workdir, "chain"),
+           "DATABASE_URL": f"sqlite:///{workdir}/bench.db", **overrides}
+    port = free_port()
+    server = start_server(env, port, args.workers)
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        request(conn, "POST", "/auth/register", {"username": "bench", "password": "bench"})
+        token = request(conn, "POST", "/auth/token", {"username": "bench", "password": "bench"}, form=True)[1]
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=client_loop, args=(port, headers, client, args.requests, latencies, errors))
+            for client in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    rounds = len(latencies)
+    print(f"{name:<16} {rounds * 4 / elapsed:>10.0f} {latencies[rounds // 2] * 1e3:>9.1f} "
+          f"{latencies[min(rounds - 1, int(rounds * 0.99))] * 1e3:>9.1f} {len(errors):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Workload rounds (4 requests each) per client")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=sorted(MODES))
+    parser.add_argument("--postgres-url", help="Also benchmark this (empty) PostgreSQL database")
+    args = parser.parse_args()
+
+    runs = [(name, MODES[name]) for name in args.modes]
+    if args.postgres_url:
+        runs.append(("postgres", {"DATABASE_URL": args.postgres_url}))
+
+    print(f"{'mode':<16} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}  (per round of 4 requests)")
+    for name, overrides in runs:
+        run_mode(name, overrides, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Adaptive difficulty (blockchain/difficulty.py) against fixed difficulties.
+
+Mines --blocks blocks back to back with a DifficultySchedule targeting --interval seconds
+per block and prints, per retarget window, the mean block time and the difficulty (in
+leading hex zeros, fractional). For comparison it then reports the mean block time at the
+fixed whole-digit difficulties around the one the schedule settled on, which are 16x
+apart.
+
+Run from the project root:
+    python -m benchmarks.bench_difficulty --interval 0.05 --blocks 160 --retarget 16
+"""
+import argparse
+import math
+import time
+
+from blockchain.core import Blockchain
+from blockchain.difficulty import DifficultySchedule, difficulty_of, target_for_difficulty
+from blockchain.encoding import bits_to_target
+
+
+def mean_block_time(blockchain, blocks):
+    started = time.perf_counter()
+    for i in range(blocks):
+        blockchain.add_block([{"product_id": i, "event_type": "SCANNED", "location": "Warehouse B"}])
+    return (time.perf_counter() - started) / blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, default=0.05, help="Target seconds per block")
+    parser.add_argument("--blocks", type=int, default=160)
+    parser.add_argument("--retarget", type=int, default=16, help="Blocks per retarget window")
+    parser.add_argument("--start-difficulty", type=int, default=1)
+    parser.add_argument("--fixed-blocks", type=int, default=32, help="Blocks mined per fixed difficulty")
+    args = parser.parse_args()
+
+    schedule = DifficultySchedule(args.interval, retarget_blocks=args.retarget,
+                                  initial_target=target_for_difficulty(args.start_difficulty))
+    blockchain = Blockchain(difficulty=args.start_difficulty, schedule=schedule)
+    print(f"adaptive, target {args.interval * 1000:.1f} ms per block")
+    print(f"{'blocks':>9} {'ms/block':>10} {'difficulty':>11}")
+    for start in range(0, args.blocks, args.retarget):
+        count = min(args.retarget, args.blocks - start)
+        difficulty = difficulty_of(bits_to_target(blockchain.next_bits()))
+        seconds = mean_block_time(blockchain, count)
+        print(f"{start + 1:>4}-{start + count:<4} {seconds * 1000:>10.1f} {difficulty:>11.2f}")
+    assert blockchain.is_chain_valid(full=True)
+
+    settled = difficulty_of(bits_to_target(blockchain.next_bits()))
+    print("\nfixed")
+    print(f"{'difficulty':>10} {'ms/block':>10}")
+    for difficulty in sorted({max(1, math.floor(settled)), max(1, math.ceil(settled))}):
+        seconds = mean_block_time(Blockchain(difficulty=difficulty), args.fixed_blocks)
+        print(f"{difficulty:>10} {seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
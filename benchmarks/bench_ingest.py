@@ -0,0 +1,110 @@
+"""
+Event ingestion throughput: POST /events/record (one event per call) against
+POST /events/record/bulk (JSON array and NDJSON), measured in events/sec until every
+event is sealed into a block.
+
+The API runs in-process with a throwaway SQLite database and chain directory. Run from
+the project root:
+    python -m benchmarks.bench_ingest --events 2000 --bulk-size 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def configure(workdir, difficulty, max_wait):
+    # Settings are read at import time, so the environment is set before importing the app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["BLOCKCHAIN_DATA_DIR"] = os.path.join(workdir, "chain")
+    os.environ["BLOCKCHAIN_DIFFICULTY"] = str(difficulty)
+    os.environ["MEMPOOL_MAX_WAIT_SECONDS"] = str(max_wait)
+
+
+def make_events(count, product_ids):
+    return [
+        {"product_id": product_ids[i % len(product_ids)], "event_type": "SCANNED",
+         "location": "Warehouse B", "actor": "Scanner 7"}
+        for i in range(count)
+    ]
+
+
+def wait_sealed(client, receipt_ids):
+    for receipt_id in receipt_ids:
+        receipt = client.get(f"/events/receipts/{receipt_id}", params={"wait": 60}).json()
+        assert receipt["status"] == "sealed", receipt
+
+
+def run_single(client, headers, events):
+    receipt_ids = []
+    for event in events:
+        response = client.post("/events/record", json=event, headers=headers)
+        receipt_ids.append(response.json()["receipt_id"])
+    wait_sealed(client, receipt_ids[-1:])
+    return receipt_ids
+
+
+def run_bulk(client, headers, events, bulk_size, ndjson):
+    receipt_ids = []
+    for start in range(0, len(events), bulk_size):
+        chunk = events[start:start + bulk_size]
+        if ndjson:
+            body = "\n".join(json.dumps(event) for event in chunk)
+            response = client.post("/events/record/bulk", content=body,
+                                   headers={**headers, "Content-Type": "application/x-ndjson"})
+        else:
+            response = client.post("/events/record/bulk", json=chunk, headers=headers)
+        result = response.json()
+        assert result["rejected"] == 0, result["errors"][:3]
+        receipt_ids.extend(receipt["receipt_id"] for receipt in result["receipts"])
+    wait_sealed(client, receipt_ids[-1:])
+    return receipt_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--bulk-size", type=int, default=500)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--difficulty", type=int, default=2)
+    parser.add_argument("--max-wait", type=float, default=0.05,
+                        help="MEMPOOL_MAX_WAIT_SECONDS for the run")
+    args = parser.parse_args()
+
+    configure(tempfile.mkdtemp(prefix="bench-ingest-"), args.difficulty, args.max_wait)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.routers import events as events_router
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"username": "bench", "password": "bench"})
+        token = client.post("/auth/token", data={"username": "bench", "password": "bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        product_ids = [
+            client.post("/products/", json={"name": f"Product {i}", "sku": f"BENCH-{i}"},
+                        headers=headers).json()["id"]
+            for i in range(args.products)
+        ]
+        events = make_events(args.events, product_ids)
+
+        runs = [
+            ("single", lambda: run_single(client, headers, events)),
+            (f"bulk json x{args.bulk_size}", lambda: run_bulk(client, headers, events, args.bulk_size, False)),
+            (f"bulk ndjson x{args.bulk_size}", lambda: run_bulk(client, headers, events, args.bulk_size, True)),
+        ]
+        print(f"{'path':<22} {'events':>8} {'blocks':>7} {'seconds':>9} {'events/s':>10}")
+        for name, run in runs:
+            blocks_before = len(events_router.supply_chain_blockchain.chain)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            blocks = len(events_router.supply_chain_blockchain.chain) - blocks_before
+            print(f"{name:<22} {len(events):>8} {blocks:>7} {elapsed:>9.2f} {len(events) / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
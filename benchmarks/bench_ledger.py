@@ -0,0 +1,108 @@
+"""
+Single-writer ledger (blockchain/ledger.py): read scaling and append throughput.
+
+Builds a block store of --blocks blocks and serves it with a LedgerServer, then:
+
+* reads: 1, 2, ... --processes reader processes each open a LedgerBlockchain and fetch
+  random blocks (lock-free, from memory-mapped segments) for --seconds; prints total
+  reads per second, which should grow with the process count up to the number of cores;
+* appends: the same process counts append blocks through the service for --seconds;
+  prints blocks per second, next to appends made directly by the owning process.
+
+Every run ends with a full validation of the chain, so concurrent appends never forked it.
+
+Run from the project root:
+    python -m benchmarks.bench_ledger --blocks 10000 --processes 4 --seconds 2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from blockchain.core import Blockchain
+from blockchain.ledger import LedgerBlockchain, LedgerServer
+from blockchain.storage import BlockStore
+
+
+def _event(i, kind):
+    return [{"product_id": i % 1000, "event_type": kind, "location": "Warehouse B"}]
+
+
+def _read_worker(data_dir, socket_path, seconds, results):
+    blockchain = LedgerBlockchain(data_dir, socket_path, difficulty=0)
+    length = len(blockchain.chain)
+    reads = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(256):
+            blockchain.chain[random.randrange(length)]
+        reads += 256
+    results.put(reads)
+
+
+def _append_worker(data_dir, socket_path, seconds, results):
+    blockchain = LedgerBlockchain(data_dir, socket_path, difficulty=0)
+    appended = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        blockchain.add_block(_event(appended, "SCANNED"))
+        appended += 1
+    results.put(appended)
+
+
+def run_processes(target, count, args, data_dir, socket_path):
+    """Runs `count` processes of `target` and returns the sum of their results per second."""
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=target, args=(data_dir, socket_path, args.seconds, results))
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / args.seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=10_000)
+    parser.add_argument("--processes", type=int, default=4, help="Largest number of reader/appender processes")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duration of each measurement")
+    parser.add_argument("--difficulty", type=int, default=0, help="Proof of Work difficulty of appended blocks")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-ledger-")
+    data_dir = os.path.join(directory, "chain")
+    socket_path = os.path.join(directory, "ledger.sock")
+    blockchain = Blockchain(difficulty=args.difficulty, store=BlockStore(data_dir, sync_every=1000))
+    server = LedgerServer(blockchain, socket_path)
+    try:
+        for i in range(args.blocks):
+            blockchain.add_block(_event(i, "RECEIVED"))
+        server.start()
+        counts = sorted({1, *range(2, args.processes + 1, 2), args.processes})
+
+        print(f"{'readers':>8} {'reads/s':>12}")
+        for count in counts:
+            print(f"{count:>8} {run_processes(_read_worker, count, args, data_dir, socket_path):>12,.0f}")
+
+        started, appended = time.perf_counter(), 0
+        while time.perf_counter() - started < args.seconds:
+            blockchain.add_block(_event(appended, "SCANNED"))
+            appended += 1
+        print(f"\n{'appenders':>9} {'blocks/s':>10}")
+        print(f"{'direct':>9} {appended / args.seconds:>10,.0f}")
+        for count in counts:
+            print(f"{count:>9} {run_processes(_append_worker, count, args, data_dir, socket_path):>10,.0f}")
+        assert blockchain.is_chain_valid(full=True)
+    finally:
+        server.stop()
+        blockchain.chain.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
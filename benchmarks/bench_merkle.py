@@ -0,0 +1,42 @@
+"""
+Merkle tree construction and bulk inclusion proofs for large blocks.
+
+Run from the project root:
+    python -m benchmarks.bench_merkle --sizes 1000 10000 100000
+"""
+import argparse
+import time
+
+from blockchain import merkle
+
+
+def make_events(count):
+    return [
+        {"product_id": i, "event_type": "SHIPPED", "location": "Warehouse B",
+         "actor": "ShipCo", "notes": None, "timestamp": "2026-01-01T00:00:00"}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'build ms':>10} {'all proofs ms':>14} {'verify 1 us':>12}")
+    for size in args.sizes:
+        events = make_events(size)
+        started = time.perf_counter()
+        levels = merkle.build_tree(events)
+        built = time.perf_counter()
+        proofs = merkle.inclusion_proofs(levels, range(size))
+        proved = time.perf_counter()
+        root = merkle.tree_root(levels)
+        assert merkle.verify_proof(events[size // 2], proofs[size // 2], root)
+        verified = time.perf_counter()
+        print(f"{size:>8} {(built - started) * 1e3:>10.1f} {(proved - built) * 1e3:>14.1f} "
+              f"{(verified - proved) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cost of the metrics layer (backend/metrics.py) on the record path.
+
+Two measurements, each with metrics on and off:
+  * chain: Blockchain.add_block() in a loop, with and without a metrics registry
+  * api:   POST /events/record until every event is sealed, in a fresh process per
+           setting (METRICS_ENABLED is read at import time); this includes the request
+           middleware and the SQL statement timing
+
+Rounds alternate between the two settings and the best round of each is kept, so
+background noise does not land on one side only. Run from the project root:
+    python -m benchmarks.bench_metrics --blocks 2000 --events 1000 --rounds 3
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from blockchain.core import Blockchain
+
+
+def bench_chain(blocks, events, registry):
+    gc.collect()  # Do not charge the previous round's garbage to this one
+    blockchain = Blockchain(difficulty=1, metrics=registry)
+    started = time.perf_counter()
+    for i in range(blocks):
+        blockchain.add_block([{"product_id": i * events + n, "event_type": "SCANNED"} for n in range(events)])
+    return blocks / (time.perf_counter() - started)
+
+
+def run_api(events, enabled):
+    """Runs in a child process: events/s through POST /events/record with METRICS_ENABLED=enabled."""
+    workdir = tempfile.mkdtemp(prefix="bench-metrics-")
+    # Settings are read at import time, so the environment is set before importing the app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["BLOCKCHAIN_DATA_DIR"] = os.path.join(workdir, "chain")
+    os.environ["BLOCKCHAIN_DIFFICULTY"] = "1"
+    os.environ["MEMPOOL_MAX_WAIT_SECONDS"] = "0.05"
+    os.environ["METRICS_ENABLED"] = "true" if enabled else "false"
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"username": "bench", "password": "bench"})
+        token = client.post("/auth/token", data={"username": "bench", "password": "bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        product_id = client.post("/products/", json={"name": "Product", "sku": "METRICS-1"},
+                                 headers=headers).json()["id"]
+        event = {"product_id": product_id, "event_type": "SCANNED", "location": "Warehouse B"}
+        for _ in range(50):  # Warm-up
+            client.post("/events/record", json=event, headers=headers)
+        started = time.perf_counter()
+        for _ in range(events):
+            receipt_id = client.post("/events/record", json=event, headers=headers).json()["receipt_id"]
+        receipt = client.get(f"/events/receipts/{receipt_id}", params={"wait": 60}).json()
+        assert receipt["status"] == "sealed", receipt
+        return events / (time.perf_counter() - started)
+
+
+def api_round(events, enabled):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_metrics", "--child", "--events", str(events)]
+        + ([] if enabled else ["--disabled"]),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["events_per_sec"]
+
+
+def report(name, unit, off, on):
+    overhead = (off - on) / off * 100
+    print(f"{name:<8} {off:>14,.0f} {on:>14,.0f} {unit:<9} overhead {overhead:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=2000, help="Blocks added per chain round")
+    parser.add_argument("--events", type=int, default=1000, help="Events recorded per API round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--skip-api", action="store_true", help="Only measure Blockchain.add_block()")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--disabled", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps({"events_per_sec": run_api(args.events, not args.disabled)}))
+        return
+
+    from backend.metrics import registry
+
+    results = {"chain": {False: [], True: []}, "api": {False: [], True: []}}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            results["chain"][enabled].append(bench_chain(args.blocks, 10, registry if enabled else None))
+            if not args.skip_api:
+                results["api"][enabled].append(api_round(args.events, enabled))
+
+    print(f"{'path':<8} {'metrics off':>14} {'metrics on':>14}")
+    report("chain", "blocks/s", max(results["chain"][False]), max(results["chain"][True]))
+    if not args.skip_api:
+        report("api", "events/s", max(results["api"][False]), max(results["api"][True]))
+
+
+if __name__ == "__main__":
+    main()
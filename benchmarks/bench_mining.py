@@ -0,0 +1,59 @@
+"""
+Proof of Work throughput per miner and difficulty.
+
+Run from the project root:
+    python -m benchmarks.bench_mining --difficulties 2 3 4 5 --blocks 5
+"""
+import argparse
+import os
+import time
+
+from blockchain.core import Block
+from blockchain.mining import MINERS, get_miner
+
+
+def bench_miner(kind, workers, difficulty, blocks):
+    miner = get_miner(kind, workers)
+    attempts = 0
+    elapsed = 0.0
+    try:
+        # Untimed block so pool start-up is not charged to the first measurement
+        miner.mine(Block(0, time.time(), {"warm_up": True}, "0" * 64), difficulty)
+        for i in range(blocks):
+            block = Block(i + 1, time.time(), {"product_id": i, "event_type": "BENCH"}, "0" * 64)
+            result = miner.mine(block, difficulty)
+            attempts += result.attempts
+            elapsed += result.elapsed
+    finally:
+        miner.close()
+    hashes_per_sec = attempts / elapsed if elapsed else 0.0
+    return {
+        "miner": kind,
+        "workers": miner.workers,
+        "difficulty": difficulty,
+        "blocks": blocks,
+        "seconds_per_block": elapsed / blocks,
+        "hashes_per_sec": hashes_per_sec,
+        "hashes_per_sec_per_core": hashes_per_sec / miner.workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--difficulties", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--blocks", type=int, default=5, help="blocks mined per configuration")
+    parser.add_argument("--miners", nargs="+", default=sorted(MINERS), choices=sorted(MINERS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print(f"{'miner':<8} {'workers':>7} {'diff':>4} {'s/block':>9} {'H/s':>12} {'H/s/core':>12}")
+    for difficulty in args.difficulties:
+        for kind in args.miners:
+            row = bench_miner(kind, args.workers, difficulty, args.blocks)
+            print(f"{row['miner']:<8} {row['workers']:>7} {row['difficulty']:>4} "
+                  f"{row['seconds_per_block']:>9.4f} {row['hashes_per_sec']:>12,.0f} "
+                  f"{row['hashes_per_sec_per_core']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
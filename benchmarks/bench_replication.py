@@ -0,0 +1,82 @@
+"""
+Replication between nodes on localhost (see blockchain/node.py).
+
+Measures:
+  * catch-up: an empty node syncs a chain of --blocks blocks from a peer (blocks/s)
+  * convergence: two nodes mine separately during a partition, are reconnected, and the
+    time until both hold the same tip is measured (the longer branch wins)
+
+Run from the project root:
+    python -m benchmarks.bench_replication --blocks 20000 --events 10
+"""
+import argparse
+import time
+
+from blockchain.core import Blockchain
+from blockchain.node import Node
+
+
+def mine(blockchain, count, events, tag):
+    for i in range(count):
+        blockchain.add_block([
+            {"product_id": i * events + n, "event_type": tag, "location": "Warehouse B"}
+            for n in range(events)
+        ])
+
+
+def wait_until(condition, timeout):
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError("Nodes did not converge")
+        time.sleep(0.005)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20000, help="Length of the chain to catch up with")
+    parser.add_argument("--events", type=int, default=10, help="Events per block")
+    parser.add_argument("--difficulty", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=500, help="Blocks per sync request")
+    parser.add_argument("--partition-blocks", type=int, default=50,
+                        help="Blocks mined by the longer side during the partition")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    source = Blockchain(difficulty=args.difficulty)
+    print(f"Mining {args.blocks} blocks of {args.events} events...")
+    mine(source, args.blocks, args.events, "SHIPPED")
+
+    follower = Blockchain(difficulty=args.difficulty)
+    # Long poll interval: only announcements and explicit syncs drive replication here
+    source_node = Node(source, sync_batch=args.batch, sync_interval=3600)
+    follower_node = Node(follower, sync_batch=args.batch, sync_interval=3600)
+    source_node.start()
+    follower_node.start()
+    try:
+        started = time.perf_counter()
+        follower_node.sync_from(source_node.address)
+        elapsed = time.perf_counter() - started
+        assert follower.get_latest_block().hash == source.get_latest_block().hash
+        print(f"catch-up     {args.blocks} blocks in {elapsed:.2f}s = {args.blocks / elapsed:,.0f} blocks/s")
+
+        # Partition: no peers on either side while both mine, the source more
+        mine(follower, args.partition_blocks // 2, args.events, "FOLLOWER")
+        mine(source, args.partition_blocks, args.events, "SOURCE")
+        started = time.perf_counter()
+        follower_node.add_peer(source_node.address)  # Reconnect; the follower syncs right away
+        converged = wait_until(
+            lambda: follower.get_latest_block().hash == source.get_latest_block().hash, args.timeout
+        )
+        stats = follower_node.stats()
+        print(f"convergence  {converged * 1000:.1f} ms after reconnecting "
+              f"({stats['blocks_dropped']} block(s) dropped, {args.partition_blocks} adopted)")
+        assert follower.is_chain_valid(full=True)
+    finally:
+        follower_node.stop()
+        source_node.stop()
+
+
+if __name__ == "__main__":
+    main()
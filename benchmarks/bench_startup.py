@@ -0,0 +1,123 @@
+"""
+Startup cost of the API: import time, time to first response and time to ready.
+
+* import: seconds to `import backend.main` in a fresh interpreter (median of --imports
+  runs). Nothing is opened at import time, so this is the cost of the libraries;
+* first response / ready: a uvicorn server is started and polled. The first number is
+  when GET /ready first answers (any status), the second when it answers 200, i.e. the
+  event index and the events table have caught up with the chain.
+
+Three starts are timed over the same directory: a fresh install, the first start over a
+block store of --blocks blocks written beforehand (schema setup plus a full warm-up), and
+a restart where the schema is at the current revision and the events table is in sync.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --blocks 20000 --imports 5
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = ("import time; started = time.perf_counter(); import backend.main; "
+                  "print(time.perf_counter() - started)")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds(env, runs):
+    samples = [
+        float(subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, check=True,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout)
+        for _ in range(runs)
+    ]
+    return statistics.median(samples)
+
+
+def time_start(env, timeout=120):
+    """Starts uvicorn and returns (seconds to the first response, seconds to ready)."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    first_response = None
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/ready")
+                status = conn.getresponse().status
+            except OSError:
+                time.sleep(0.01)
+                continue
+            if first_response is None:
+                first_response = time.perf_counter() - started
+            if status == 200:
+                return first_response, time.perf_counter() - started
+            time.sleep(0.01)
+        raise RuntimeError("Server did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def write_chain(data_dir, blocks, events_per_block):
+    """Appends `blocks` unmined blocks to a block store, as an earlier run of the API would have."""
+    from blockchain.core import Blockchain
+    from blockchain.storage import BlockStore
+
+    store = BlockStore(data_dir, sync_every=10_000)
+    blockchain = Blockchain(difficulty=0, store=store)
+    for i in range(blocks):
+        blockchain.add_block([
+            {"product_id": (i * events_per_block + k) % 1000, "event_type": "SCANNED",
+             "location": f"Warehouse {k}", "timestamp": "2024-01-01T00:00:00"}
+            for k in range(events_per_block)
+        ])
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20_000, help="Blocks in the store for the reopen runs")
+    parser.add_argument("--events-per-block", type=int, default=4)
+    parser.add_argument("--imports", type=int, default=5, help="Interpreters started to time the import")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+           "BLOCKCHAIN_DATA_DIR": os.path.join(workdir, "chain"), "BLOCKCHAIN_DIFFICULTY": "0",
+           "PYTHONPATH": ROOT}
+
+    print(f"import backend.main: {import_seconds(env, args.imports) * 1000:.0f} ms (median of {args.imports})")
+    print(f"\n{'start':<28} {'first response':>15} {'ready':>9}")
+
+    def report(name):
+        first_response, ready = time_start(env)
+        print(f"{name:<28} {first_response * 1000:>12.0f} ms {ready * 1000:>6.0f} ms")
+
+    report("fresh install")
+    for suffix in ("", "-wal", "-shm"):  # The reopen runs start from an empty database
+        if os.path.exists(os.path.join(workdir, "bench.db" + suffix)):
+            os.remove(os.path.join(workdir, "bench.db" + suffix))
+    write_chain(env["BLOCKCHAIN_DATA_DIR"], args.blocks, args.events_per_block)
+    report(f"first start, {args.blocks} blocks")
+    report(f"restart, {args.blocks} blocks")
+
+
+if __name__ == "__main__":
+    main()
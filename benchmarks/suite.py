@@ -0,0 +1,293 @@
+"""
+Benchmark suite: blockchain micro-benchmarks and in-process API load tests, saved as JSON
+so runs can be compared against a stored baseline.
+
+Micro-benchmarks
+    hash.*            Block.calculate_hash() for binary (v2) and JSON-era (v1) blocks
+    mining.d<N>.*     serial Proof of Work at each difficulty
+    validate.<n>.*    full is_chain_valid() over chains of n blocks
+    history.<n>.*     event index build, indexed product lookups and a linear chain scan
+
+Load tests (the FastAPI app in-process, throwaway SQLite database and chain)
+    api.<operation>.* p50 / p99 latency and throughput of record, history, products
+                      create / get / update / delete and login
+
+Every metric is {"value", "unit", "better": "higher" | "lower"}. Run from the project root:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --quick --baseline results.json --fail-on-regression
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from blockchain.core import Block, Blockchain
+from blockchain.mining import SerialMiner
+
+from backend.metrics import latency_summary
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better):
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+        print(f"  {name:<40} {value:>14,.3f} {unit}")
+
+    def add_latencies(self, name, samples, elapsed):
+        summary = latency_summary(samples)
+        self.add(f"{name}.p50_ms", summary["p50"] * 1e3, "ms", "lower")
+        self.add(f"{name}.p99_ms", summary["p99"] * 1e3, "ms", "lower")
+        self.add(f"{name}.throughput", len(samples) / elapsed, "req/s", "higher")
+
+
+def make_event(i, products):
+    return {"product_id": i % products, "event_type": "SHIPPED", "location": "Warehouse B",
+            "actor": "ShipCo", "timestamp": "2026-01-01T00:00:00"}
+
+
+def ops_per_second(function, seconds=0.5):
+    """Calls `function` repeatedly for about `seconds`; returns calls per second."""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        for _ in range(100):
+            function()
+        calls += 100
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+# --- Micro-benchmarks ---
+def bench_hashing(results):
+    events = [make_event(i, 100) for i in range(10)]
+    binary = Block(1, 1_767_225_600.0, events, "0" * 64)
+    results.add("hash.v2_10_events.ops", ops_per_second(binary.calculate_hash), "hash/s", "higher")
+    json_era = Block(1, 1_767_225_600.0, events, "0" * 64, version=1)
+    results.add("hash.v1_10_events.ops", ops_per_second(json_era.calculate_hash), "hash/s", "higher")
+
+
+def bench_mining(results, difficulties, blocks):
+    miner = SerialMiner()
+    for difficulty in difficulties:
+        attempts = 0
+        elapsed = 0.0
+        for i in range(blocks):
+            # Fixed contents: every run searches the same nonces, so only hashing speed varies
+            block = Block(i + 1, 1_767_225_600.0 + i, [make_event(i, 100)], "0" * 64)
+            result = miner.mine(block, difficulty)
+            attempts += result.attempts
+            elapsed += result.elapsed
+        results.add(f"mining.d{difficulty}.seconds_per_block", elapsed / blocks, "s", "lower")
+        results.add(f"mining.d{difficulty}.hashes_per_sec", attempts / elapsed, "hash/s", "higher")
+
+
+def build_chain(size, events_per_block, products):
+    """A valid difficulty-0 chain of `size` blocks, built without mining or printing."""
+    blockchain = Blockchain(difficulty=0)
+    previous = blockchain.get_latest_block()
+    timestamp = previous.timestamp
+    for index in range(1, size):
+        events = [make_event(index * events_per_block + n, products) for n in range(events_per_block)]
+        previous = Block(index, timestamp + index, events, previous.hash)
+        blockchain.chain.append(previous)
+    return blockchain
+
+
+def bench_chain(results, size, events_per_block, products, lookups):
+    started = time.perf_counter()
+    blockchain = build_chain(size, events_per_block, products)
+    print(f"  (built {size} blocks in {time.perf_counter() - started:.1f}s)")
+
+    started = time.perf_counter()
+    assert blockchain.is_chain_valid(full=True)
+    elapsed = time.perf_counter() - started
+    results.add(f"validate.{size}.blocks_per_sec", size / elapsed, "blocks/s", "higher")
+
+    started = time.perf_counter()
+    blockchain.warm_index()
+    results.add(f"history.{size}.index_build_s", time.perf_counter() - started, "s", "lower")
+
+    rng = random.Random(0)
+    samples = []
+    for _ in range(lookups):
+        product_id = rng.randrange(products)
+        started = time.perf_counter()
+        blockchain.find_events("product_id", product_id)
+        samples.append(time.perf_counter() - started)
+    results.add(f"history.{size}.lookup_p50_ms", latency_summary(samples)["p50"] * 1e3, "ms", "lower")
+
+    # What a history query costs without the index: one pass over every block
+    started = time.perf_counter()
+    matches = [event for block in blockchain.iter_blocks()
+               for event in block.events() if isinstance(event, dict) and event.get("product_id") == 1]
+    results.add(f"history.{size}.scan_ms", (time.perf_counter() - started) * 1e3, "ms", "lower")
+    assert matches
+
+
+# --- API load tests ---
+def bench_api(results, requests, login_requests, difficulty):
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    # Settings are read at import time, so the environment is set before importing the app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["BLOCKCHAIN_DATA_DIR"] = os.path.join(workdir, "chain")
+    os.environ["BLOCKCHAIN_DIFFICULTY"] = str(difficulty)
+    os.environ["MEMPOOL_MAX_WAIT_SECONDS"] = "0.05"
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    def timed(operation, calls):
+        """Returns (latency samples, total seconds, last response)."""
+        samples = []
+        response = None
+        started = time.perf_counter()
+        for i in range(calls):
+            call_started = time.perf_counter()
+            response = operation(i)
+            samples.append(time.perf_counter() - call_started)
+            assert response.status_code < 300, (response.status_code, response.text[:200])
+        return samples, time.perf_counter() - started, response
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        client.post("/auth/register", json={"username": "bench", "password": "bench"})
+        token = client.post("/auth/token", data={"username": "bench", "password": "bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        product_ids = [
+            client.post("/products/", json={"name": f"Product {i}", "sku": f"SUITE-{i}"}, headers=headers).json()["id"]
+            for i in range(20)
+        ]
+
+        created = []  # Products made by the create run, removed by the delete run
+
+        def create_product(i):
+            response = client.post("/products/", json={"name": f"Load {i}", "sku": f"LOAD-{i}"}, headers=headers)
+            created.append(response.json()["id"])
+            return response
+
+        runs = [
+            ("api.record", requests, lambda i: client.post(
+                "/events/record", headers=headers,
+                json={"product_id": product_ids[i % len(product_ids)], "event_type": "SCANNED"})),
+            ("api.history", requests, lambda i: client.get(f"/events/history/{product_ids[i % len(product_ids)]}")),
+            ("api.products.create", requests, create_product),
+            ("api.products.get", requests, lambda i: client.get(f"/products/{product_ids[i % len(product_ids)]}")),
+            ("api.products.update", requests, lambda i: client.put(
+                f"/products/{product_ids[i % len(product_ids)]}", json={"name": f"Renamed {i}", "sku": f"SUITE-{i % len(product_ids)}"},
+                headers=headers)),
+            ("api.products.delete", requests, lambda i: client.delete(f"/products/{created[i]}", headers=headers)),
+            ("api.login", login_requests, lambda i: client.post(
+                "/auth/token", data={"username": "bench", "password": "bench"})),
+        ]
+        measured = []
+        for name, calls, operation in runs:
+            samples, elapsed, response = timed(operation, calls)
+            measured.append((name, samples, elapsed))
+            if name == "api.record":
+                # Let the recorded events be sealed so history has something to read
+                client.get(f"/events/receipts/{response.json()['receipt_id']}", params={"wait": 60})
+    for name, samples, elapsed in measured:
+        results.add_latencies(name, samples, elapsed)
+
+
+# --- Results ---
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "arguments": vars(args),
+    }
+
+
+def compare(metrics, baseline, tolerance):
+    """Prints the change of every metric present in both runs. Returns the names of regressions."""
+    regressions = []
+    print(f"\n{'metric':<40} {'baseline':>14} {'current':>14} {'change':>9}")
+    for name, metric in metrics.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (metric["value"] - previous["value"]) / previous["value"]
+        worse = -change if metric["better"] == "higher" else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif -worse > tolerance:
+            flag = "  improved"
+        print(f"{name:<40} {previous['value']:>14,.3f} {metric['value']:>14,.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["micro", "api"], help="Run one half of the suite")
+    parser.add_argument("--quick", action="store_true",
+                        help="Smaller run for pre-merge checks: 10k-block chains, difficulties 1-3, 200 requests")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--events-per-block", type=int, default=1)
+    parser.add_argument("--products", type=int, default=1000, help="Distinct products in generated chains")
+    parser.add_argument("--lookups", type=int, default=200, help="Indexed history lookups per chain size")
+    parser.add_argument("--difficulties", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--mining-blocks", type=int, default=5, help="Blocks mined per difficulty")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per API operation")
+    parser.add_argument("--login-requests", type=int, default=20, help="Logins (bcrypt bound)")
+    parser.add_argument("--api-difficulty", type=int, default=2, help="BLOCKCHAIN_DIFFICULTY of the API run")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results saved in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative change counted as a regression (default 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+    if args.quick:
+        # Only the defaults change: explicit options still win
+        parser.set_defaults(sizes=[10_000], difficulties=[1, 2, 3], requests=200)
+        args = parser.parse_args()
+
+    results = Results()
+    if args.only in (None, "micro"):
+        print("Micro-benchmarks")
+        bench_hashing(results)
+        bench_mining(results, args.difficulties, args.mining_blocks)
+        for size in args.sizes:
+            bench_chain(results, size, args.events_per_block, args.products, args.lookups)
+    if args.only in (None, "api"):
+        print("API load tests")
+        bench_api(results, args.requests, args.login_requests, args.api_difficulty)
+
+    report = {"meta": metadata(args), "metrics": results.metrics}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results.metrics, baseline["metrics"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
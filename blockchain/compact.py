@@ -0,0 +1,168 @@
+"""
+Struct-of-arrays chain: block headers in typed arrays instead of one Python object per block.
+
+CompactChain behaves like the list of blocks a Blockchain normally keeps (len(), indexing,
+slicing, iteration, append), but stores every block as a handful of array slots:
+
+    hashes       bytearray, 32-byte digests (hash of block N at N*32)
+    merkle roots bytearray, 32-byte digests, with a flag array for blocks without a root
+    timestamps   array('d')  (exact float timestamps, so JSON-era hashes still verify)
+    nonces       array('Q'), versions array('B')
+    bits         array('I'), compact Proof of Work targets (read for version 3 blocks only)
+    bodies       one bytearray of canonical body encodings (see encoding.encode_body)
+                 plus an array('Q') of end offsets
+
+Heights are implicit (block N is at position N) and a block's previous hash is the stored
+hash of block N-1. Payloads are decoded only when a block is read, so a block costs about
+95 bytes plus its encoded events instead of a Block, two hex strings and a payload dict.
+Blocks that do not fit the layout (non-hex hashes of early JSON-era chains, or a previous
+hash that does not match the block before) are kept as objects on the side.
+"""
+import threading
+from array import array
+
+from . import encoding
+from .core import Block
+
+DIGEST_SIZE = 32
+
+
+def _digest(hex_hash):
+    """32-byte digest of a hex hash, or None if the hash is not 64 hex characters."""
+    if not isinstance(hex_hash, str) or len(hex_hash) != 2 * DIGEST_SIZE:
+        return None
+    try:
+        return bytes.fromhex(hex_hash)
+    except ValueError:
+        return None
+
+
+class CompactChain:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = bytearray()
+        self._roots = bytearray()
+        self._has_root = array("B")
+        self._timestamps = array("d")
+        self._nonces = array("Q")
+        self._versions = array("B")
+        self._bits = array("I")
+        self._bodies = bytearray()
+        self._body_ends = array("Q")
+        self._irregular = {}  # block index -> Block that does not fit the arrays
+
+    # --- List-like interface used by Blockchain ---
+    def append(self, block):
+        with self._lock:
+            index = len(self._body_ends)
+            if block.index != index:
+                raise ValueError(f"Expected block {index}, got block {block.index}.")
+            block_hash = _digest(block.hash)
+            merkle_root = _digest(block.merkle_root) if block.merkle_root is not None else b""
+            if index == 0:
+                previous_fits = block.previous_hash == encoding.NULL_HASH
+            else:
+                previous_fits = _digest(block.previous_hash) == bytes(self._hashes[-DIGEST_SIZE:])
+            irregular = block_hash is None or merkle_root is None or not previous_fits
+            if irregular:
+                # Keep the arrays position-aligned; the object itself answers reads
+                self._irregular[index] = block
+                block_hash = bytes(DIGEST_SIZE) if block_hash is None else block_hash
+                merkle_root = b""
+                body = b""
+            else:
+                body = encoding.encode_body(block.data)
+
+            self._hashes += block_hash
+            self._roots += merkle_root or bytes(DIGEST_SIZE)
+            self._has_root.append(1 if merkle_root else 0)
+            self._timestamps.append(block.timestamp)
+            self._nonces.append(block.nonce)
+            self._versions.append(block.version)
+            self._bits.append(block.bits or 0)
+            self._bodies += body
+            self._body_ends.append(len(self._bodies))
+
+    def __len__(self):
+        # _body_ends is appended last, so every array already holds the blocks it counts
+        return len(self._body_ends)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("block index out of range")
+        return self._build(index)
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start, stop=None):
+        """Yields blocks start..stop-1 in order."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        previous_hash = None
+        for index in range(max(0, start), stop):
+            block = self._build(index, previous_hash)
+            previous_hash = block.hash
+            yield block
+
+    def truncate(self, length):
+        """Drops blocks length.. (e.g. blocks replaced by a longer fork)."""
+        with self._lock:
+            if length >= len(self):
+                return
+            body_end = self._body_ends[length - 1] if length else 0
+            # _body_ends first, so concurrent readers never see more blocks than the arrays hold
+            del self._body_ends[length:]
+            del self._bodies[body_end:]
+            for values in (self._has_root, self._timestamps, self._nonces, self._versions, self._bits):
+                del values[length:]
+            del self._hashes[length * DIGEST_SIZE:]
+            del self._roots[length * DIGEST_SIZE:]
+            for index in [i for i in self._irregular if i >= length]:
+                del self._irregular[index]
+
+    def hash_at(self, index):
+        """Hex hash of block `index` without decoding the block."""
+        block = self._irregular.get(index)
+        if block is not None:
+            return block.hash
+        return self._hashes[index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE].hex()
+
+    # --- Decoding ---
+    def _build(self, index, previous_hash=None):
+        block = self._irregular.get(index)
+        if block is not None:
+            return block
+        if index == 0:
+            previous_hash = encoding.NULL_HASH
+        elif previous_hash is None:
+            previous_hash = self.hash_at(index - 1)
+        body_start = self._body_ends[index - 1] if index else 0
+        data, _consumed = encoding.decode_body(self._bodies[body_start:self._body_ends[index]])
+        offset = index * DIGEST_SIZE
+        version = self._versions[index]
+        return Block(
+            index=index,
+            timestamp=self._timestamps[index],
+            data=data,
+            previous_hash=previous_hash,
+            nonce=self._nonces[index],
+            block_hash=self._hashes[offset:offset + DIGEST_SIZE].hex(),
+            merkle_root=self._roots[offset:offset + DIGEST_SIZE].hex() if self._has_root[index] else None,
+            version=version,
+            bits=self._bits[index] if version >= encoding.TARGET_VERSION else None
+        )
+
+    def stats(self):
+        arrays = (self._hashes, self._roots, self._has_root, self._timestamps,
+                  self._nonces, self._versions, self._bits, self._bodies, self._body_ends)
+        return {
+            "blocks": len(self),
+            "array_bytes": sum(len(a) * getattr(a, "itemsize", 1) for a in arrays),
+            "body_bytes": len(self._bodies),
+            "irregular_blocks": len(self._irregular),
+        }
@@ -1,94 +1,475 @@
 import hashlib
-import time
+import itertools
 import json
+import logging
+import threading
+import time
+
+from . import encoding, snapshot
+from .difficulty import MAX_CLOCK_DRIFT_SECONDS, MAX_TARGET
+from .index import EventIndex
+from .merkle import merkle_root as compute_merkle_root
+from .mining import SerialMiner
+
+# Fixed genesis timestamp (2025-01-01 UTC): every new chain starts with the same block, so
+# independently started nodes can replicate one ledger (see blockchain.node)
+GENESIS_TIMESTAMP = 1_735_689_600.0
+
+logger = logging.getLogger(__name__)
+
+
+class CorruptBlockError(Exception):
+    """Raised when a stored block record fails its checksum or cannot be decoded."""
+
 
 class Block:
-    def __init__(self, index, timestamp, data, previous_hash, nonce=0):
+    # No per-instance __dict__: a block is only these fields (see blockchain.compact for
+    # a denser layout of whole chains)
+    __slots__ = ("version", "index", "timestamp", "data", "previous_hash", "nonce", "merkle_root", "bits", "hash")
+
+    def __init__(self, index, timestamp, data, previous_hash, nonce=0, block_hash=None,
+                 merkle_root=None, version=encoding.CURRENT_VERSION, bits=None):
+        # Hashing format: 1 = JSON era, 2 = canonical binary header, 3 = binary header with
+        # a Proof of Work target (see blockchain.encoding)
+        self.version = version
         self.index = index
+        if version >= encoding.BINARY_VERSION:
+            # Binary headers store whole microseconds; keep the float in step with them
+            timestamp = encoding.timestamp_us(timestamp) / 1_000_000
         self.timestamp = timestamp
         self.data = data  # Supply chain event data
         self.previous_hash = previous_hash
         self.nonce = nonce
-        self.hash = self.calculate_hash()
+        # Root of the Merkle tree over the block's events (batched blocks only). When set,
+        # the block hash commits to the root instead of the raw data, so a single event can
+        # be proven with an inclusion proof without the rest of the block.
+        if merkle_root is None and version >= encoding.BINARY_VERSION and isinstance(data, list):
+            merkle_root = compute_merkle_root(data)
+        self.merkle_root = merkle_root
+        # Compact Proof of Work target of version 3 blocks (see blockchain.difficulty)
+        self.bits = bits
+        # A stored hash is passed in when a block is loaded back from storage
+        self.hash = block_hash if block_hash is not None else self.calculate_hash()
 
-    def calculate_hash(self):
-        """Calculates the hash of the block."""
-        block_string = json.dumps({
+    def _hash_fields(self, nonce):
+        fields = {
             "index": self.index,
             "timestamp": self.timestamp,
-            "data": self.data,
             "previous_hash": self.previous_hash,
-            "nonce": self.nonce
-        }, sort_keys=True).encode()
+            "nonce": nonce
+        }
+        if self.merkle_root is None:
+            fields["data"] = self.data
+        else:
+            fields["merkle_root"] = self.merkle_root
+        return fields
+
+    def calculate_hash(self):
+        """Calculates the hash of the block."""
+        if self.version >= encoding.BINARY_VERSION:
+            return encoding.header_hash(self)
+        # JSON-era blocks keep their original hashing so they remain verifiable
+        block_string = json.dumps(self._hash_fields(self.nonce), sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
 
-    def mine_block(self, difficulty):
+    def hash_template(self):
+        """
+        Splits the hashed representation of the block around the nonce.
+        Returns (prefix, suffix, nonce_format) such that hashing prefix + encoded nonce + suffix
+        gives the same result as calculate_hash(), so miners only re-encode the nonce per try.
+        nonce_format is "u64" (8 big-endian bytes) for binary headers and "ascii" (decimal
+        digits) for JSON-era blocks.
+        """
+        if self.version >= encoding.BINARY_VERSION:
+            return encoding.header_template(self), b"", "u64"
+        block_string = json.dumps(self._hash_fields(0), sort_keys=True)
+        # Keys are sorted, so "data" / "merkle_root" always come before "nonce" and the last
+        # occurrence of the marker is the block's own nonce field.
+        marker = '"nonce": '
+        position = block_string.rindex(marker + "0") + len(marker)
+        return block_string[:position].encode(), block_string[position + 1:].encode(), "ascii"
+
+    def proof_target(self, difficulty):
+        """
+        Numeric Proof of Work bound: the hash, read as a 256-bit integer, must be below it.
+        Version 3 blocks carry their own target; older blocks use the chain's fixed
+        difficulty in leading hex zeros. None means no work is required.
+        """
+        if self.bits is not None:
+            return encoding.bits_to_target(self.bits)
+        return 1 << (256 - 4 * difficulty) if difficulty > 0 else None
+
+    def mine_block(self, difficulty, miner=None):
         """
         Mines a new block by finding a hash that meets the difficulty criteria.
-        A simple Proof of Work implementation.
+        A simple Proof of Work implementation; the search itself is delegated to a
+        miner from blockchain.mining (serial by default). Returns its MiningResult.
+        """
+        result = (miner or SerialMiner()).mine(self, difficulty)
+        logger.debug("Block mined: %s", self.hash)
+        return result
+
+    def events(self):
+        """
+        Returns the supply chain events stored in this block as a list.
+        Batched blocks hold a list of events, older blocks a single event dict and the
+        genesis block a plain string (no events).
         """
-        target = '0' * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-        print(f"Block mined: {self.hash}")
+        if isinstance(self.data, list):
+            return self.data
+        if isinstance(self.data, dict):
+            return [self.data]
+        return []
+
+    def has_valid_merkle_root(self):
+        """Checks that the stored Merkle root matches the block's events (trivially true without one)."""
+        return self.merkle_root is None or self.merkle_root == compute_merkle_root(self.events())
+
+    def to_dict(self):
+        """Returns the block as a plain dict (used for storage and export)."""
+        return {
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "data": self.data,
+            "previous_hash": self.previous_hash,
+            "hash": self.hash,
+            "nonce": self.nonce,
+            "merkle_root": self.merkle_root,
+            "version": self.version,
+            "bits": self.bits
+        }
+
+    @classmethod
+    def from_dict(cls, block_dict):
+        """Rebuilds a block from to_dict() output without recomputing its hash."""
+        return cls(
+            index=block_dict["index"],
+            timestamp=block_dict["timestamp"],
+            data=block_dict["data"],
+            previous_hash=block_dict["previous_hash"],
+            nonce=block_dict["nonce"],
+            block_hash=block_dict["hash"],
+            merkle_root=block_dict.get("merkle_root"),
+            # Blocks stored before versioning are JSON era
+            version=block_dict.get("version", encoding.JSON_VERSION),
+            bits=block_dict.get("bits")
+        )
 
 
 class Blockchain:
-    def __init__(self, difficulty=2): # Difficulty for Proof of Work
-        self.chain = [self.create_genesis_block()]
+    def __init__(self, difficulty=2, store=None, miner=None, metrics=None, schedule=None): # Difficulty for Proof of Work
+        # `store` is an optional persistent backend (see blockchain.storage.BlockStore).
+        # It behaves like a list of blocks, so the rest of the class does not care
+        # whether the chain lives in memory or on disk.
+        if store is None:
+            self.chain = [self.create_genesis_block()]
+        else:
+            self.chain = store
+            if len(self.chain) == 0:
+                self.chain.append(self.create_genesis_block())
         self.difficulty = difficulty
-        self.pending_transactions = [] # In a more complex system, these would be actual transactions
+        # Optional blockchain.difficulty.DifficultySchedule: new blocks then record a target
+        # retargeted toward a block interval instead of using the fixed difficulty
+        self.schedule = schedule
+        # Proof of Work engine, see blockchain.mining.get_miner() for the available ones
+        self.miner = miner or SerialMiner()
+        self.pending_transactions = [] # Events waiting to be sealed into the next block
+        self._lock = threading.RLock() # Serializes mining + appending of blocks
+        self._pending_lock = threading.Lock()
+        # Validation checkpoint: everything up to this height has been verified. A reopened
+        # block store has already checked its tail and every block was checked before it
+        # was written, so the persisted tip is trusted; use a full audit to re-verify it all.
+        latest_block = self.get_latest_block()
+        self._verified_height = latest_block.index
+        self._verified_hash = latest_block.hash
+        # Secondary index (product_id, event_type, actor, location -> event positions).
+        # For a reopened chain it fills up lazily on first lookup or via warm_index().
+        self.index = EventIndex()
+        # Callables run with each newly committed block (e.g. to keep off-chain copies in sync)
+        self._commit_listeners = []
+        # Callables run with a height when the blocks from that height on were replaced by a fork
+        self._rollback_listeners = []
+        # Optional sink for timings, any object with observe(name, value) (see backend.metrics)
+        self.metrics = metrics
+
+    def add_commit_listener(self, listener):
+        """Registers `listener(block)`, called after every block appended to the chain."""
+        self._commit_listeners.append(listener)
+
+    def add_rollback_listener(self, listener):
+        """Registers `listener(height)`, called when blocks at index >= height were dropped by replace_chain()."""
+        self._rollback_listeners.append(listener)
+
+    def _notify(self, listeners, value, description):
+        for listener in listeners:
+            try:
+                listener(value)
+            except Exception as e:
+                # The chain changed either way; listeners are expected to catch up later
+                logger.error("%s listener %r failed: %s", description, listener, e)
 
     def create_genesis_block(self):
         """Creates the first block in the blockchain."""
-        return Block(0, time.time(), "Genesis Block - Supply Chain Start", "0")
+        return Block(0, GENESIS_TIMESTAMP, "Genesis Block - Supply Chain Start", encoding.NULL_HASH)
 
     def get_latest_block(self):
         """Returns the most recent block in the chain."""
         return self.chain[-1]
 
+    def iter_blocks(self, start=0, stop=None):
+        """Yields blocks start..stop-1 without materializing the chain (works for in-memory and stored chains)."""
+        if hasattr(self.chain, "iter_from"):
+            return self.chain.iter_from(start, stop)
+        return itertools.islice(self.chain, start, stop)
+
     def add_block(self, new_data):
         """
         Mines and adds a new block to the chain containing the new_data.
         For simplicity, new_data here will be a supply chain event.
         """
-        latest_block = self.get_latest_block()
-        new_block = Block(
-            index=latest_block.index + 1,
-            timestamp=time.time(),
-            data=new_data,
-            previous_hash=latest_block.hash
-        )
-        new_block.mine_block(self.difficulty)
-        self.chain.append(new_block)
-        print(f"New block added: {new_block.hash} with data: {new_data}")
+        with self._lock:
+            latest_block = self.get_latest_block()
+            if self.schedule is None:
+                new_block = Block(
+                    index=latest_block.index + 1,
+                    timestamp=time.time(),
+                    data=new_data,
+                    previous_hash=latest_block.hash
+                )
+            else:
+                new_block = Block(
+                    index=latest_block.index + 1,
+                    # Retargeting measures block times, so they never run backwards
+                    timestamp=max(time.time(), latest_block.timestamp),
+                    data=new_data,
+                    previous_hash=latest_block.hash,
+                    version=encoding.TARGET_VERSION,
+                    bits=self.next_bits()
+                )
+            mining = new_block.mine_block(self.difficulty, miner=self.miner)
+            commit_started = time.perf_counter()
+            self.chain.append(new_block)
+            self.index.add_block(new_block)
+            commit_seconds = time.perf_counter() - commit_started
+        logger.debug("New block added: %s with %d event(s)", new_block.hash, len(new_block.events()))
+        if self.metrics is not None:
+            self.metrics.observe("blockchain_mining_seconds", mining.elapsed)
+            self.metrics.observe("blockchain_mining_nonces", mining.attempts)
+            self.metrics.observe("blockchain_commit_seconds", commit_seconds)
+        self._notify(self._commit_listeners, new_block, "Commit")
         return new_block
 
-    def is_chain_valid(self):
-        """Validates the integrity of the blockchain."""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
+    def extend_chain(self, blocks):
+        """
+        Appends blocks mined elsewhere (e.g. received from a peer) on top of the current tip.
+        Every block is checked like is_chain_valid() does before anything is appended;
+        raises ValueError if one does not fit. Returns the number of blocks appended.
+        """
+        with self._lock:
+            self._check_blocks(blocks, self.get_latest_block())
+            self._append_verified(blocks)
+        for block in blocks:
+            self._notify(self._commit_listeners, block, "Commit")
+        return len(blocks)
 
-            # Check if the stored hash is correct
-            if current_block.hash != current_block.calculate_hash():
-                print(f"Data integrity compromised at block {current_block.index}.")
-                return False
+    def replace_chain(self, fork_height, blocks):
+        """
+        Longest-chain rule: replaces the blocks after `fork_height` with `blocks` (which must
+        build on block `fork_height`) if the result is valid and longer than the current chain.
+        Raises ValueError otherwise. Returns the dropped blocks, oldest first.
+        """
+        with self._lock:
+            if fork_height + len(blocks) + 1 <= len(self.chain):
+                raise ValueError(f"Fork at {fork_height} with {len(blocks)} block(s) is not longer than the chain.")
+            self._check_blocks(blocks, self.chain[fork_height])
+            dropped = list(self.iter_blocks(fork_height + 1))
+            if isinstance(self.chain, list):
+                del self.chain[fork_height + 1:]
+            else:
+                self.chain.truncate(fork_height + 1)
+            self.index.truncate(fork_height + 1)
+            if self._verified_height > fork_height:
+                self.set_checkpoint(fork_height, self.chain[fork_height].hash)
+            self._append_verified(blocks)
+        if dropped:
+            self._notify(self._rollback_listeners, fork_height + 1, "Rollback")
+        for block in blocks:
+            self._notify(self._commit_listeners, block, "Commit")
+        return dropped
 
-            # Check if the previous hash matches
-            if current_block.previous_hash != previous_block.hash:
-                print(f"Chain broken at block {current_block.index}: previous hash mismatch.")
-                return False
+    def _check_blocks(self, blocks, previous_block):
+        fork_height = previous_block.index
+
+        def block_at(height):
+            # Retarget windows may reach back from the new blocks into the current chain
+            return blocks[height - fork_height - 1] if height > fork_height else self.chain[height]
+
+        latest_allowed = time.time() + MAX_CLOCK_DRIFT_SECONDS
+        for block in blocks:
+            problem = check_block(block, previous_block.hash, self.difficulty)
+            if problem is None and block.index != previous_block.index + 1:
+                problem = f"Unexpected block height {block.index} after {previous_block.index}."
+            if problem is None and self.schedule is not None:
+                problem = self.schedule.check(block, previous_block, block_at)
+                if problem is None and block.bits is not None and block.timestamp > latest_allowed:
+                    problem = f"Block {block.index} is dated in the future."
+            if problem:
+                raise ValueError(problem)
+            previous_block = block
+
+    def _append_verified(self, blocks):
+        """Appends already checked blocks; the checkpoint moves with them if it was at the tip."""
+        tip_verified = self._verified_height == len(self.chain) - 1
+        for block in blocks:
+            self.chain.append(block)
+            self.index.add_block(block)
+        if blocks and tip_verified:
+            self.set_checkpoint(blocks[-1].index, blocks[-1].hash)
+
+    def add_transaction(self, transaction):
+        """Queues an event for the next block. Returns the number of pending events."""
+        with self._pending_lock:
+            self.pending_transactions.append(transaction)
+            return len(self.pending_transactions)
+
+    def take_pending_transactions(self, max_count=None):
+        """Removes and returns up to max_count pending events (all of them by default), oldest first."""
+        with self._pending_lock:
+            if max_count is None or max_count >= len(self.pending_transactions):
+                taken, self.pending_transactions = self.pending_transactions, []
+            else:
+                taken = self.pending_transactions[:max_count]
+                del self.pending_transactions[:max_count]
+            return taken
+
+    def mine_pending_transactions(self, max_count=None):
+        """Seals the pending events into a single mined block. Returns None if nothing was pending."""
+        transactions = self.take_pending_transactions(max_count)
+        if not transactions:
+            return None
+        return self.add_block(transactions)
+
+    def next_bits(self):
+        """Compact Proof of Work target of the next block, or None with a fixed difficulty."""
+        if self.schedule is None:
+            return None
+        return self.schedule.next_bits(self.get_latest_block(), self.chain.__getitem__)
+
+    def warm_index(self):
+        """Indexes every block not yet covered by the secondary index (e.g. after a restart)."""
+        return self.index.catch_up(self.chain)
+
+    def find_events(self, field, value, since=None, until=None):
+        """
+        Returns [(block, position, event)] for events whose `field` equals `value`, in chain
+        order, optionally limited to event times within [since, until] (epoch seconds).
+        Only the blocks holding matching events are read.
+        """
+        self.warm_index()
+        results = []
+        block = None
+        for block_index, position, _event_time in self.index.lookup(field, value, since, until):
+            if block is None or block.index != block_index:
+                block = self.chain[block_index]
+            results.append((block, position, block.events()[position]))
+        return results
+
+    def is_chain_valid(self, full=False):
+        """
+        Validates the integrity of the blockchain.
+
+        Blocks up to the last verified checkpoint (height + hash) are not rehashed again, so
+        routine checks only cover blocks added since the previous call. `full=True` rescans
+        from genesis; see blockchain.validation.audit_chain for a parallel full audit.
+        """
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                length = len(self.chain)
+                start = 1
+                if not full and self._verified_height < length:
+                    # The checkpoint only holds if the block it points at was not replaced
+                    if self.chain[self._verified_height].hash == self._verified_hash:
+                        start = self._verified_height + 1
 
-            # Check if the block's hash meets the difficulty criteria (for mined blocks)
-            if self.difficulty > 0 and current_block.hash[:self.difficulty] != '0' * self.difficulty:
-                # Genesis block might not adhere if difficulty is applied post-creation and is > 0
-                if current_block.index > 0 : # Skip genesis for this PoW check if it wasn't mined with current difficulty
-                    print(f"Proof of Work invalid for block {current_block.index}.")
+            previous_block = self.chain[start - 1]
+            for i in range(start, length):
+                current_block = self.chain[i]
+                problem = check_block(current_block, previous_block.hash, self.difficulty)
+                if problem is None and self.schedule is not None:
+                    problem = self.schedule.check(current_block, previous_block, self.chain.__getitem__)
+                if problem:
+                    logger.warning("Chain validation failed: %s", problem)
                     return False
+                previous_block = current_block
+        except CorruptBlockError as e:
+            # A stored block that cannot be read makes the chain invalid, like a bad hash
+            logger.warning("Chain validation failed: %s", e)
+            return False
+        self.set_checkpoint(length - 1, previous_block.hash)
+        if self.metrics is not None:
+            self.metrics.observe("blockchain_validation_seconds", time.perf_counter() - started)
+            self.metrics.observe("blockchain_validated_blocks", length - start)
+        return True
+
+    def set_checkpoint(self, height, block_hash):
+        """Records that every block up to `height` (whose hash is `block_hash`) has been verified."""
+        with self._lock:
+            self._verified_height = height
+            self._verified_hash = block_hash
+
+    @property
+    def verified_height(self):
+        return self._verified_height
+
+    def signed_snapshot(self, key):
+        """Returns the validation checkpoint as a signed (height, hash) snapshot (see blockchain.snapshot)."""
+        with self._lock:
+            return snapshot.sign(self._verified_height, self._verified_hash, key)
+
+    def restore_checkpoint(self, signed, key):
+        """
+        Starts validation from a signed snapshot instead of from genesis.
+        The snapshot is only accepted if its signature is valid and the chain still holds a
+        block with the signed hash at the signed height. Returns True if it was restored.
+        """
+        if not snapshot.verify(signed, key):
+            return False
+        height = int(signed["height"])
+        with self._lock:
+            if height >= len(self.chain) or self.chain[height].hash != signed["hash"]:
+                return False
+            self.set_checkpoint(height, signed["hash"])
         return True
 
+
+def check_block(current_block, previous_hash, difficulty):
+    """
+    Checks one block against the hash of the block before it.
+    Returns a description of the problem, or None if the block is valid.
+    """
+    # Check if the stored hash is correct
+    if current_block.hash != current_block.calculate_hash():
+        return f"Data integrity compromised at block {current_block.index}."
+
+    # Check that the events still match the Merkle root the hash commits to
+    if not current_block.has_valid_merkle_root():
+        return f"Merkle root mismatch at block {current_block.index}."
+
+    # Check if the previous hash matches
+    if current_block.previous_hash != previous_hash:
+        return f"Chain broken at block {current_block.index}: previous hash mismatch."
+
+    # Check if the block's hash is below its Proof of Work target (for mined blocks).
+    # The genesis block is not mined.
+    target = current_block.proof_target(difficulty)
+    if target is not None and current_block.index > 0:
+        if current_block.bits is not None and target > MAX_TARGET:
+            return f"Proof of Work target too easy at block {current_block.index}."
+        if int(current_block.hash, 16) >= target:
+            return f"Proof of Work invalid for block {current_block.index}."
+    return None
+
 # Example Usage (can be removed or moved to a test file later)
 if __name__ == "__main__":
     supply_chain_bc = Blockchain(difficulty=3)
@@ -102,14 +483,7 @@ if __name__ == "__main__":
 
     print("\nBlockchain content:")
     for block in supply_chain_bc.chain:
-        print(json.dumps({
-            "index": block.index,
-            "timestamp": block.timestamp,
-            "data": block.data,
-            "previous_hash": block.previous_hash,
-            "hash": block.hash,
-            "nonce": block.nonce
-        }, indent=2))
+        print(json.dumps(block.to_dict(), indent=2))
 
     # # Example of tampering (uncomment to test immutability)
     # if len(supply_chain_bc.chain) > 1:
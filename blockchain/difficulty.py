@@ -0,0 +1,74 @@
+"""
+Adaptive Proof of Work difficulty.
+
+A fixed difficulty counts leading hex zeros, so it can only move in 16x steps. With a
+DifficultySchedule every new block records a numeric 256-bit target in its header (block
+version 3, see blockchain.encoding) and a hash is valid when it is below that target.
+Every `retarget_blocks` blocks the target is scaled by how long the last window of blocks
+actually took compared to `block_seconds` per block (at most `max_adjustment` times per
+step), so block times converge on the configured interval.
+
+The schedule is a pure function of the chain (previous target and block timestamps), so
+any node can recompute the target in force at every height and reject blocks that claim
+an easier one. Nodes sharing a ledger must use the same schedule parameters.
+
+The schedule can be switched off and on again: blocks without a target (mined at the
+fixed difficulty meanwhile) stay valid, and the first adaptive block after them starts
+over from the initial target.
+"""
+import math
+
+from .encoding import bits_to_target, target_to_bits, timestamp_us
+
+# The easiest target an adaptive chain may use: difficulty 1 (one leading hex zero)
+MAX_TARGET = 1 << 252
+# How far ahead of the local clock a block received from a peer may be dated
+MAX_CLOCK_DRIFT_SECONDS = 300
+
+
+def target_for_difficulty(difficulty):
+    """The target equivalent to `difficulty` leading hex zeros (capped at MAX_TARGET)."""
+    return min(1 << (256 - 4 * difficulty), MAX_TARGET) if difficulty > 0 else MAX_TARGET
+
+
+def difficulty_of(target):
+    """The target expressed in (fractional) leading hex zeros, for display."""
+    return (256 - math.log2(target)) / 4
+
+
+class DifficultySchedule:
+    def __init__(self, block_seconds, retarget_blocks=16, initial_target=MAX_TARGET, max_adjustment=4):
+        self.block_seconds = block_seconds
+        self.retarget_blocks = max(1, retarget_blocks)
+        # Rounded to what a header can hold, so the first adaptive block records it exactly
+        self.initial_bits = target_to_bits(min(initial_target, MAX_TARGET))
+        self.max_adjustment = max_adjustment
+
+    def next_bits(self, previous_block, block_at):
+        """
+        Compact target of the block after `previous_block`. `block_at(height)` returns an
+        earlier block of the same chain; it is only called at retarget heights.
+        """
+        if previous_block.bits is None:
+            return self.initial_bits  # First block of the chain, or first since fixed difficulty
+        height = previous_block.index + 1
+        if height % self.retarget_blocks or height <= self.retarget_blocks:
+            return previous_block.bits
+        window_start = block_at(height - 1 - self.retarget_blocks)
+        expected = self.retarget_blocks * round(self.block_seconds * 1_000_000)
+        actual = timestamp_us(previous_block.timestamp) - timestamp_us(window_start.timestamp)
+        actual = min(max(actual, expected // self.max_adjustment), expected * self.max_adjustment)
+        target = bits_to_target(previous_block.bits) * actual // max(1, expected)
+        return target_to_bits(min(max(target, 1), MAX_TARGET))
+
+    def check(self, block, previous_block, block_at):
+        """Returns a description of the problem if `block` does not follow the schedule, else None."""
+        if block.bits is None:
+            # Mined with the schedule switched off: held to the fixed difficulty instead, like
+            # the blocks from before it was first switched on
+            return None
+        if block.timestamp < previous_block.timestamp:
+            return f"Block {block.index} is dated before the block it follows."
+        if block.bits != self.next_bits(previous_block, block_at):
+            return f"Unexpected Proof of Work target at block {block.index}."
+        return None
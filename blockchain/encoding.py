@@ -0,0 +1,166 @@
+"""
+Canonical binary encoding of blocks.
+
+Version 1 blocks (the JSON era) are hashed as sha256(json.dumps(fields, sort_keys=True)),
+which depends on JSON float formatting and re-encodes the whole payload per nonce.
+Version 2 blocks are hashed over a fixed-width binary header instead:
+
+    version      u8
+    index        u64
+    timestamp    i64   microseconds since the epoch
+    previous     32 bytes (previous block hash)
+    body digest  32 bytes (Merkle root of the events, or sha256 of an opaque body)
+    nonce        u64   last, so miners hash a constant 81-byte prefix plus 8 nonce bytes
+
+Version 3 blocks (adaptive difficulty, see blockchain.difficulty) insert their Proof of
+Work target as a u32 `bits` field between the body digest and the nonce, so the target
+is committed to by the hash it constrains. `bits` packs a 256-bit target as a 24-bit
+mantissa and a shift: target = (bits & 0xFFFFFF) << (bits >> 24).
+
+All integers are big endian. The body is stored after the header:
+
+    kind u8 = BODY_EVENTS, count u32, then per event: length u32 + canonical event bytes
+    kind u8 = BODY_OPAQUE, length u32 + canonical JSON of the data (e.g. the genesis text)
+
+Stored records of version 1 blocks stay JSON (they start with "{"), so both eras can be
+read and verified side by side.
+"""
+import hashlib
+import json
+import struct
+
+from .merkle import encode_event
+
+JSON_VERSION = 1
+BINARY_VERSION = 2
+TARGET_VERSION = 3
+CURRENT_VERSION = BINARY_VERSION
+
+HEADER = struct.Struct(">BQq32s32sQ")
+TARGET_HEADER = struct.Struct(">BQq32s32sIQ")
+NONCE = struct.Struct(">Q")
+LENGTH = struct.Struct(">I")
+
+BODY_EVENTS = 1
+BODY_OPAQUE = 2
+
+# Version 2 genesis blocks have no predecessor; this is their previous_hash.
+NULL_HASH = "0" * 64
+
+# json.loads(bytes) sniffs the text encoding on every call; bodies are always UTF-8
+_json_decode = json.JSONDecoder().decode
+
+
+def timestamp_us(timestamp):
+    """
+    Fixed-width representation of a float epoch timestamp. Microseconds stay below 2**53,
+    so us -> float -> us round-trips exactly (nanoseconds would not).
+    """
+    return round(timestamp * 1_000_000)
+
+
+def target_to_bits(target):
+    """Compact form of a target, rounded down to its 24 most significant bits."""
+    shift = max(0, target.bit_length() - 24)
+    return (shift << 24) | (target >> shift)
+
+
+def bits_to_target(bits):
+    return (bits & 0xFFFFFF) << (bits >> 24)
+
+
+def encode_body(data):
+    if isinstance(data, list):
+        parts = [bytes([BODY_EVENTS]), LENGTH.pack(len(data))]
+        for event in data:
+            encoded = encode_event(event)
+            parts.append(LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+    encoded = encode_event(data)
+    return bytes([BODY_OPAQUE]) + LENGTH.pack(len(encoded)) + encoded
+
+
+def decode_body(body):
+    """Returns (data, number of bytes consumed)."""
+    kind = body[0]
+    if kind == BODY_EVENTS:
+        (count,) = LENGTH.unpack_from(body, 1)
+        position = 1 + LENGTH.size
+        events = []
+        for _ in range(count):
+            (length,) = LENGTH.unpack_from(body, position)
+            position += LENGTH.size
+            events.append(_json_decode(body[position:position + length].decode()))
+            position += length
+        return events, position
+    if kind == BODY_OPAQUE:
+        (length,) = LENGTH.unpack_from(body, 1)
+        start = 1 + LENGTH.size
+        return _json_decode(body[start:start + length].decode()), start + length
+    raise ValueError(f"Unknown block body kind {kind}")
+
+
+def body_digest(block):
+    """
+    The 32-byte commitment to the block's data that goes into the header. Version 2 event
+    lists always carry a Merkle root (see Block.__init__); other bodies are hashed whole.
+    """
+    if block.merkle_root is not None:
+        return bytes.fromhex(block.merkle_root)
+    return hashlib.sha256(encode_body(block.data)).digest()
+
+
+def encode_header(block, nonce=None):
+    fields = (
+        block.version,
+        block.index,
+        timestamp_us(block.timestamp),
+        bytes.fromhex(block.previous_hash),
+        body_digest(block)
+    )
+    nonce = block.nonce if nonce is None else nonce
+    if block.version >= TARGET_VERSION:
+        return TARGET_HEADER.pack(*fields, block.bits, nonce)
+    return HEADER.pack(*fields, nonce)
+
+
+def header_hash(block):
+    return hashlib.sha256(encode_header(block)).hexdigest()
+
+
+def header_template(block):
+    """The header without its trailing nonce: the constant part hashed once per mining run."""
+    return encode_header(block, nonce=0)[:-NONCE.size]
+
+
+def encode_block(block):
+    """Storage encoding of a binary (version 2 or 3) block: header followed by the body."""
+    return encode_header(block) + encode_body(block.data)
+
+
+def decode_block(payload, block_class):
+    """Inverse of encode_block(). The hash is taken from the stored header, not recomputed from the body."""
+    version = payload[0]
+    if version == BINARY_VERSION:
+        header = payload[:HEADER.size]
+        version, index, ts_us, previous, digest, nonce = HEADER.unpack(header)
+        bits = None
+    elif version == TARGET_VERSION:
+        header = payload[:TARGET_HEADER.size]
+        version, index, ts_us, previous, digest, bits, nonce = TARGET_HEADER.unpack(header)
+    else:
+        raise ValueError(f"Unsupported block version {version}")
+    data, _consumed = decode_body(payload[len(header):])
+    return block_class(
+        index=index,
+        timestamp=ts_us / 1_000_000,
+        data=data,
+        previous_hash=previous.hex(),
+        nonce=nonce,
+        block_hash=hashlib.sha256(header).hexdigest(),
+        merkle_root=digest.hex() if isinstance(data, list) else None,
+        version=version,
+        bits=bits
+    )
+
@@ -0,0 +1,100 @@
+import datetime
+import threading
+from collections import defaultdict
+
+# Event fields that can be looked up through the index
+INDEXED_FIELDS = ("product_id", "event_type", "actor", "location")
+
+
+def event_time(event, block):
+    """Event timestamp as epoch seconds; falls back to the block's timestamp."""
+    value = event.get("timestamp")
+    if isinstance(value, str):
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return block.timestamp
+        if parsed.tzinfo is None:
+            # Events are stamped with utcnow() by the API
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed.timestamp()
+    return block.timestamp
+
+
+class EventIndex:
+    """
+    Secondary index over the events in a chain: field value -> postings of
+    (block index, position in block, event time), kept in chain order.
+
+    The index remembers how many blocks it has covered. Blocks are added as they are
+    committed (add_block) and catch_up() indexes whatever it has not seen yet, so an
+    index for a reopened chain is built lazily on first use or warmed up in the background.
+    """
+
+    def __init__(self, fields=INDEXED_FIELDS):
+        self.fields = fields
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._postings = {field: defaultdict(list) for field in self.fields}
+            self.indexed_height = 0  # Number of blocks (from genesis) covered by the index
+
+    def add_block(self, block):
+        """Indexes a freshly committed block. Out-of-order blocks are left to catch_up()."""
+        with self._lock:
+            if block.index != self.indexed_height:
+                return
+            for position, event in enumerate(block.events()):
+                if not isinstance(event, dict):
+                    continue
+                posting = (block.index, position, event_time(event, block))
+                for field in self.fields:
+                    value = event.get(field)
+                    if value is not None:
+                        self._postings[field][value].append(posting)
+            self.indexed_height = block.index + 1
+
+    def truncate(self, height):
+        """Forgets the postings of blocks at index >= height (e.g. after a fork replaced them)."""
+        with self._lock:
+            for postings in self._postings.values():
+                for value in list(postings):
+                    entries = postings[value]
+                    # Postings are in chain order, so the dropped ones are at the end
+                    while entries and entries[-1][0] >= height:
+                        entries.pop()
+                    if not entries:
+                        del postings[value]
+            self.indexed_height = min(self.indexed_height, height)
+
+    def catch_up(self, chain):
+        """Indexes the blocks of `chain` that are not covered yet. Returns the number indexed."""
+        with self._lock:
+            start = self.indexed_height
+            for index in range(start, len(chain)):
+                self.add_block(chain[index])
+            return self.indexed_height - start
+
+    def rebuild(self, chain):
+        with self._lock:
+            self.reset()
+            self.catch_up(chain)
+
+    def is_warm(self, chain):
+        return self.indexed_height >= len(chain)
+
+    def lookup(self, field, value, since=None, until=None):
+        """
+        Postings for events whose `field` equals `value`, optionally limited to event times
+        within [since, until] (epoch seconds). Cost is proportional to the matches for `value`.
+        """
+        with self._lock:
+            postings = list(self._postings[field].get(value, ()))
+        if since is None and until is None:
+            return postings
+        return [
+            posting for posting in postings
+            if (since is None or posting[2] >= since) and (until is None or posting[2] <= until)
+        ]
@@ -0,0 +1,256 @@
+"""
+One writer, many readers: a ledger shared by the processes of one host.
+
+Under `uvicorn --workers N` every worker imports the API. If each opened its own
+Blockchain, appends from different workers would fork the ledger. Instead one process runs
+a LedgerServer. It owns the Blockchain and its BlockStore, and every append goes through
+it, so appends are serialized by the chain's lock. Workers use a LedgerBlockchain: it
+sends appends to the server over a Unix socket (framed like blockchain.node) and reads
+committed blocks straight from the store's files through a BlockStoreView, with no locks
+and no round trips, so reads scale with the number of workers:
+
+    {"type": "append", "data": ...}   -> {"index", "hash"} of the block holding `data`
+    {"type": "status"}                -> {"height", "hash", "verified_height", "node"}
+
+When the server replaces blocks (a longer fork won, see blockchain.node), the store bumps
+a truncation counter; a worker notices it on its next index refresh and rolls back its
+secondary index before catching up again.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from .core import Blockchain
+from .node import PeerError, receive_frame, send_frame
+from .storage import BlockStoreView, CorruptBlockError
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerError(Exception):
+    """Raised when the ledger service cannot be reached or rejects a request."""
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections.add(self.request)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.connections.discard(self.request)
+        super().finish()
+
+    def handle(self):
+        ledger = self.server.ledger
+        while True:
+            try:
+                frame = receive_frame(self.rfile)
+            except (PeerError, OSError):
+                return
+            if frame is None:
+                return
+            try:
+                reply = ledger._handle(json.loads(frame))
+            except Exception as e:
+                # Reported to the worker; the connection stays usable
+                logger.warning("Ledger request failed: %s", e)
+                reply = {"error": str(e)}
+            try:
+                send_frame(self.request, json.dumps(reply).encode())
+            except OSError:
+                return
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, ledger):
+        super().__init__(path, _RequestHandler)
+        self.ledger = ledger
+        self.lock = threading.Lock()
+        self.connections = set()  # Client sockets, closed by LedgerServer.stop()
+
+
+class LedgerServer:
+    """Serves appends to `blockchain` (the single writer) on the Unix socket at `path`."""
+
+    def __init__(self, blockchain, path, node=None):
+        self.blockchain = blockchain
+        self.path = path
+        self.node = node  # Replication node of the writer, reported by "status"
+        self._server = None
+        self._thread = None
+
+    def _handle(self, message):
+        kind = message.get("type")
+        if kind == "append":
+            block = self.blockchain.add_block(message["data"])
+            return {"index": block.index, "hash": block.hash}
+        if kind == "status":
+            tip = self.blockchain.get_latest_block()
+            return {"height": tip.index, "hash": tip.hash, "verified_height": self.blockchain.verified_height,
+                    "node": self.node.stats() if self.node is not None else None}
+        raise ValueError(f"Unknown message type {kind!r}")
+
+    def start(self):
+        """Starts serving. Returns the socket path. Raises LedgerError if another server is live there."""
+        if os.path.exists(self.path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.path)
+            except OSError:
+                os.remove(self.path)  # Left behind by a server that did not shut down cleanly
+            else:
+                raise LedgerError(f"A ledger service is already listening on {self.path}.")
+        self._server = _Server(self.path, self)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ledger-server", daemon=True)
+        self._thread.start()
+        return self.path
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            with self._server.lock:
+                for connection in self._server.connections:
+                    try:
+                        connection.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+            self._server = None
+            self._thread.join()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class LedgerClient:
+    """One connection to a LedgerServer, shared by the threads of a worker."""
+
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket = None
+        self._stream = None
+
+    def _connect(self):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        try:
+            self._socket.connect(self.path)
+        except OSError as e:
+            self._socket.close()
+            self._socket = None
+            raise LedgerError(f"Cannot reach the ledger service at {self.path}: {e}") from e
+        self._stream = self._socket.makefile("rb")
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._stream.close()
+            self._socket.close()
+            self._socket = self._stream = None
+
+    def call(self, message):
+        payload = json.dumps(message).encode()
+        with self._lock:
+            # One retry on a fresh connection: the service may have been restarted
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    send_frame(self._socket, payload)
+                    reply = receive_frame(self._stream)
+                    if reply is None:
+                        raise PeerError("Connection closed by the ledger service.")
+                    break
+                except (OSError, PeerError) as e:
+                    self._disconnect()
+                    if attempt:
+                        raise LedgerError(f"Ledger service at {self.path}: {e}") from e
+        reply = json.loads(reply)
+        if "error" in reply:
+            raise LedgerError(f"Ledger service: {reply['error']}")
+        return reply
+
+    def append(self, data):
+        return self.call({"type": "append", "data": data})
+
+    def status(self):
+        return self.call({"type": "status"})
+
+    def wait_ready(self, timeout):
+        """Polls the service until it answers (e.g. while it starts next to the workers)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.status()
+            except LedgerError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class LedgerBlockchain(Blockchain):
+    """
+    A worker's handle on a ledger owned by a LedgerServer: reads come from the block store
+    at `data_dir` through a BlockStoreView, appends go to the service at `socket_path`.
+    """
+
+    def __init__(self, data_dir, socket_path, difficulty=2, schedule=None, metrics=None, connect_timeout=60.0):
+        self.client = LedgerClient(socket_path)
+        # The service creates the store (and its genesis block); wait for it before reading
+        self.client.wait_ready(connect_timeout)
+        view = BlockStoreView(data_dir)
+        self._generation = view.generation()[0]
+        self._refresh_lock = threading.Lock()
+        super().__init__(difficulty=difficulty, store=view, schedule=schedule, metrics=metrics)
+
+    def add_block(self, new_data):
+        """Has the ledger service mine and append a block holding `new_data`; returns the block."""
+        started = time.perf_counter()
+        reply = self.client.append(new_data)
+        block = self.chain[reply["index"]]
+        if self.metrics is not None:
+            self.metrics.observe("blockchain_commit_seconds", time.perf_counter() - started)
+        self._notify(self._commit_listeners, block, "Commit")
+        return block
+
+    def extend_chain(self, blocks):
+        raise TypeError("Blocks from peers are appended by the ledger service.")
+
+    def replace_chain(self, fork_height, blocks):
+        raise TypeError("Forks are resolved by the ledger service.")
+
+    def warm_index(self):
+        """
+        Indexes blocks committed by any process since the last call. If the service dropped
+        blocks in the meantime, their postings are removed first.
+        """
+        with self._refresh_lock:
+            while True:
+                generation, length = self.chain.generation()
+                if generation % 2:
+                    time.sleep(0.001)  # Truncation in progress
+                    continue
+                if generation != self._generation:
+                    # One truncation since the last refresh: it tells where; more: start over
+                    height = length if generation == self._generation + 2 else 0
+                    self.index.truncate(height)
+                    self._generation = generation
+                    self._notify(self._rollback_listeners, height, "Rollback")
+                try:
+                    added = self.index.catch_up(self.chain)
+                except CorruptBlockError:
+                    continue  # Read a block while it was being replaced
+                if self.chain.generation()[0] == generation:
+                    return added
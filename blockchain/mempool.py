@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class Receipt:
+    """
+    Tracks one submitted event from "pending" to "sealed" (or "failed"). Front ends that
+    buffer events before they reach the mempool register them as "queued" first.
+    """
+
+    def __init__(self, event, status="pending"):
+        self.receipt_id = uuid.uuid4().hex
+        self.event = event
+        self.status = status
+        self.submitted_at = time.time()
+        self.sealed_at = None
+        self.block_index = None
+        self.block_hash = None
+        self.position = None  # Position of the event inside its block
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "receipt_id": self.receipt_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "sealed_at": self.sealed_at,
+            "block_index": self.block_index,
+            "block_hash": self.block_hash,
+            "position": self.position,
+            "error": self.error
+        }
+
+
+class Mempool:
+    """
+    Collects events in Blockchain.pending_transactions and seals them into one mined block
+    when `max_batch` events are waiting or the oldest one has waited `max_wait` seconds,
+    whichever comes first. Sealing happens on a background thread started with start().
+    """
+
+    def __init__(self, blockchain, max_batch=500, max_wait=2.0, max_receipts=100_000):
+        self.blockchain = blockchain
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.max_receipts = max_receipts
+
+        self._receipts = OrderedDict()  # receipt_id -> Receipt, oldest first
+        self._pending = []  # Receipts of the events in blockchain.pending_transactions, same order
+        self._first_pending_at = None
+        self._condition = threading.Condition()
+        self._seal_lock = threading.Lock()  # Keeps blocks in submission order
+        self._thread = None
+        self._stopping = False
+
+    def submit(self, event, receipt=None):
+        """
+        Queues an event and returns its pending Receipt immediately. An existing receipt
+        (see track()) can be passed in to carry on with it instead of issuing a new one.
+        """
+        if receipt is None:
+            receipt = Receipt(event)
+        with self._condition:
+            self.blockchain.add_transaction(event)
+            receipt.status = "pending"
+            self._pending.append(receipt)
+            self._remember(receipt)
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return receipt
+
+    def track(self, receipt):
+        """Registers a receipt so it can be looked up before its event reaches the mempool."""
+        with self._condition:
+            self._remember(receipt)
+
+    def _remember(self, receipt):
+        self._receipts[receipt.receipt_id] = receipt
+        while len(self._receipts) > self.max_receipts:
+            self._receipts.popitem(last=False)
+
+    def get_receipt(self, receipt_id):
+        with self._condition:
+            return self._receipts.get(receipt_id)
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def seal(self):
+        """Mines the pending events (up to max_batch) into one block right away. Returns the block or None."""
+        with self._seal_lock:
+            with self._condition:
+                count = min(len(self._pending), self.max_batch)
+                if not count:
+                    return None
+                receipts = self._pending[:count]
+                del self._pending[:count]
+                events = self.blockchain.take_pending_transactions(count)
+                self._first_pending_at = time.monotonic() if self._pending else None
+            try:
+                block = self.blockchain.add_block(events)
+            except Exception as e:
+                for receipt in receipts:
+                    receipt.status = "failed"
+                    receipt.error = str(e)
+                raise
+            sealed_at = time.time()
+            for position, receipt in enumerate(receipts):
+                receipt.block_index = block.index
+                receipt.block_hash = block.hash
+                receipt.position = position
+                receipt.sealed_at = sealed_at
+                receipt.status = "sealed"
+            return block
+
+    def _should_seal(self):
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_batch or self._stopping:
+            return True
+        return time.monotonic() - self._first_pending_at >= self.max_wait
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._should_seal():
+                    if self._stopping:
+                        return
+                    timeout = None
+                    if self._first_pending_at is not None:
+                        timeout = max(0.0, self._first_pending_at + self.max_wait - time.monotonic())
+                    self._condition.wait(timeout)
+            try:
+                self.seal()
+            except Exception as e:
+                logger.error("Mempool: failed to seal block: %s", e)
+
+    def start(self):
+        """Starts the background sealing thread (no-op if already running)."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="mempool-sealer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Seals whatever is still pending and stops the background thread."""
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        while self.seal() is not None:
+            pass
@@ -0,0 +1,84 @@
+"""
+Merkle trees over the events of a block.
+
+Leaves are sha256(0x00 || canonical event bytes) and inner nodes sha256(0x01 || left || right),
+so a leaf can never be passed off as an inner node. When a level has an odd number of
+nodes the last one is carried up unchanged (no duplication), which keeps proofs unique.
+"""
+import hashlib
+import json
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+
+
+def encode_event(event):
+    """Canonical byte encoding of one event (sorted keys, no whitespace)."""
+    return json.dumps(event, sort_keys=True, separators=(",", ":")).encode()
+
+
+def leaf_hash(event):
+    return hashlib.sha256(LEAF_PREFIX + encode_event(event)).digest()
+
+
+def build_tree(events):
+    """
+    Builds every level of the tree in one pass, leaves first and root last.
+    Each level is a list of 32-byte digests.
+    """
+    sha256 = hashlib.sha256
+    level = [sha256(LEAF_PREFIX + encode_event(event)).digest() for event in events]
+    levels = [level]
+    while len(level) > 1:
+        parents = [sha256(NODE_PREFIX + left + right).digest()
+                   for left, right in zip(level[0::2], level[1::2])]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+        level = parents
+    return levels
+
+
+def tree_root(levels):
+    """Hex root of a tree returned by build_tree()."""
+    if not levels[0]:
+        return EMPTY_ROOT
+    return levels[-1][0].hex()
+
+
+def merkle_root(events):
+    return tree_root(build_tree(events))
+
+
+def inclusion_proof(levels, position):
+    """
+    Returns the audit path of the leaf at `position` as a list of (sibling hex, side) pairs,
+    side being "left" or "right" depending on where the sibling sits. O(log n) entries.
+    """
+    if not 0 <= position < len(levels[0]):
+        raise IndexError(f"No event at position {position}")
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append((level[sibling].hex(), "left" if sibling < position else "right"))
+        position //= 2
+    return proof
+
+
+def inclusion_proofs(levels, positions):
+    """Proofs for several leaves of the same tree, keyed by position."""
+    return {position: inclusion_proof(levels, position) for position in positions}
+
+
+def verify_proof(event, proof, root):
+    """Checks that `event` is included under the hex Merkle `root` using an inclusion_proof()."""
+    node = leaf_hash(event)
+    for sibling_hex, side in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        if side == "left":
+            node = hashlib.sha256(NODE_PREFIX + sibling + node).digest()
+        else:
+            node = hashlib.sha256(NODE_PREFIX + node + sibling).digest()
+    return node.hex() == root
@@ -0,0 +1,204 @@
+"""
+Proof of Work engines.
+
+Every miner hashes a pre-serialized copy of the block (see Block.hash_template): the
+SHA-256 state of the constant prefix is computed once and only the nonce bytes and the
+short suffix are hashed per try. For binary (version 2 and 3) headers the nonce is the 8-byte
+tail of the header; JSON-era blocks encode it as decimal digits. A hash meets its Proof of Work
+target (see Block.proof_target) when its 32-byte digest is numerically below the target, which
+is a plain bytes comparison of big-endian values.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+# How many nonces a worker tries between two checks of the shared stop flag
+CHECK_EVERY = 4096
+
+MiningResult = namedtuple("MiningResult", ["nonce", "hash", "attempts", "elapsed"])
+
+
+def _search(prefix, suffix, target, start, step, stop_event, nonce_format="u64"):
+    """
+    Tries nonces start, start + step, ... until a digest is below target or stop_event is set.
+    Returns (nonce or None, number of attempts).
+    """
+    base = hashlib.sha256(prefix)
+    nonce = start
+    attempts = 0
+    binary = nonce_format == "u64"
+    while True:
+        if binary:
+            for tried in range(1, CHECK_EVERY + 1):
+                h = base.copy()
+                h.update(nonce.to_bytes(8, "big"))
+                if h.digest() < target:
+                    return nonce, attempts + tried
+                nonce += step
+        else:
+            for tried in range(1, CHECK_EVERY + 1):
+                h = base.copy()
+                h.update(b"%d%s" % (nonce, suffix))
+                if h.digest() < target:
+                    return nonce, attempts + tried
+                nonce += step
+        attempts += CHECK_EVERY
+        if stop_event is not None and stop_event.is_set():
+            return None, attempts
+
+
+class Miner:
+    """Base class of the Proof of Work engines used by Blockchain.add_block."""
+    name = "base"
+    workers = 1
+
+    def mine(self, block, difficulty):
+        """Finds a valid nonce for `block`, updates block.nonce / block.hash and returns a MiningResult."""
+        started = time.perf_counter()
+        target = block.proof_target(difficulty)
+        target = None if target is None else target.to_bytes(32, "big")
+        block.hash = block.calculate_hash()
+        if target is None or block.hash < target.hex():
+            return MiningResult(block.nonce, block.hash, 1, time.perf_counter() - started)
+        prefix, suffix, nonce_format = block.hash_template()
+        nonce, attempts = self._search(prefix, suffix, nonce_format, target, block.nonce + 1)
+        block.nonce = nonce
+        block.hash = block.calculate_hash()
+        return MiningResult(nonce, block.hash, attempts + 1, time.perf_counter() - started)
+
+    def _search(self, prefix, suffix, nonce_format, target, start):
+        raise NotImplementedError
+
+    def close(self):
+        """Releases worker threads/processes, if any."""
+
+
+class SerialMiner(Miner):
+    """Single-threaded search in the calling thread."""
+    name = "serial"
+
+    def _search(self, prefix, suffix, nonce_format, target, start):
+        return _search(prefix, suffix, target, start, 1, None, nonce_format)
+
+
+class _PoolMiner(Miner):
+    """Splits the nonce space across `workers` executors by striding: worker k tries start+k, start+k+workers, ..."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()  # One search at a time per pool
+        self._executor = None
+
+    def _create_executor(self):
+        raise NotImplementedError
+
+    def _submit(self, prefix, suffix, nonce_format, target, start, step):
+        raise NotImplementedError
+
+    def _search(self, prefix, suffix, nonce_format, target, start):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            self._stop_event.clear()
+            pending = {
+                self._submit(prefix, suffix, nonce_format, target, start + k, self.workers)
+                for k in range(self.workers)
+            }
+            found = None
+            total_attempts = 0
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        nonce, attempts = future.result()
+                        total_attempts += attempts
+                        if nonce is not None and (found is None or nonce < found):
+                            found = nonce
+                    if found is not None:
+                        self._stop_event.set()  # Cancel the other workers
+            finally:
+                # Also when a worker raised: the others would otherwise hash forever
+                self._stop_event.set()
+            return found, total_attempts
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+class ThreadedMiner(_PoolMiner):
+    """
+    Thread pool miner. hashlib only releases the GIL for large buffers, so this mostly
+    helps on interpreters without a GIL; ProcessMiner is the one that scales on CPython.
+    """
+    name = "thread"
+
+    def __init__(self, workers=None):
+        super().__init__(workers)
+        self._stop_event = threading.Event()
+
+    def _create_executor(self):
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="miner")
+
+    def _submit(self, prefix, suffix, nonce_format, target, start, step):
+        return self._executor.submit(_search, prefix, suffix, target, start, step,
+                                     self._stop_event, nonce_format)
+
+
+# Set in each pool process by _init_process_worker
+_process_stop_event = None
+
+
+def _init_process_worker(stop_event):
+    global _process_stop_event
+    _process_stop_event = stop_event
+
+
+def _process_search(prefix, suffix, nonce_format, target, start, step):
+    return _search(prefix, suffix, target, start, step, _process_stop_event, nonce_format)
+
+
+class ProcessMiner(_PoolMiner):
+    """Process pool miner: one worker per core, cancelled through a shared Event as soon as one hits."""
+    name = "process"
+
+    def __init__(self, workers=None):
+        super().__init__(workers)
+        self._context = multiprocessing.get_context()
+        self._stop_event = self._context.Event()
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_process_worker,
+            initargs=(self._stop_event,)
+        )
+
+    def _submit(self, prefix, suffix, nonce_format, target, start, step):
+        return self._executor.submit(_process_search, prefix, suffix, nonce_format, target, start, step)
+
+
+MINERS = {
+    SerialMiner.name: SerialMiner,
+    ThreadedMiner.name: ThreadedMiner,
+    ProcessMiner.name: ProcessMiner,
+}
+
+
+def get_miner(kind="serial", workers=None):
+    """Builds a miner by name: "serial", "thread" or "process"."""
+    try:
+        miner_class = MINERS[kind]
+    except KeyError as exc:
+        raise ValueError(f"Unknown miner '{kind}', expected one of {sorted(MINERS)}") from exc
+    if miner_class is SerialMiner:
+        return SerialMiner()
+    return miner_class(workers=workers or None)
@@ -0,0 +1,477 @@
+"""
+Replication of one ledger across several processes or hosts.
+
+Every Node serves its chain over TCP and keeps a list of peers. Messages are frames of a
+u32 length (big endian) followed by the payload; requests and replies are JSON, blocks
+travel in their storage encoding (see blockchain.storage.encode_record):
+
+    {"type": "status"}                         -> {"node", "height", "hash"}
+    {"type": "hashes", "heights": [h, ...]}    -> {"hashes": [hash or null, ...]} (at most MAX_HASHES_PER_REQUEST)
+    {"type": "blocks", "start": s, "stop": e}  -> one frame per block, then an empty frame
+    {"type": "announce", "node": "host:port"}  -> {"ok": true}; the receiver syncs from it
+
+After committing blocks a node announces its new tip to its peers. Syncing from a peer
+finds the highest common block (one round trip when the peer just extends our chain,
+a binary search otherwise), downloads the missing range in batches and adopts it if the
+peer's chain is longer and every downloaded block is valid (longest valid chain wins).
+A competing branch is held in memory until it is checked, so forks deeper than
+MAX_FORK_LENGTH blocks are refused rather than downloaded.
+Peers are also polled every `sync_interval` seconds, so nodes converge after a partition.
+
+Announcements are not authenticated. A node that announces itself without being a
+configured peer is only remembered as a learned peer. At most `max_learned_peers` are
+kept, the least recently heard from being dropped first, and each is forgotten
+`learned_peer_ttl` seconds after its last announcement (max_learned_peers=0: only
+configured peers are listened to).
+"""
+import json
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from .merkle import encode_event
+from .storage import CorruptBlockError, decode_record, encode_record
+
+logger = logging.getLogger(__name__)
+
+FRAME_LENGTH = struct.Struct(">I")
+# Upper bound on the blocks served by one "blocks" request
+MAX_BLOCKS_PER_REQUEST = 5000
+# Upper bound on the heights of one "hashes" request (a sync asks for about log2(height))
+MAX_HASHES_PER_REQUEST = 256
+# Longest competing branch a node downloads to resolve a fork
+MAX_FORK_LENGTH = 10_000
+
+
+class PeerError(Exception):
+    """Raised when a peer cannot be reached or answers with something unexpected."""
+
+
+def send_frame(sock, payload):
+    """Sends `payload` as one frame. The framing is shared with blockchain.ledger."""
+    sock.sendall(FRAME_LENGTH.pack(len(payload)) + payload)
+
+
+def _receive_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise PeerError("Connection closed in the middle of a frame.")
+    return data
+
+
+def receive_frame(stream):
+    """Returns the next frame, or None if the connection was closed between frames."""
+    header = stream.read(FRAME_LENGTH.size)
+    if not header:
+        return None
+    if len(header) != FRAME_LENGTH.size:
+        raise PeerError("Connection closed in the middle of a frame.")
+    (length,) = FRAME_LENGTH.unpack(header)
+    return _receive_exactly(stream, length) if length else b""
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class PeerConnection:
+    """Client side of the protocol: one connection, any number of requests."""
+
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        try:
+            self._socket = socket.create_connection(parse_address(address), timeout=timeout)
+        except OSError as e:
+            raise PeerError(f"Cannot reach peer {address}: {e}") from e
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._socket.makefile("rb")
+
+    def _request(self, message):
+        try:
+            send_frame(self._socket, json.dumps(message).encode())
+        except OSError as e:
+            raise PeerError(f"Peer {self.address}: {e}") from e
+
+    def call(self, message):
+        self._request(message)
+        try:
+            reply = receive_frame(self._stream)
+        except OSError as e:
+            raise PeerError(f"Peer {self.address}: {e}") from e
+        if reply is None:
+            raise PeerError(f"Peer {self.address} closed the connection.")
+        reply = json.loads(reply)
+        if "error" in reply:
+            raise PeerError(f"Peer {self.address}: {reply['error']}")
+        return reply
+
+    def status(self):
+        return self.call({"type": "status"})
+
+    def hashes(self, heights):
+        return self.call({"type": "hashes", "heights": list(heights)})["hashes"]
+
+    def blocks(self, start, stop):
+        """Yields the peer's blocks start..stop-1 (fewer if its chain is shorter)."""
+        self._request({"type": "blocks", "start": start, "stop": stop})
+        remaining = stop - start
+        try:
+            while True:
+                frame = receive_frame(self._stream)
+                if frame is None:
+                    raise PeerError(f"Peer {self.address} closed the connection.")
+                if not frame:
+                    return
+                if remaining <= 0:
+                    raise PeerError(f"Peer {self.address} sent more blocks than requested.")
+                remaining -= 1
+                yield decode_record(frame)
+        except OSError as e:
+            raise PeerError(f"Peer {self.address}: {e}") from e
+
+    def close(self):
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        node = self.server.node
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                frame = receive_frame(self.rfile)
+            except (PeerError, OSError):
+                return
+            if frame is None:
+                return
+            try:
+                message = json.loads(frame)
+                if message.get("type") == "blocks":
+                    node._send_blocks(self.request, int(message["start"]), int(message["stop"]))
+                    continue
+                reply = node._handle(message)
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"error": str(e)}
+            except OSError:
+                return
+            send_frame(self.request, json.dumps(reply).encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Node:
+    def __init__(self, blockchain, host="127.0.0.1", port=0, peers=(), sync_batch=500,
+                 sync_interval=5.0, timeout=10.0, on_orphaned=None, max_learned_peers=16,
+                 learned_peer_ttl=600.0):
+        self.blockchain = blockchain
+        self.host = host
+        self.port = port
+        self.sync_batch = max(1, min(sync_batch, MAX_BLOCKS_PER_REQUEST))
+        self.sync_interval = sync_interval
+        self.timeout = timeout
+        # Called with the events of dropped fork blocks that the adopted chain does not hold
+        self.on_orphaned = on_orphaned
+
+        self._peers = set(peers)  # Configured peers
+        self.max_learned_peers = max(0, max_learned_peers)
+        self.learned_peer_ttl = learned_peer_ttl
+        self._learned_peers = OrderedDict()  # address -> monotonic time of its last announcement
+        self._lock = threading.Condition()
+        self._sync_requested = set()  # Peers that announced a new tip
+        self._announce_pending = False
+        self._sync_lock = threading.Lock()  # One sync at a time
+        self._server = None
+        self._threads = []
+        self._stopping = False
+        self._stats = {
+            "syncs": 0, "blocks_received": 0, "forks_resolved": 0,
+            "blocks_dropped": 0, "sync_errors": 0, "last_sync_at": None,
+        }
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    # --- Peers ---
+    def peers(self):
+        """Configured peers plus the learned ones that have not expired."""
+        with self._lock:
+            self._expire_learned_peers()
+            return sorted(self._peers.union(self._learned_peers))
+
+    def _expire_learned_peers(self):
+        cutoff = time.monotonic() - self.learned_peer_ttl
+        while self._learned_peers and next(iter(self._learned_peers.values())) < cutoff:
+            self._sync_requested.discard(self._learned_peers.popitem(last=False)[0])
+
+    def _learn_peer(self, address):
+        """Records an announcing node; returns False if it is not listened to. Call with the lock held."""
+        if address in self._peers:
+            return True
+        if not self.max_learned_peers or address == self.address:
+            return False
+        try:
+            _host, port = parse_address(address)
+        except ValueError:
+            return False
+        if not 0 < port < 65536:
+            return False
+        self._learned_peers[address] = time.monotonic()
+        self._learned_peers.move_to_end(address)
+        while len(self._learned_peers) > self.max_learned_peers:
+            # Least recently heard from
+            self._sync_requested.discard(self._learned_peers.popitem(last=False)[0])
+        return True
+
+    def add_peer(self, address):
+        with self._lock:
+            if address != self.address:
+                self._peers.add(address)
+                self._sync_requested.add(address)
+                self._lock.notify_all()
+
+    def remove_peer(self, address):
+        with self._lock:
+            self._peers.discard(address)
+            self._learned_peers.pop(address, None)
+            self._sync_requested.discard(address)
+
+    # --- Server side ---
+    def _handle(self, message):
+        kind = message.get("type")
+        if kind == "status":
+            tip = self.blockchain.get_latest_block()
+            return {"node": self.address, "height": tip.index, "hash": tip.hash}
+        if kind == "hashes":
+            heights = message["heights"]
+            if not isinstance(heights, list) or len(heights) > MAX_HASHES_PER_REQUEST:
+                raise ValueError(f"'heights' must be a list of at most {MAX_HASHES_PER_REQUEST} heights")
+            chain = self.blockchain.chain
+            length = len(chain)
+            return {"hashes": [chain[h].hash if 0 <= h < length else None for h in heights]}
+        if kind == "announce":
+            peer = message["node"]
+            with self._lock:
+                # Announcing nodes become (learned) peers, so links work both ways
+                if not isinstance(peer, str) or not self._learn_peer(peer):
+                    return {"ok": False}
+                self._sync_requested.add(peer)
+                self._lock.notify_all()
+            return {"ok": True}
+        raise ValueError(f"Unknown message type {kind!r}")
+
+    def _send_blocks(self, sock, start, stop):
+        stop = min(stop, start + MAX_BLOCKS_PER_REQUEST)
+        frames = []
+        for block in self.blockchain.iter_blocks(max(0, start), stop):
+            payload = encode_record(block)
+            frames.append(FRAME_LENGTH.pack(len(payload)))
+            frames.append(payload)
+            if len(frames) >= 512:
+                sock.sendall(b"".join(frames))
+                frames = []
+        frames.append(FRAME_LENGTH.pack(0))
+        sock.sendall(b"".join(frames))
+
+    # --- Client side ---
+    def _common_height(self, peer, peer_height):
+        """Highest height at which our chain and the peer's hold the same block, or None if even genesis differs."""
+        chain = self.blockchain.chain
+        top = min(len(chain) - 1, peer_height)
+        # Probe the top, then exponentially further back: usually the first probe matches
+        probes = []
+        step = 1
+        height = top
+        while height > 0:
+            probes.append(height)
+            height = top - step
+            step *= 2
+        probes.append(0)
+        hashes = peer.hashes(probes)
+        mismatch = None
+        for height, peer_hash in zip(probes, hashes):
+            if peer_hash == chain[height].hash:
+                break
+            mismatch = height
+        else:
+            return None
+        # Hashes commit to the whole prefix: binary search between the match and the last mismatch
+        low, high = height, (mismatch if mismatch is not None else height + 1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if peer.hashes([middle])[0] == chain[middle].hash:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def sync_from(self, address):
+        """
+        Catches up with one peer. Returns the number of blocks adopted (0 if the peer's
+        chain is not longer than ours). Raises PeerError or ValueError on failure, or
+        CorruptBlockError if the peer sends an undecodable block.
+        """
+        with self._sync_lock, PeerConnection(address, self.timeout) as peer:
+            status = peer.status()
+            peer_height = status.get("height") if isinstance(status, dict) else None
+            if not isinstance(peer_height, int):
+                raise ValueError(f"Peer {address} sent a malformed status: {status!r}")
+            if peer_height <= self.blockchain.get_latest_block().index:
+                return 0
+            fork_height = self._common_height(peer, peer_height)
+            if fork_height is None:
+                raise ValueError(f"Peer {address} has a different genesis block.")
+
+            adopted = 0
+            if fork_height == self.blockchain.get_latest_block().index:
+                # Plain catch-up: append batch by batch as the blocks arrive
+                for start in range(fork_height + 1, peer_height + 1, self.sync_batch):
+                    blocks = list(peer.blocks(start, min(start + self.sync_batch, peer_height + 1)))
+                    if not blocks:
+                        break
+                    adopted += self.blockchain.extend_chain(blocks)
+                    self._count("blocks_received", len(blocks))
+            else:
+                # Fork: the whole branch must be downloaded and checked before switching to it
+                if peer_height - fork_height > MAX_FORK_LENGTH:
+                    raise ValueError(f"Peer {address} forked {peer_height - fork_height} blocks back, "
+                                     f"more than the {MAX_FORK_LENGTH} a node resolves.")
+                blocks = []
+                for start in range(fork_height + 1, peer_height + 1, self.sync_batch):
+                    batch = list(peer.blocks(start, min(start + self.sync_batch, peer_height + 1)))
+                    if not batch:
+                        break
+                    blocks.extend(batch)
+                self._count("blocks_received", len(blocks))
+                dropped = self.blockchain.replace_chain(fork_height, blocks)
+                adopted = len(blocks)
+                self._count("forks_resolved", 1)
+                self._count("blocks_dropped", len(dropped))
+                self._reinject(dropped, blocks)
+            self._count("syncs", 1)
+            with self._lock:
+                self._stats["last_sync_at"] = time.time()
+            return adopted
+
+    def _reinject(self, dropped, adopted):
+        """Hands the events of dropped blocks that did not make it into the adopted branch to on_orphaned."""
+        if not dropped or self.on_orphaned is None:
+            return
+        kept = {encode_event(event) for block in adopted for event in block.events()}
+        orphaned = [event for block in dropped for event in block.events()
+                    if isinstance(event, dict) and encode_event(event) not in kept]
+        if orphaned:
+            self.on_orphaned(orphaned)
+
+    def sync_all(self):
+        """Syncs from every peer; unreachable peers are skipped. Returns the number of blocks adopted."""
+        adopted = 0
+        for address in self.peers():
+            adopted += self._try_sync(address)
+        return adopted
+
+    def _try_sync(self, address):
+        try:
+            return self.sync_from(address)
+        except (PeerError, ValueError, CorruptBlockError, KeyError, TypeError) as e:
+            # Whatever a peer sends, the sync thread keeps running for the other peers
+            self._count("sync_errors", 1)
+            logger.warning("Node %s: sync from %s failed: %s", self.address, address, e)
+            return 0
+
+    def announce(self):
+        """Tells every peer about our tip; peers with a shorter chain then sync from us."""
+        for address in self.peers():
+            try:
+                with PeerConnection(address, self.timeout) as peer:
+                    peer.call({"type": "announce", "node": self.address})
+            except PeerError:
+                pass  # Unreachable peers catch up through polling once they are back
+
+    def _on_commit(self, _block):
+        # Coalesced: a burst of blocks (e.g. a catch-up) results in one announcement
+        with self._lock:
+            self._announce_pending = True
+            self._lock.notify_all()
+
+    def _count(self, name, amount):
+        with self._lock:
+            self._stats[name] += amount
+
+    # --- Background threads ---
+    def _sync_loop(self):
+        next_poll = time.monotonic() + self.sync_interval
+        while True:
+            with self._lock:
+                while not self._stopping and not self._sync_requested and time.monotonic() < next_poll:
+                    self._lock.wait(max(0.0, next_poll - time.monotonic()))
+                if self._stopping:
+                    return
+                requested, self._sync_requested = self._sync_requested, set()
+            if requested:
+                for address in sorted(requested):
+                    self._try_sync(address)
+            else:
+                self.sync_all()
+                next_poll = time.monotonic() + self.sync_interval
+
+    def _announce_loop(self):
+        while True:
+            with self._lock:
+                while not self._stopping and not self._announce_pending:
+                    self._lock.wait()
+                if self._stopping:
+                    return
+                self._announce_pending = False
+            self.announce()
+
+    def start(self):
+        """Starts serving, announcing and polling. Returns the address the node listens on."""
+        self._server = _Server((self.host, self.port), _RequestHandler)
+        self._server.node = self
+        self.port = self._server.server_address[1]
+        self._stopping = False
+        self.blockchain.add_commit_listener(self._on_commit)
+        for target, name in ((self._server.serve_forever, "server"),
+                             (self._sync_loop, "sync"), (self._announce_loop, "announce")):
+            thread = threading.Thread(target=target, name=f"node-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        with self._lock:
+            self._sync_requested.update(self._peers)  # Catch up right away
+            self._lock.notify_all()
+        return self.address
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._lock.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=self.timeout)
+        self._threads = []
+
+    def stats(self):
+        tip = self.blockchain.get_latest_block()
+        with self._lock:
+            self._expire_learned_peers()
+            return {"node": self.address, "height": tip.index, "hash": tip.hash,
+                    "peers": sorted(self._peers.union(self._learned_peers)), **self._stats}
@@ -0,0 +1,427 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from . import encoding
+from .core import Block, CorruptBlockError
+
+logger = logging.getLogger(__name__)
+
+# Every block is written to the active segment as a small header followed by its payload.
+# Header: payload length, CRC32 of the payload (both unsigned 32-bit, little endian).
+RECORD_HEADER = struct.Struct("<II")
+# The index file is a flat array of fixed-size entries, entry N describing block N:
+# segment number, byte offset inside that segment, total record length (header included).
+INDEX_ENTRY = struct.Struct("<IQI")
+
+INDEX_FILE_NAME = "blocks.idx"
+SEGMENT_FILE_TEMPLATE = "segment-{:08d}.log"
+# Tells readers in other processes (BlockStoreView) that blocks were dropped: a truncation
+# counter and the new length. The counter is odd while a truncation is in progress.
+GENERATION_FILE_NAME = "blocks.gen"
+GENERATION = struct.Struct("<QQ")
+
+
+def encode_record(block):
+    """Storage payload of a block: binary blocks in their canonical encoding, JSON-era blocks as JSON."""
+    if block.version >= encoding.BINARY_VERSION:
+        return encoding.encode_block(block)
+    return json.dumps(block.to_dict(), separators=(",", ":")).encode()
+
+
+def unpack_record(record, index):
+    """Checks a stored record (header + payload) and returns its payload."""
+    if len(record) < RECORD_HEADER.size:
+        raise CorruptBlockError(f"Record for block {index} is truncated.")
+    payload_length, checksum = RECORD_HEADER.unpack_from(record)
+    payload = record[RECORD_HEADER.size:]
+    if payload_length != len(payload) or zlib.crc32(payload) != checksum:
+        raise CorruptBlockError(f"Checksum mismatch for block {index}.")
+    return payload
+
+
+def decode_record(payload):
+    try:
+        if payload[:1] == b"{":
+            return Block.from_dict(json.loads(payload))
+        return encoding.decode_block(payload, Block)
+    except (ValueError, KeyError, TypeError, IndexError, struct.error) as exc:
+        raise CorruptBlockError(f"Undecodable block record: {exc}") from exc
+
+
+class BlockStore:
+    """
+    Durable, append-only storage for the blocks of a Blockchain.
+
+    Blocks are appended to segment log files and located through a compact index file
+    that maps block index -> (segment, offset, length). The store behaves like a list of
+    Block objects (len(), indexing, iteration, append), so it can be handed to
+    Blockchain(store=...) in place of the in-memory list.
+
+    Opening an existing store only reads the index size and verifies the last
+    `verify_tail` blocks, so restart time does not grow with the chain length.
+    Writes are made durable with fsync every `sync_every` appends or every
+    `sync_interval` seconds (0 = no time trigger), whichever comes first. Up to
+    `sync_every` blocks may be torn by a crash, so at least that many are verified on
+    reopen. With the default sync_every=1 an
+    append is only acknowledged once it is on disk, so a crash can at most lose the
+    block that was being written.
+    """
+
+    def __init__(self, path, sync_every=1, sync_interval=0.0,
+                 segment_size=64 * 1024 * 1024, verify_tail=8, cache_size=256):
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        self.segment_size = segment_size
+        # Every block that may not have reached the disk is re-verified on reopen
+        self.verify_tail = max(1, verify_tail, self.sync_every)
+        self.cache_size = cache_size
+
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()  # block index -> Block, most recently used last
+        self._segment_fds = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(path, exist_ok=True)
+        self._index_fd = os.open(os.path.join(path, INDEX_FILE_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        self._generation_fd = os.open(os.path.join(path, GENERATION_FILE_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        raw = os.pread(self._generation_fd, GENERATION.size, 0)
+        self._generation = GENERATION.unpack(raw)[0] if len(raw) == GENERATION.size else 0
+        self._generation += self._generation % 2  # Interrupted in the middle of a truncation
+
+        index_size = os.fstat(self._index_fd).st_size
+        self._length = index_size // INDEX_ENTRY.size
+        if index_size % INDEX_ENTRY.size:
+            # A crash in the middle of writing an index entry: drop the partial entry.
+            os.ftruncate(self._index_fd, self._length * INDEX_ENTRY.size)
+
+        self._recover()
+
+    # --- Recovery ---
+    def _recover(self):
+        """Verifies the tail of the log and rolls forward records missing from the index."""
+        tail_start = max(0, self._length - self.verify_tail)
+        previous_block = self._read_block(tail_start - 1) if tail_start > 0 else None
+        for index in range(tail_start, self._length):
+            try:
+                block = self._read_block(index)
+            except CorruptBlockError:
+                block = None
+            if block is None or not self._links_to(block, previous_block):
+                logger.warning("Block store: discarding damaged tail starting at block %d.", index)
+                self._publish_truncation(index, in_progress=True)
+                self._truncate_index(index)
+                break
+            previous_block = block
+
+        # Records written to the segment whose index entry never made it to disk.
+        if self._length:
+            segment, offset, length = self._read_index_entry(self._length - 1)
+            position = offset + length
+        else:
+            segment, position = 0, 0
+        while True:
+            position = self._roll_forward(segment, position)
+            next_segment = segment + 1
+            if not os.path.exists(self._segment_path(next_segment)):
+                break
+            segment, position = next_segment, 0
+        self._active_segment = segment
+        self._active_end = position
+        self._sync()
+        self._publish_truncation(self._length, in_progress=False)
+
+    def _roll_forward(self, segment, position):
+        """Re-indexes complete records after `position` and cuts off anything torn."""
+        fd = self._segment_fd(segment)
+        end = os.fstat(fd).st_size
+        previous_block = self[self._length - 1] if self._length else None
+        while position + RECORD_HEADER.size <= end:
+            payload_length, checksum = RECORD_HEADER.unpack(os.pread(fd, RECORD_HEADER.size, position))
+            payload = os.pread(fd, payload_length, position + RECORD_HEADER.size)
+            if len(payload) != payload_length or zlib.crc32(payload) != checksum:
+                break
+            try:
+                block = decode_record(payload)
+            except CorruptBlockError:
+                break
+            if block.index != self._length or not self._links_to(block, previous_block):
+                break
+            record_length = RECORD_HEADER.size + payload_length
+            self._write_index_entry(self._length, segment, position, record_length)
+            self._length += 1
+            position += record_length
+            previous_block = block
+        if position < end:
+            logger.warning("Block store: truncating %d trailing bytes of segment %d.", end - position, segment)
+            os.ftruncate(fd, position)
+        return position
+
+    @staticmethod
+    def _links_to(block, previous_block):
+        if block.hash != block.calculate_hash() or not block.has_valid_merkle_root():
+            return False
+        if previous_block is None:
+            return block.index == 0
+        return block.index == previous_block.index + 1 and block.previous_hash == previous_block.hash
+
+    def _publish_truncation(self, length, in_progress):
+        """Bumps the truncation counter readers poll: odd before the cut, even once it is done."""
+        if self._generation % 2 != in_progress:
+            self._generation += 1
+        os.pwrite(self._generation_fd, GENERATION.pack(self._generation, length), 0)
+
+    def _truncate_index(self, length):
+        self._length = length
+        os.ftruncate(self._index_fd, length * INDEX_ENTRY.size)
+        for index in [i for i in self._cache if i >= length]:
+            del self._cache[index]
+
+    # --- Low level file access ---
+    def _segment_path(self, segment):
+        return os.path.join(self.path, SEGMENT_FILE_TEMPLATE.format(segment))
+
+    def _segment_fd(self, segment):
+        fd = self._segment_fds.get(segment)
+        if fd is None:
+            fd = os.open(self._segment_path(segment), os.O_RDWR | os.O_CREAT, 0o644)
+            self._segment_fds[segment] = fd
+        return fd
+
+    def _read_index_entry(self, index):
+        raw = os.pread(self._index_fd, INDEX_ENTRY.size, index * INDEX_ENTRY.size)
+        if len(raw) != INDEX_ENTRY.size:
+            raise CorruptBlockError(f"Index entry for block {index} is missing.")
+        return INDEX_ENTRY.unpack(raw)
+
+    def _write_index_entry(self, index, segment, offset, length):
+        os.pwrite(self._index_fd, INDEX_ENTRY.pack(segment, offset, length), index * INDEX_ENTRY.size)
+
+    def _read_payload(self, index):
+        segment, offset, length = self._read_index_entry(index)
+        record = os.pread(self._segment_fd(segment), length, offset)
+        if len(record) != length:
+            raise CorruptBlockError(f"Record for block {index} is truncated.")
+        return unpack_record(record, index)
+
+    def _read_block(self, index):
+        return decode_record(self._read_payload(index))
+
+    def _sync(self):
+        os.fsync(self._segment_fd(self._active_segment))
+        os.fsync(self._index_fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _remember(self, block):
+        self._cache[block.index] = block
+        self._cache.move_to_end(block.index)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- List-like interface used by Blockchain ---
+    def append(self, block):
+        """Appends a block; returns once the write is durable according to the sync policy."""
+        with self._lock:
+            if block.index != self._length:
+                raise ValueError(f"Expected block {self._length}, got block {block.index}.")
+            payload = encode_record(block)
+            record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+            if self._active_end and self._active_end + len(record) > self.segment_size:
+                self._sync()  # Seal the full segment before moving on
+                self._active_segment += 1
+                self._active_end = 0
+
+            # Segment data first, index entry second: an index entry never points at
+            # bytes that were not written, and orphaned records are rolled forward.
+            os.pwrite(self._segment_fd(self._active_segment), record, self._active_end)
+            self._write_index_entry(self._length, self._active_segment, self._active_end, len(record))
+            self._active_end += len(record)
+            self._length += 1
+            self._remember(block)
+
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or (self.sync_interval > 0 and time.monotonic() - self._last_sync >= self.sync_interval)):
+                self._sync()
+
+    def truncate(self, length):
+        """Drops blocks length.. (e.g. blocks replaced by a longer fork). The cut is durable on return."""
+        with self._lock:
+            if length >= self._length:
+                return
+            if length:
+                segment, offset, record_length = self._read_index_entry(length - 1)
+                end = offset + record_length
+            else:
+                segment, end = 0, 0
+            self._publish_truncation(length, in_progress=True)
+            self._truncate_index(length)
+            # Readers in other processes may have the segment holding the new tip memory-mapped,
+            # and touching a mapped page past the end of a file kills the process. So the
+            # segment is not shrunk: new blocks overwrite the dropped records, and a zeroed
+            # record header marks where valid data ends for recovery. Later segments are
+            # deleted (mapped files stay readable until unmapped).
+            fd = self._segment_fd(segment)
+            if os.fstat(fd).st_size > end:
+                os.pwrite(fd, bytes(RECORD_HEADER.size), end)
+            later = segment + 1
+            while os.path.exists(self._segment_path(later)):
+                fd = self._segment_fds.pop(later, None)
+                if fd is not None:
+                    os.close(fd)
+                os.remove(self._segment_path(later))
+                later += 1
+            self._active_segment = segment
+            self._active_end = end
+            self._sync()
+            self._publish_truncation(length, in_progress=False)
+
+    def flush(self):
+        """Forces any batched writes to disk."""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            for fd in self._segment_fds.values():
+                os.close(fd)
+            self._segment_fds.clear()
+            os.close(self._index_fd)
+            os.close(self._generation_fd)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("block index out of range")
+        with self._lock:
+            block = self._cache.get(index)
+            if block is not None:
+                self._cache.move_to_end(index)
+                return block
+        block = self._read_block(index)
+        with self._lock:
+            self._remember(block)
+        return block
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start, stop=None):
+        """Yields blocks start..stop-1 in order. Sequential scans bypass the cache so they do not evict the hot tail."""
+        stop = self._length if stop is None else min(stop, self._length)
+        for index in range(max(0, start), stop):
+            block = self._cache.get(index)
+            yield block if block is not None else self._read_block(index)
+
+
+class BlockStoreView:
+    """
+    Read-only view of a BlockStore that another process writes (see blockchain.ledger).
+
+    Takes no locks: the chain length is the size of the index file, index entries are read
+    with pread and records come from read-only memory maps of the segments, remapped when a
+    segment has grown past its map. The writer adds a record before its index entry and
+    never shrinks a segment in place, so every visible entry points at complete bytes; a
+    record being overwritten after a fork fails its checksum instead of mixing two blocks.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._index_fd = os.open(os.path.join(path, INDEX_FILE_NAME), os.O_RDONLY)
+        self._generation_fd = os.open(os.path.join(path, GENERATION_FILE_NAME), os.O_RDONLY)
+        # segment -> mmap. Maps are replaced, never resized or closed while in use, so a
+        # thread holding an old one can keep reading from it. A truncation may delete and
+        # recreate segments, so all maps are dropped when the truncation counter moves.
+        self._maps = {}
+        self._maps_generation = self.generation()[0]
+        self._tail = None  # (generation, index, block) of the most recently read tip
+
+    def generation(self):
+        """(truncation counter, length after the last truncation); the counter is odd during one."""
+        raw = os.pread(self._generation_fd, GENERATION.size, 0)
+        return GENERATION.unpack(raw) if len(raw) == GENERATION.size else (0, 0)
+
+    def _segment_map(self, segment, end):
+        generation = self.generation()[0]
+        if generation != self._maps_generation:
+            self._maps = {}
+            self._maps_generation = generation
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            try:
+                with open(os.path.join(self.path, SEGMENT_FILE_TEMPLATE.format(segment)), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as exc:  # Missing or empty segment
+                raise CorruptBlockError(f"Segment {segment} is not readable: {exc}") from exc
+            self._maps[segment] = mapped
+        return mapped
+
+    def _read_block(self, index):
+        raw = os.pread(self._index_fd, INDEX_ENTRY.size, index * INDEX_ENTRY.size)
+        if len(raw) != INDEX_ENTRY.size:
+            raise CorruptBlockError(f"Index entry for block {index} is missing.")
+        segment, offset, length = INDEX_ENTRY.unpack(raw)
+        mapped = self._segment_map(segment, offset + length)
+        return decode_record(unpack_record(mapped[offset:offset + length], index))
+
+    # --- List-like interface used by Blockchain ---
+    def __len__(self):
+        return os.fstat(self._index_fd).st_size // INDEX_ENTRY.size
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("block index out of range")
+        if index < length - 1:
+            return self._read_block(index)
+        # The tip is read on most requests; reuse it until the chain grows or is truncated
+        generation = self.generation()[0]
+        tail = self._tail
+        if tail is not None and tail[0] == generation and tail[1] == index:
+            return tail[2]
+        block = self._read_block(index)
+        self._tail = (generation, index, block)
+        return block
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start, stop=None):
+        """Yields blocks start..stop-1 in order."""
+        length = len(self)
+        stop = length if stop is None else min(stop, length)
+        for index in range(max(0, start), stop):
+            yield self._read_block(index)
+
+    def append(self, block):
+        raise TypeError("BlockStoreView is read-only; blocks are appended by the ledger service.")
+
+    def truncate(self, length):
+        raise TypeError("BlockStoreView is read-only; blocks are dropped by the ledger service.")
+
+    def close(self):
+        os.close(self._index_fd)
+        os.close(self._generation_fd)
+        self._maps.clear()
@@ -0,0 +1,226 @@
+"""
+Tiered in-memory chain: recent blocks as objects, older blocks compacted.
+
+TieredChain behaves like the list of blocks a Blockchain normally keeps (len(), indexing,
+slicing, iteration, append), but only the newest blocks stay as Block objects. Once the
+hot tier holds `hot_blocks + segment_blocks` blocks, the oldest `segment_blocks` are
+encoded (see blockchain.storage.encode_record), compressed in frames of `frame_blocks`
+blocks and written to a cold segment file that is memory-mapped read-only. Cold blocks
+then cost a few bytes of Python memory each; reading one decompresses its frame, and a
+few recently decompressed frames are kept.
+
+Cold segments are scratch space, not durability: use BlockStore for a persistent chain.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+from .storage import CorruptBlockError, decode_record, encode_record
+
+# Cold segment layout: header, frame table, frames.
+# Header: magic, first block index, block count, frame count.
+SEGMENT_HEADER = struct.Struct("<4sQII")
+SEGMENT_MAGIC = b"SCTC"
+# Frame table entry: offset of the compressed frame in the file, compressed length.
+FRAME_ENTRY = struct.Struct("<QI")
+# Inside a decompressed frame every block record is length-prefixed.
+RECORD_LENGTH = struct.Struct("<I")
+
+
+class _ColdSegment:
+    def __init__(self, path, first_index, count, frame_blocks, fd, mapped, frames):
+        self.path = path
+        self.first_index = first_index
+        self.count = count
+        self.frame_blocks = frame_blocks
+        self._fd = fd
+        self._mapped = mapped
+        self._frames = frames  # [(offset, length)] into the mapping
+
+    @classmethod
+    def write(cls, path, blocks, frame_blocks, compression_level):
+        frames = []
+        body = []
+        offset = SEGMENT_HEADER.size + FRAME_ENTRY.size * ((len(blocks) + frame_blocks - 1) // frame_blocks)
+        for start in range(0, len(blocks), frame_blocks):
+            records = []
+            for block in blocks[start:start + frame_blocks]:
+                payload = encode_record(block)
+                records.append(RECORD_LENGTH.pack(len(payload)))
+                records.append(payload)
+            compressed = zlib.compress(b"".join(records), compression_level)
+            frames.append((offset, len(compressed)))
+            body.append(compressed)
+            offset += len(compressed)
+
+        with open(path, "wb") as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, blocks[0].index, len(blocks), len(frames)))
+            for frame in frames:
+                f.write(FRAME_ENTRY.pack(*frame))
+            for compressed in body:
+                f.write(compressed)
+        fd = os.open(path, os.O_RDONLY)
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        return cls(path, blocks[0].index, len(blocks), frame_blocks, fd, mapped, frames)
+
+    def read_frame(self, frame):
+        offset, length = self._frames[frame]
+        try:
+            raw = zlib.decompress(self._mapped[offset:offset + length])
+        except zlib.error as exc:
+            raise CorruptBlockError(f"Cold segment {self.path}: frame {frame} is damaged: {exc}") from exc
+        blocks = []
+        position = 0
+        while position < len(raw):
+            (length,) = RECORD_LENGTH.unpack_from(raw, position)
+            position += RECORD_LENGTH.size
+            blocks.append(decode_record(raw[position:position + length]))
+            position += length
+        return blocks
+
+    @property
+    def size(self):
+        return len(self._mapped)
+
+    def close(self):
+        self._mapped.close()
+        os.close(self._fd)
+
+
+class TieredChain:
+    def __init__(self, hot_blocks=1024, segment_blocks=1024, frame_blocks=64, directory=None,
+                 frame_cache_size=8, compression_level=6):
+        self.hot_blocks = max(1, hot_blocks)
+        self.segment_blocks = max(1, segment_blocks)
+        self.frame_blocks = max(1, frame_blocks)
+        self.frame_cache_size = max(1, frame_cache_size)
+        self.compression_level = compression_level
+
+        # Without a directory the segments go to a temporary one, removed on close() or at exit
+        self._temporary_directory = tempfile.TemporaryDirectory(prefix="chain-cold-") if directory is None else None
+        self.directory = directory or self._temporary_directory.name
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._segments = []  # _ColdSegment, oldest first; they cover blocks 0.._hot_start-1
+        self._hot = []  # Block objects from index _hot_start on
+        self._hot_start = 0
+        self._frames = OrderedDict()  # (segment number, frame) -> [Block], most recently used last
+
+    # --- List-like interface used by Blockchain ---
+    def append(self, block):
+        with self._lock:
+            if block.index != len(self):
+                raise ValueError(f"Expected block {len(self)}, got block {block.index}.")
+            self._hot.append(block)
+            if len(self._hot) >= self.hot_blocks + self.segment_blocks:
+                self._compact()
+
+    def __len__(self):
+        return self._hot_start + len(self._hot)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            length = len(self)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError("block index out of range")
+            if index >= self._hot_start:
+                return self._hot[index - self._hot_start]
+            segment_number = index // self.segment_blocks
+            offset = index - self._segments[segment_number].first_index
+            frame = self._frame(segment_number, offset // self.frame_blocks)
+            return frame[offset % self.frame_blocks]
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start, stop=None):
+        """Yields blocks start..stop-1; cold frames are decompressed once each and not cached."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        index = max(0, start)
+        while index < stop:
+            with self._lock:
+                hot_start = self._hot_start
+                if index >= hot_start:
+                    hot = self._hot[index - hot_start:stop - hot_start]
+                    frame = None
+                else:
+                    segment_number = index // self.segment_blocks
+                    segment = self._segments[segment_number]
+                    offset = index - segment.first_index
+                    frame_number = offset // self.frame_blocks
+                    frame = self._frames.get((segment_number, frame_number))
+                    if frame is None:
+                        frame = segment.read_frame(frame_number)
+            if frame is None:
+                yield from hot
+                return
+            skip = offset % self.frame_blocks
+            for block in frame[skip:skip + (stop - index)]:
+                yield block
+                index += 1
+
+    def truncate(self, length):
+        """Drops blocks length.. ; cold segments past the cut are brought back into the hot tier first."""
+        with self._lock:
+            while length < self._hot_start:
+                segment = self._segments.pop()
+                number = len(self._segments)
+                blocks = []
+                for frame in range((segment.count + self.frame_blocks - 1) // self.frame_blocks):
+                    blocks.extend(segment.read_frame(frame))
+                segment.close()
+                os.remove(segment.path)
+                for key in [key for key in self._frames if key[0] == number]:
+                    del self._frames[key]
+                self._hot[:0] = blocks
+                self._hot_start -= len(blocks)
+            del self._hot[max(0, length - self._hot_start):]
+
+    # --- Tiering ---
+    def _compact(self):
+        """Moves the oldest segment_blocks hot blocks into a new cold segment."""
+        blocks = self._hot[:self.segment_blocks]
+        path = os.path.join(self.directory, f"cold-{len(self._segments):08d}.seg")
+        self._segments.append(_ColdSegment.write(path, blocks, self.frame_blocks, self.compression_level))
+        del self._hot[:self.segment_blocks]
+        self._hot_start += len(blocks)
+
+    def _frame(self, segment_number, frame_number):
+        key = (segment_number, frame_number)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._segments[segment_number].read_frame(frame_number)
+            self._frames[key] = frame
+            while len(self._frames) > self.frame_cache_size:
+                self._frames.popitem(last=False)
+        else:
+            self._frames.move_to_end(key)
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hot_blocks": len(self._hot),
+                "cold_blocks": self._hot_start,
+                "cold_segments": len(self._segments),
+                "cold_bytes": sum(segment.size for segment in self._segments),
+                "cached_frames": len(self._frames),
+            }
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments.clear()
+            self._frames.clear()
+            if self._temporary_directory is not None:
+                self._temporary_directory.cleanup()
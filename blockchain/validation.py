@@ -0,0 +1,114 @@
+"""
+Full-chain audit spread over worker processes.
+
+Each block only depends on its own contents and the stored hash of the block before it,
+so the chain can be cut into chunks that are verified independently: a worker checks
+the blocks of its chunk, and the link between two chunks is the stored hash of the last
+block before the chunk, which is handed to the worker with it.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .core import Block, CorruptBlockError, check_block
+
+logger = logging.getLogger(__name__)
+
+
+def _validate_chunk(block_dicts, previous_hash, difficulty):
+    """Checks a run of consecutive blocks. Returns (bad block index, problem) or None."""
+    for block_dict in block_dicts:
+        block = Block.from_dict(block_dict)
+        problem = check_block(block, previous_hash, difficulty)
+        if problem:
+            return block.index, problem
+        previous_hash = block.hash
+    return None
+
+
+def audit_chain(blockchain, workers=None, chunk_size=2000):
+    """
+    Re-verifies every block of `blockchain` from genesis in parallel chunks.
+    Returns (is_valid, problem). On success the blockchain's validation checkpoint is
+    moved to the audited tip, so later incremental checks start from there.
+    """
+    started = time.perf_counter()
+    chain = blockchain.chain
+    length = len(chain)
+    try:
+        tip = chain[length - 1]
+    except CorruptBlockError as e:
+        problem = f"Block {length - 1} is unreadable: {e}"
+        logger.warning("Chain audit failed: %s", problem)
+        return False, problem
+    workers = workers or os.cpu_count() or 1
+    first_problem = None
+    schedule = blockchain.schedule
+    # Found while the chunks are read: an unreadable block or a wrong Proof of Work target
+    read_problem = None
+
+    def chunks():
+        nonlocal read_problem
+        try:
+            previous_block = chain[0]
+        except CorruptBlockError as e:
+            read_problem = (0, f"Block 0 is unreadable: {e}")
+            return
+        for start in range(1, length, chunk_size):
+            blocks = []
+            for i in range(start, min(start + chunk_size, length)):
+                try:
+                    blocks.append(chain[i])
+                except CorruptBlockError as e:
+                    read_problem = (i, f"Block {i} is unreadable: {e}")
+                    break
+            if schedule is not None:
+                # Targets depend on earlier blocks across chunk boundaries, but checking them
+                # is cheap next to hashing, so it is done here while the chunk is read
+                checked = previous_block
+                for position, block in enumerate(blocks):
+                    problem = schedule.check(block, checked, chain.__getitem__)
+                    if problem:
+                        read_problem = (block.index, problem)
+                        del blocks[position:]
+                        break
+                    checked = block
+            if blocks:
+                # Blocks before a problem are still hashed: one of them may be the earliest bad block
+                yield [block.to_dict() for block in blocks], previous_block.hash
+                previous_block = blocks[-1]
+            if read_problem:
+                return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for block_dicts, previous_hash in chunks():
+            # Keep a bounded number of chunks in flight so large chains are not all pickled at once
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                first_problem = _earliest(first_problem, done)
+                if first_problem:
+                    break
+            pending.add(executor.submit(_validate_chunk, block_dicts, previous_hash, blockchain.difficulty))
+        first_problem = _earliest(first_problem, pending)
+    if read_problem and (first_problem is None or read_problem[0] < first_problem[0]):
+        first_problem = read_problem
+
+    if first_problem:
+        logger.warning("Chain audit failed: %s", first_problem[1])
+        return False, first_problem[1]
+    blockchain.set_checkpoint(tip.index, tip.hash)
+    if blockchain.metrics is not None:
+        blockchain.metrics.observe("blockchain_validation_seconds", time.perf_counter() - started)
+        blockchain.metrics.observe("blockchain_validated_blocks", length - 1)
+    return True, None
+
+
+def _earliest(current, futures):
+    """Keeps the problem with the lowest block index among `current` and finished futures."""
+    for future in futures:
+        result = future.result()
+        if result and (current is None or result[0] < current[0]):
+            current = result
+    return current
@@ -348,11 +348,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const recordButton = eventForm.querySelector('button[type="submit"]');
             const originalButtonText = recordButton.textContent;
-            recordButton.textContent = 'Recording... (Mining Block)';
+            recordButton.textContent = 'Recording...';
             recordButton.disabled = true;
             try {
                 const result = await apiRequest('/events/record', 'POST', eventData); // Protected
-                alert(`Event recorded! Block Index: ${result.block_index}, Hash: ${result.block_hash}`);
+                alert(`Event queued for the next block! Receipt: ${result.receipt_id}`);
                 eventForm.reset();
                 if (historyProductIdField && historyOutputDiv && historyProductIdField.value === String(eventData.product_id)) {
                     historyOutputDiv.innerHTML = '<p>Event recorded. Click "View History" again to refresh.</p>';
@@ -383,7 +383,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             <strong>Block #${block.index} (Hash: ${block.hash.substring(0, 10)}...${block.hash.substring(block.hash.length - 10)})</strong><br>
                             Timestamp: ${new Date(block.timestamp * 1000).toLocaleString()}<br>
                             Data: <pre>${JSON.stringify(block.data, null, 2)}</pre>
-                            Prev. Hash: ${block.previous_hash === "0" ? "0 (Genesis)" : block.previous_hash.substring(0, 10)}...<br>
+                            Prev. Hash: ${/^0+$/.test(block.previous_hash) ? "0 (Genesis)" : block.previous_hash.substring(0, 10)}...<br>
                             Nonce: ${block.nonce}
                         </li>`;
                     });
@@ -421,27 +421,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (blockchainChainView) {
                     blockchainChainView.innerHTML = '';
                     if (info.chain && info.chain.length > 0) {
-                        info.chain.forEach(block => {
-                            const blockElement = document.createElement('div');
-                            blockElement.classList.add('block-visual');
-                            blockElement.setAttribute('role', 'button');
-                            blockElement.setAttribute('tabindex', '0');
-                            blockElement.innerHTML = `
-                                <div class="block-index">Block #${block.index}</div>
-                                <div class="block-hash-preview" title="Hash: ${block.hash}">${block.hash.substring(0, 8)}...${block.hash.substring(block.hash.length - 4)}</div>`;
-                            blockElement.dataset.blockData = JSON.stringify(block);
-                            const handleBlockClick = () => {
-                                document.querySelectorAll('.block-visual.selected').forEach(selectedEl => selectedEl.classList.remove('selected'));
-                                blockElement.classList.add('selected');
-                                const clickedBlockData = JSON.parse(blockElement.dataset.blockData);
-                                displayBlockDetails(clickedBlockData);
-                            };
-                            blockElement.addEventListener('click', handleBlockClick);
-                            blockElement.addEventListener('keydown', (e) => {
-                                if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); handleBlockClick(); }
-                            });
-                            blockchainChainView.appendChild(blockElement);
-                        });
+                        appendBlocksToChainView(info.chain, info.next_cursor);
                     } else {
                         blockchainChainView.innerHTML = '<p>Blockchain is empty or could not be loaded.</p>';
                     }
@@ -454,6 +434,46 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Blocks are paginated by height; each page ends with a "Load more" button while next_cursor is set
+    function appendBlocksToChainView(blocks, nextCursor) {
+        blocks.forEach(block => {
+            const blockElement = document.createElement('div');
+            blockElement.classList.add('block-visual');
+            blockElement.setAttribute('role', 'button');
+            blockElement.setAttribute('tabindex', '0');
+            blockElement.innerHTML = `
+                <div class="block-index">Block #${block.index}</div>
+                <div class="block-hash-preview" title="Hash: ${block.hash}">${block.hash.substring(0, 8)}...${block.hash.substring(block.hash.length - 4)}</div>`;
+            blockElement.dataset.blockData = JSON.stringify(block);
+            const handleBlockClick = () => {
+                document.querySelectorAll('.block-visual.selected').forEach(selectedEl => selectedEl.classList.remove('selected'));
+                blockElement.classList.add('selected');
+                const clickedBlockData = JSON.parse(blockElement.dataset.blockData);
+                displayBlockDetails(clickedBlockData);
+            };
+            blockElement.addEventListener('click', handleBlockClick);
+            blockElement.addEventListener('keydown', (e) => {
+                if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); handleBlockClick(); }
+            });
+            blockchainChainView.appendChild(blockElement);
+        });
+        if (nextCursor !== null && nextCursor !== undefined) {
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.textContent = 'Load more';
+            loadMoreBtn.addEventListener('click', async () => {
+                loadMoreBtn.disabled = true;
+                try {
+                    const page = await apiRequest(`/events/blockchain/info?cursor=${nextCursor}`, 'GET', null, true);
+                    loadMoreBtn.remove();
+                    appendBlocksToChainView(page.chain, page.next_cursor);
+                } catch (error) {
+                    loadMoreBtn.disabled = false;
+                }
+            });
+            blockchainChainView.appendChild(loadMoreBtn);
+        }
+    }
+
     function displayBlockDetails(blockData) {
         if (!blockchainDetailView) { console.error("Cannot display block details: 'blockchainDetailView' is null."); return; }
         blockchainDetailView.innerHTML = '';
@@ -474,7 +494,7 @@ document.addEventListener('DOMContentLoaded', () => {
         addDetail('Timestamp:', `${new Date(blockData.timestamp * 1000).toLocaleString()} (Raw: ${blockData.timestamp})`);
         addDetail('Data (Event Details):', blockData.data, true);
         addDetail('Hash:', blockData.hash);
-        addDetail('Previous Hash:', blockData.previous_hash === "0" ? "0 (Genesis Block)" : blockData.previous_hash);
+        addDetail('Previous Hash:', /^0+$/.test(blockData.previous_hash) ? "0 (Genesis Block)" : blockData.previous_hash);
         addDetail('Nonce:', blockData.nonce);
         blockchainDetailView.appendChild(dl);
         blockchainDetailView.scrollIntoView({ behavior: 'smooth', block: 'nearest' });